@@ -0,0 +1,404 @@
+"""
+Benchmarks of the plugin discovery and loading path.
+
+Synthetic plugin roots with N plugins each are generated with
+`HookManGenerator.generate_plugin_template` (using the hook specs of the test "acme" project) and
+compiled into real shared libraries with the system C++ compiler. Each scenario (listing the
+``plugin.yaml`` files, probing the plugins, creating the ``HookCaller``...) then runs on every
+root in a fresh process, recording:
+
+- the wall time of the operation;
+- the read and write syscalls made by the operation (from ``/proc/self/io``, Linux only);
+- optionally (``--strace``) the total number of syscalls of the process, counted by ``strace -c``
+  and discounting those of a process that only imports hookman;
+- the peak RSS of the process, and its RSS before the operation.
+
+The plugins are generated in ``build/benchmarks`` (see ``--work-dir``), and the results are
+written to a JSON file (by default in its ``results`` directory). A previous results file can be
+given with ``--compare`` to print the relative change.
+
+Usually executed through ``inv benchmark``. The ``HookCaller`` scenario requires ``inv build``.
+Only Linux and macOS are supported.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from hookman.hooks import HookMan
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+SPECS_FILE = PROJECT_DIR / "tests/plugins/acme/hook_specs.py"
+ARTIFACTS_DIR = PROJECT_DIR / "build/artifacts"
+WORK_DIR = PROJECT_DIR / "build/benchmarks"
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+
+# Hook implementations given to the synthetic plugins, which implement different sets of hooks.
+_HOOK_IMPLEMENTATIONS = {
+    "HOOK_FRICTION_FACTOR": "HOOK_FRICTION_FACTOR(v1, v2) { return v1 + v2; }",
+    "HOOK_FRICTION_FACTOR_2": "HOOK_FRICTION_FACTOR_2(v1, v2) { return v1 * v2; }",
+    "HOOK_ENV_TEMPERATURE": "HOOK_ENV_TEMPERATURE(v3, v4) { return v3 - v4; }",
+}
+
+
+def _load_specs() -> Any:
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("hook_specs", SPECS_FILE)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.specs
+
+
+def _plugin_dir_name(index: int) -> str:
+    return f"bench_plugin_{index:05d}-1.0.0"
+
+
+def generate_plugin_pool(pool_dir: Path, count: int, jobs: int) -> None:
+    """
+    Make sure ``pool_dir`` has ``count`` compiled synthetic plugins, generating the missing ones.
+    """
+    from hookman.hookman_generator import HookManGenerator
+
+    generator = HookManGenerator(hook_spec_file_path=SPECS_FILE)
+    compiler = os.environ.get("CXX", "c++")
+    pool_dir.mkdir(parents=True, exist_ok=True)
+
+    def generate(index: int) -> None:
+        plugin_id = f"bench_plugin_{index:05d}"
+        plugin_dir = pool_dir / _plugin_dir_name(index)
+        shared_lib = plugin_dir / "artifacts" / f"lib{plugin_id}.so"
+        if shared_lib.is_file():
+            return
+        hooks = list(_HOOK_IMPLEMENTATIONS)
+        implemented = [hook for bit, hook in enumerate(hooks) if (index + 1) >> bit & 1]
+        with tempfile.TemporaryDirectory(dir=pool_dir) as staging_dir:
+            generator.generate_plugin_template(
+                caption=f"Benchmark Plugin {index}",
+                plugin_id=plugin_id,
+                author_email="benchmark@hookman.dev",
+                author_name="Benchmark",
+                dst_path=Path(staging_dir),
+                extra_body_lines=[_HOOK_IMPLEMENTATIONS[hook] for hook in implemented],
+                exclude_hooks=implemented,
+            )
+            staged_dir = Path(staging_dir, plugin_id)
+            (staged_dir / "artifacts").mkdir()
+            subprocess.run(
+                [
+                    compiler,
+                    "-shared",
+                    "-fPIC",
+                    "-O1",
+                    "-o",
+                    str(staged_dir / "artifacts" / shared_lib.name),
+                    str(staged_dir / "src" / f"{plugin_id}.cpp"),
+                ],
+                check=True,
+            )
+            shutil.rmtree(plugin_dir, ignore_errors=True)
+            staged_dir.rename(plugin_dir)
+
+    missing = [
+        index
+        for index in range(count)
+        if not (pool_dir / _plugin_dir_name(index) / "artifacts").is_dir()
+    ]
+    if missing:
+        print(f"Generating and compiling {len(missing)} plugins on {pool_dir}...", flush=True)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(generate, range(count)))
+
+
+def create_plugin_root(pool_dir: Path, roots_dir: Path, size: int) -> Path:
+    """
+    Return a plugin root with the first ``size`` plugins of the pool, hard linked when possible.
+    """
+    root = roots_dir / f"plugins-{size}"
+    if root.is_dir() and len(os.listdir(root)) == size:
+        return root
+    shutil.rmtree(root, ignore_errors=True)
+    root.mkdir(parents=True)
+    for index in range(size):
+        name = _plugin_dir_name(index)
+        try:
+            shutil.copytree(pool_dir / name, root / name, copy_function=os.link)
+        except OSError:
+            shutil.rmtree(root / name, ignore_errors=True)
+            shutil.copytree(pool_dir / name, root / name)
+    return root
+
+
+def _hookman(root: Path, **options: Any) -> "HookMan":
+    from hookman.hooks import HookMan
+
+    return HookMan(specs=_load_specs(), plugin_dirs=[root], **options)
+
+
+def _find_config_files(root: Path) -> Callable[[], object]:
+    from hookman import hookman_utils
+
+    return lambda: hookman_utils.find_config_files([root])
+
+
+def _find_installed_config_files(root: Path) -> Callable[[], object]:
+    from hookman import hookman_utils
+
+    return lambda: hookman_utils.find_installed_config_files([root])
+
+
+def _probe(root: Path) -> Callable[[], object]:
+    return _hookman(root).get_plugins_available_and_failures
+
+
+def _probe_static(root: Path) -> Callable[[], object]:
+    return _hookman(root, static_inspection=True).get_plugins_available_and_failures
+
+
+def _probe_cached(root: Path) -> Callable[[], object]:
+    for cache_file in root.glob(".hookman_cache.json"):
+        cache_file.unlink()
+    hm = _hookman(root, discovery_cache=True)
+    # Populate the cache, only the discovery served from the cache is measured.
+    hm.get_plugins_available_and_failures()
+    return hm.get_plugins_available_and_failures
+
+
+def _hook_caller(root: Path) -> Callable[[], object]:
+    sys.path.insert(0, str(ARTIFACTS_DIR))
+    return _hookman(root).get_hook_caller
+
+
+def _noop(root: Path) -> Callable[[], object]:
+    import hookman.hooks  # noqa: F401
+
+    return lambda: None
+
+
+SCENARIOS: dict[str, Callable[[Path], Callable[[], object]]] = {
+    "find_config_files": _find_config_files,
+    "find_installed_config_files": _find_installed_config_files,
+    "probe": _probe,
+    "probe_static_inspection": _probe_static,
+    "probe_discovery_cache": _probe_cached,
+    "hook_caller": _hook_caller,
+}
+"""
+Each scenario receives a plugin root and returns the operation to measure, so the setup of the
+scenario is not measured.
+"""
+
+
+def _io_syscalls() -> tuple[int, int] | None:
+    try:
+        content = Path("/proc/self/io").read_text()
+    except OSError:
+        return None
+    counters = dict(line.split(": ") for line in content.splitlines())
+    return int(counters["syscr"]), int(counters["syscw"])
+
+
+def _peak_rss_kib() -> int:
+    import resource
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in KiB on Linux.
+    return peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+
+
+def run_scenario(name: str, root: Path) -> dict[str, Any]:
+    """
+    Run the given scenario on ``root`` in the current process, returning its measurements.
+    """
+    setup = {**SCENARIOS, "noop": _noop}[name]
+    operation = setup(root)
+    baseline_rss_kib = _peak_rss_kib()
+    io_before = _io_syscalls()
+    start = time.perf_counter()
+    operation()
+    wall_time = time.perf_counter() - start
+    io_after = _io_syscalls()
+    measurement: dict[str, Any] = {
+        "wall_time_s": wall_time,
+        "peak_rss_kib": _peak_rss_kib(),
+        "baseline_rss_kib": baseline_rss_kib,
+    }
+    if io_before is not None and io_after is not None:
+        measurement["read_syscalls"] = io_after[0] - io_before[0]
+        measurement["write_syscalls"] = io_after[1] - io_before[1]
+    return measurement
+
+
+def _run_in_subprocess(name: str, root: Path, *, strace: bool = False) -> dict[str, Any]:
+    command = [sys.executable, __file__, "--run-scenario", name, "--root", str(root)]
+    if not strace:
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result: dict[str, Any] = json.loads(output)
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        strace_file = Path(tmp_dir, "strace.txt")
+        subprocess.run(
+            ["strace", "-f", "-c", "-o", str(strace_file), *command],
+            check=True,
+            capture_output=True,
+        )
+        # The last line is the summary: "100.00 <seconds> <usecs/call> <calls> [<errors>] total".
+        total_line = strace_file.read_text().strip().splitlines()[-1]
+        return {"syscalls": int(total_line.split()[3])}
+
+
+def run_benchmarks(
+    sizes: Sequence[int],
+    scenarios: Sequence[str],
+    repeat: int,
+    jobs: int,
+    strace: bool,
+    work_dir: Path = WORK_DIR,
+) -> list[dict[str, Any]]:
+    pool_dir = work_dir / "pool"
+    generate_plugin_pool(pool_dir, max(sizes), jobs)
+
+    results = []
+    for size in sizes:
+        root = create_plugin_root(pool_dir, work_dir / "roots", size)
+        baseline_syscalls = _run_in_subprocess("noop", root, strace=True) if strace else None
+        for name in scenarios:
+            measurements = [_run_in_subprocess(name, root) for _ in range(repeat)]
+            result: dict[str, Any] = {
+                "scenario": name,
+                "plugins": size,
+                "wall_time_s": [m["wall_time_s"] for m in measurements],
+                "wall_time_min_s": min(m["wall_time_s"] for m in measurements),
+                "peak_rss_kib": max(m["peak_rss_kib"] for m in measurements),
+                "baseline_rss_kib": max(m["baseline_rss_kib"] for m in measurements),
+            }
+            if "read_syscalls" in measurements[0]:
+                result["read_syscalls"] = min(m["read_syscalls"] for m in measurements)
+                result["write_syscalls"] = min(m["write_syscalls"] for m in measurements)
+            if baseline_syscalls is not None:
+                syscalls = _run_in_subprocess(name, root, strace=True)["syscalls"]
+                result["syscalls"] = syscalls - baseline_syscalls["syscalls"]
+            print(
+                f"{name:>28} {size:>5} plugins: {result['wall_time_min_s'] * 1000:10.1f} ms "
+                f"{result['peak_rss_kib'] / 1024:8.1f} MiB peak RSS",
+                flush=True,
+            )
+            results.append(result)
+    return results
+
+
+def _metadata() -> dict[str, Any]:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": revision,
+        "python": sys.version,
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(previous: dict[str, Any], current: dict[str, Any]) -> str:
+    """
+    Return a table comparing the results of two runs, as ratios of current / previous.
+    """
+    previous_results = {(r["scenario"], r["plugins"]): r for r in previous["results"]}
+    lines = [
+        (
+            f"{'scenario':>28} {'plugins':>7} {'wall time':>21} {'ratio':>6} {'peak RSS':>6} "
+            f"{'syscalls':>8}"
+        )
+    ]
+    for result in current["results"]:
+        key = (result["scenario"], result["plugins"])
+        if key not in previous_results:
+            continue
+        before = previous_results[key]
+        time_ratio = result["wall_time_min_s"] / max(before["wall_time_min_s"], 1e-9)
+        rss_ratio = result["peak_rss_kib"] / max(before["peak_rss_kib"], 1)
+        syscalls_ratio = (
+            f"{result['syscalls'] / max(before['syscalls'], 1):8.2f}"
+            if "syscalls" in result and "syscalls" in before
+            else f"{'-':>8}"
+        )
+        lines.append(
+            f"{result['scenario']:>28} {result['plugins']:>7} "
+            f"{before['wall_time_min_s'] * 1000:9.1f} -> "
+            f"{result['wall_time_min_s'] * 1000:7.1f} ms "
+            f"{time_ratio:6.2f} {rss_ratio:8.2f} {syscalls_ratio}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Number of plugins per root."
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each scenario and size.")
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Parallel compilations."
+    )
+    parser.add_argument("--strace", action="store_true", help="Also count syscalls with strace.")
+    parser.add_argument("--output", type=Path, help="Where to write the results JSON file.")
+    parser.add_argument("--compare", type=Path, help="Results JSON file of a previous run.")
+    parser.add_argument(
+        "--work-dir", type=Path, default=WORK_DIR, help="Where the plugins are generated."
+    )
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--root", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        # Child process of `run_benchmarks`.
+        print(json.dumps(run_scenario(args.run_scenario, args.root)))
+        return
+    if args.strace and shutil.which("strace") is None:
+        parser.error("--strace requires the strace executable")
+
+    current = {
+        "metadata": _metadata(),
+        "results": run_benchmarks(
+            args.sizes, args.scenarios, args.repeat, args.jobs, args.strace, args.work_dir
+        ),
+    }
+    output = args.output or (
+        args.work_dir / "results" / f"discovery-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(current, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        print(compare(json.loads(args.compare.read_text()), current))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+// File automatically generated by hookman, **DO NOT MODIFY MANUALLY**
+#include <pybind11/functional.h>
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl_bind.h>
+#include <HookCaller.hpp>
+#include <memory>
+
+namespace py = pybind11;
+
+PYBIND11_MAKE_OPAQUE(std::vector<hookman::HookImpl<float(float, float)>>);
+PYBIND11_MAKE_OPAQUE(std::vector<hookman::HookImpl<int(int, int)>>);
+
+namespace {
+
+template <typename T>
+using batch_array = py::array_t<T, py::array::c_style | py::array::forcecast>;
+
+// The array where `size` results are written: `out`, or a new array if `out` is None.
+template <typename T>
+py::array_t<T> results_array(py::object out, py::ssize_t size, const char *type_name) {
+    if (out.is_none()) {
+        return py::array_t<T>(size);
+    }
+    if (!py::isinstance<py::array_t<T, py::array::c_style>>(out) || py::array(out).ndim() != 1 || py::array(out).shape(0) != size) {
+        throw py::value_error(std::string("out must be a contiguous 1-dimensional array of ") + type_name + " with " + std::to_string(size) + " elements");
+    }
+    return py::reinterpret_borrow<py::array_t<T>>(out);
+}
+
+// The data of a call_<hook>_batch() argument, which must have `count` elements, or `count`
+// rows of `size` elements for array arguments.
+template <typename T>
+T* batch_data(batch_array<T> &array, const char *name, py::ssize_t count, py::ssize_t size) {
+    bool valid = size == 0 ? array.ndim() == 1 : array.ndim() == 2 && array.shape(1) == size;
+    if (!valid || array.shape(0) != count) {
+        throw py::value_error(std::string("argument ") + name + " must have " + std::to_string(count) + " elements, one per evaluation");
+    }
+    return array.mutable_data();
+}
+
+int call_friction_factor(const hookman::HookCaller &self, const std::string &plugin_id, int v1, int v2) {
+    auto lock = self.read_lock();
+    const auto &impl = self.friction_factor_impl(plugin_id);
+    if (!impl) {
+        throw py::key_error("No implementation of hook friction_factor for plugin " + plugin_id);
+    }
+    return impl(v1, v2);
+}
+
+int call_friction_factor_at(const hookman::HookCaller &self, size_t index, int v1, int v2) {
+    auto lock = self.read_lock();
+    const auto &impls = self.friction_factor_impls();
+    if (index >= impls.size()) {
+        throw py::index_error("Index " + std::to_string(index) + " out of range for the " + std::to_string(impls.size()) + " implementations of hook friction_factor");
+    }
+    return impls[index](v1, v2);
+}
+
+py::array_t<int> call_friction_factor_all(const hookman::HookCaller &self, int v1, int v2, py::object out) {
+    py::array_t<int> results;
+    {
+        py::gil_scoped_release release;
+        auto lock = self.read_lock();
+        auto size = static_cast<py::ssize_t>(self.friction_factor_impls().size());
+        int* results_data = nullptr;
+        {
+            py::gil_scoped_acquire acquire;
+            results = results_array<int>(out, size, "int");
+            results_data = results.mutable_data();
+        }
+        self.call_friction_factor_all(v1, v2, results_data);
+    }
+    return results;
+}
+
+py::array_t<int> call_friction_factor_batch(const hookman::HookCaller &self, const std::string &plugin_id, batch_array<int> v1, batch_array<int> v2, py::object out) {
+    py::ssize_t count = v1.ndim() > 0 ? v1.shape(0) : 0;
+    auto v1_data = batch_data(v1, "v1", count, 0);
+    auto v2_data = batch_data(v2, "v2", count, 0);
+    auto results = results_array<int>(out, count, "int");
+    auto results_data = results.mutable_data();
+    {
+        py::gil_scoped_release release;
+        auto lock = self.read_lock();
+        if (!self.friction_factor_impl(plugin_id)) {
+            throw py::key_error("No implementation of hook friction_factor for plugin " + plugin_id);
+        }
+        self.call_friction_factor_batch(plugin_id, static_cast<size_t>(count), v1_data, v2_data, results_data);
+    }
+    return results;
+}
+
+int call_friction_factor_2(const hookman::HookCaller &self, const std::string &plugin_id, int v1, int v2) {
+    auto lock = self.read_lock();
+    const auto &impl = self.friction_factor_2_impl(plugin_id);
+    if (!impl) {
+        throw py::key_error("No implementation of hook friction_factor_2 for plugin " + plugin_id);
+    }
+    return impl(v1, v2);
+}
+
+int call_friction_factor_2_at(const hookman::HookCaller &self, size_t index, int v1, int v2) {
+    auto lock = self.read_lock();
+    const auto &impls = self.friction_factor_2_impls();
+    if (index >= impls.size()) {
+        throw py::index_error("Index " + std::to_string(index) + " out of range for the " + std::to_string(impls.size()) + " implementations of hook friction_factor_2");
+    }
+    return impls[index](v1, v2);
+}
+
+py::array_t<int> call_friction_factor_2_all(const hookman::HookCaller &self, int v1, int v2, py::object out) {
+    py::array_t<int> results;
+    {
+        py::gil_scoped_release release;
+        auto lock = self.read_lock();
+        auto size = static_cast<py::ssize_t>(self.friction_factor_2_impls().size());
+        int* results_data = nullptr;
+        {
+            py::gil_scoped_acquire acquire;
+            results = results_array<int>(out, size, "int");
+            results_data = results.mutable_data();
+        }
+        self.call_friction_factor_2_all(v1, v2, results_data);
+    }
+    return results;
+}
+
+float call_env_temperature(const hookman::HookCaller &self, const std::string &plugin_id, float v3, float v4) {
+    auto lock = self.read_lock();
+    const auto &impl = self.env_temperature_impl(plugin_id);
+    if (!impl) {
+        throw py::key_error("No implementation of hook env_temperature for plugin " + plugin_id);
+    }
+    return impl(v3, v4);
+}
+
+float call_env_temperature_at(const hookman::HookCaller &self, size_t index, float v3, float v4) {
+    auto lock = self.read_lock();
+    const auto &impls = self.env_temperature_impls();
+    if (index >= impls.size()) {
+        throw py::index_error("Index " + std::to_string(index) + " out of range for the " + std::to_string(impls.size()) + " implementations of hook env_temperature");
+    }
+    return impls[index](v3, v4);
+}
+
+py::array_t<float> call_env_temperature_all(const hookman::HookCaller &self, float v3, float v4, py::object out) {
+    py::array_t<float> results;
+    {
+        py::gil_scoped_release release;
+        auto lock = self.read_lock();
+        auto size = static_cast<py::ssize_t>(self.env_temperature_impls().size());
+        float* results_data = nullptr;
+        {
+            py::gil_scoped_acquire acquire;
+            results = results_array<float>(out, size, "float");
+            results_data = results.mutable_data();
+        }
+        self.call_env_temperature_all(v3, v4, results_data);
+    }
+    return results;
+}
+
+}  // namespace
+
+PYBIND11_MODULE(_simple, m) {
+    py::class_<hookman::HookImpl<float(float, float)>>(m, "hook_impl_type_0", "Hook implementation type 0")
+        .def("__call__", &hookman::HookImpl<float(float, float)>::operator());
+    py::bind_vector<std::vector<hookman::HookImpl<float(float, float)>>>(m, "vector_hook_impl_type_0", "Hook for vector implementation type 0");
+    py::class_<hookman::HookImpl<int(int, int)>>(m, "hook_impl_type_1", "Hook implementation type 1")
+        .def("__call__", &hookman::HookImpl<int(int, int)>::operator());
+    py::bind_vector<std::vector<hookman::HookImpl<int(int, int)>>>(m, "vector_hook_impl_type_1", "Hook for vector implementation type 1");
+
+    py::class_<hookman::HookCaller>(m, "HookCaller")
+        .def(py::init<>())
+        .def("load_impls_from_library", &hookman::HookCaller::load_impls_from_library, py::call_guard<py::gil_scoped_release>())
+        .def("remove_impls", &hookman::HookCaller::remove_impls, py::call_guard<py::gil_scoped_release>())
+        .def("friction_factor_impls", [](const hookman::HookCaller &self) { auto lock = self.read_lock(); return self.friction_factor_impls(); }, py::call_guard<py::gil_scoped_release>())
+        .def("friction_factor_impls_count", [](const hookman::HookCaller &self) { auto lock = self.read_lock(); return self.friction_factor_impls().size(); }, py::call_guard<py::gil_scoped_release>())
+        .def("friction_factor_impl", [](const hookman::HookCaller &self, const std::string &plugin_id) { auto lock = self.read_lock(); const auto &impl = self.friction_factor_impl(plugin_id); return impl ? std::make_unique<hookman::HookImpl<int(int, int)>>(impl) : nullptr; }, py::call_guard<py::gil_scoped_release>())
+        .def("append_friction_factor_impl", (void (hookman::HookCaller::*)(uintptr_t, const std::string&)) &hookman::HookCaller::append_friction_factor_impl, py::call_guard<py::gil_scoped_release>())
+        .def("append_friction_factor_impl", (void (hookman::HookCaller::*)(std::function<int(int, int)>, const std::string&)) &hookman::HookCaller::append_friction_factor_impl, py::call_guard<py::gil_scoped_release>())
+        .def("call_friction_factor", &call_friction_factor, py::arg("plugin_id"), py::arg("v1"), py::arg("v2"), py::call_guard<py::gil_scoped_release>())
+        .def("call_friction_factor_at", &call_friction_factor_at, py::arg("index"), py::arg("v1"), py::arg("v2"), py::call_guard<py::gil_scoped_release>())
+        .def("call_friction_factor_all", &call_friction_factor_all, py::arg("v1"), py::arg("v2"), py::arg("out") = py::none())
+        .def("call_friction_factor_batch", &call_friction_factor_batch, py::arg("plugin_id"), py::arg("v1"), py::arg("v2"), py::arg("out") = py::none())
+        .def("friction_factor_2_impls", [](const hookman::HookCaller &self) { auto lock = self.read_lock(); return self.friction_factor_2_impls(); }, py::call_guard<py::gil_scoped_release>())
+        .def("friction_factor_2_impls_count", [](const hookman::HookCaller &self) { auto lock = self.read_lock(); return self.friction_factor_2_impls().size(); }, py::call_guard<py::gil_scoped_release>())
+        .def("friction_factor_2_impl", [](const hookman::HookCaller &self, const std::string &plugin_id) { auto lock = self.read_lock(); const auto &impl = self.friction_factor_2_impl(plugin_id); return impl ? std::make_unique<hookman::HookImpl<int(int, int)>>(impl) : nullptr; }, py::call_guard<py::gil_scoped_release>())
+        .def("append_friction_factor_2_impl", (void (hookman::HookCaller::*)(uintptr_t, const std::string&)) &hookman::HookCaller::append_friction_factor_2_impl, py::call_guard<py::gil_scoped_release>())
+        .def("append_friction_factor_2_impl", (void (hookman::HookCaller::*)(std::function<int(int, int)>, const std::string&)) &hookman::HookCaller::append_friction_factor_2_impl, py::call_guard<py::gil_scoped_release>())
+        .def("call_friction_factor_2", &call_friction_factor_2, py::arg("plugin_id"), py::arg("v1"), py::arg("v2"), py::call_guard<py::gil_scoped_release>())
+        .def("call_friction_factor_2_at", &call_friction_factor_2_at, py::arg("index"), py::arg("v1"), py::arg("v2"), py::call_guard<py::gil_scoped_release>())
+        .def("call_friction_factor_2_all", &call_friction_factor_2_all, py::arg("v1"), py::arg("v2"), py::arg("out") = py::none())
+        .def("env_temperature_impls", [](const hookman::HookCaller &self) { auto lock = self.read_lock(); return self.env_temperature_impls(); }, py::call_guard<py::gil_scoped_release>())
+        .def("env_temperature_impls_count", [](const hookman::HookCaller &self) { auto lock = self.read_lock(); return self.env_temperature_impls().size(); }, py::call_guard<py::gil_scoped_release>())
+        .def("env_temperature_impl", [](const hookman::HookCaller &self, const std::string &plugin_id) { auto lock = self.read_lock(); const auto &impl = self.env_temperature_impl(plugin_id); return impl ? std::make_unique<hookman::HookImpl<float(float, float)>>(impl) : nullptr; }, py::call_guard<py::gil_scoped_release>())
+        .def("append_env_temperature_impl", (void (hookman::HookCaller::*)(uintptr_t, const std::string&)) &hookman::HookCaller::append_env_temperature_impl, py::call_guard<py::gil_scoped_release>())
+        .def("append_env_temperature_impl", (void (hookman::HookCaller::*)(std::function<float(float, float)>, const std::string&)) &hookman::HookCaller::append_env_temperature_impl, py::call_guard<py::gil_scoped_release>())
+        .def("call_env_temperature", &call_env_temperature, py::arg("plugin_id"), py::arg("v3"), py::arg("v4"), py::call_guard<py::gil_scoped_release>())
+        .def("call_env_temperature_at", &call_env_temperature_at, py::arg("index"), py::arg("v3"), py::arg("v4"), py::call_guard<py::gil_scoped_release>())
+        .def("call_env_temperature_all", &call_env_temperature_all, py::arg("v3"), py::arg("v4"), py::arg("out") = py::none())
+    ;
+}
@@ -0,0 +1,432 @@
+// File automatically generated by hookman, **DO NOT MODIFY MANUALLY**
+#ifndef _H_HOOKMAN_HOOK_CALLER
+#define _H_HOOKMAN_HOOK_CALLER
+
+#include <functional>
+#include <mutex>
+#include <shared_mutex>
+#include <stdexcept>
+#include <string>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+#ifdef _WIN32
+    #include <cstdlib>
+    #include <windows.h>
+#else
+    #include <dlfcn.h>
+#endif
+
+
+namespace hookman {
+
+template <typename F_TYPE> std::function<F_TYPE> from_c_pointer(uintptr_t p) {
+    return std::function<F_TYPE>(reinterpret_cast<F_TYPE *>(p));
+}
+
+// An implementation of a hook: a plain function pointer for the ones found in the plugin
+// libraries, called without the type erasure of std::function, or a std::function for the
+// ones appended as such.
+template <typename F_TYPE> class HookImpl;
+
+template <typename R, typename... Args> class HookImpl<R(Args...)> {
+public:
+    HookImpl() = default;
+    explicit HookImpl(R (*pointer)(Args...)) : pointer(pointer) {}
+    explicit HookImpl(std::function<R(Args...)> function) : function(std::move(function)) {}
+
+    R operator()(Args... args) const {
+        if (this->pointer != nullptr) {
+            return this->pointer(args...);
+        }
+        return this->function(args...);
+    }
+
+    explicit operator bool() const {
+        return this->pointer != nullptr || static_cast<bool>(this->function);
+    }
+
+    // The function pointer of a native implementation, nullptr otherwise.
+    R (*native() const)(Args...) {
+        return this->pointer;
+    }
+
+private:
+    R (*pointer)(Args...) = nullptr;
+    std::function<R(Args...)> function;
+};
+
+class HookCaller {
+public:
+    // The methods changing the implementations (load_impls_from_library(), append_*_impl() and
+    // remove_impls()) hold an exclusive lock of the HookCaller. Hold this shared lock while
+    // reading or calling the implementations (*_impls(), *_impl(), for_each_*_impl(),
+    // call_*_all() and call_*_batch()) if other threads may change them concurrently.
+    std::shared_lock<std::shared_mutex> read_lock() const {
+        return std::shared_lock<std::shared_mutex>(this->mutex);
+    }
+
+    const std::vector<HookImpl<int(int, int)>>& friction_factor_impls() const {
+        return this->_friction_factor_impls;
+    }
+    template <typename Visitor>
+    void for_each_friction_factor_impl(Visitor&& visitor) const {
+        for (const auto& impl : this->_friction_factor_impls) {
+            visitor(impl);
+        }
+    }
+    const HookImpl<int(int, int)>& friction_factor_impl(const std::string &plugin_id) const {
+        static const HookImpl<int(int, int)> not_found;
+        auto it = this->_friction_factor_index.find(plugin_id);
+        return it == this->_friction_factor_index.end() ? not_found : this->_friction_factor_impls[it->second];
+    }
+    // Write the result of the i-th implementation to results[i], see friction_factor_impls().size().
+    void call_friction_factor_all(int v1, int v2, int* results) const {
+        const auto& impls = this->_friction_factor_impls;
+        for (size_t i = 0; i < impls.size(); ++i) {
+            results[i] = impls[i](v1, v2);
+        }
+    }
+    void call_friction_factor_batch(const std::string &plugin_id, size_t count, int* v1, int* v2, int* results) const {
+        auto it = this->_friction_factor_index.find(plugin_id);
+        if (it == this->_friction_factor_index.end()) {
+            throw std::out_of_range("No implementation of hook friction_factor for plugin " + plugin_id);
+        }
+        auto batch_impl = this->_friction_factor_batch_impls[it->second];
+        if (batch_impl != nullptr) {
+            batch_impl(count, v1, v2, results);
+            return;
+        }
+        const auto& impl = this->_friction_factor_impls[it->second];
+        for (size_t i = 0; i < count; ++i) {
+            results[i] = impl(v1[i], v2[i]);
+        }
+    }
+    const std::vector<HookImpl<int(int, int)>>& friction_factor_2_impls() const {
+        return this->_friction_factor_2_impls;
+    }
+    template <typename Visitor>
+    void for_each_friction_factor_2_impl(Visitor&& visitor) const {
+        for (const auto& impl : this->_friction_factor_2_impls) {
+            visitor(impl);
+        }
+    }
+    const HookImpl<int(int, int)>& friction_factor_2_impl(const std::string &plugin_id) const {
+        static const HookImpl<int(int, int)> not_found;
+        auto it = this->_friction_factor_2_index.find(plugin_id);
+        return it == this->_friction_factor_2_index.end() ? not_found : this->_friction_factor_2_impls[it->second];
+    }
+    // Write the result of the i-th implementation to results[i], see friction_factor_2_impls().size().
+    void call_friction_factor_2_all(int v1, int v2, int* results) const {
+        const auto& impls = this->_friction_factor_2_impls;
+        for (size_t i = 0; i < impls.size(); ++i) {
+            results[i] = impls[i](v1, v2);
+        }
+    }
+    const std::vector<HookImpl<float(float, float)>>& env_temperature_impls() const {
+        return this->_env_temperature_impls;
+    }
+    template <typename Visitor>
+    void for_each_env_temperature_impl(Visitor&& visitor) const {
+        for (const auto& impl : this->_env_temperature_impls) {
+            visitor(impl);
+        }
+    }
+    const HookImpl<float(float, float)>& env_temperature_impl(const std::string &plugin_id) const {
+        static const HookImpl<float(float, float)> not_found;
+        auto it = this->_env_temperature_index.find(plugin_id);
+        return it == this->_env_temperature_index.end() ? not_found : this->_env_temperature_impls[it->second];
+    }
+    // Write the result of the i-th implementation to results[i], see env_temperature_impls().size().
+    void call_env_temperature_all(float v3, float v4, float* results) const {
+        const auto& impls = this->_env_temperature_impls;
+        for (size_t i = 0; i < impls.size(); ++i) {
+            results[i] = impls[i](v3, v4);
+        }
+    }
+
+    void append_friction_factor_impl(uintptr_t pointer, const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        using F_TYPE = int(int, int);
+        this->add_friction_factor_impl(HookImpl<F_TYPE>(reinterpret_cast<F_TYPE *>(pointer)), plugin_id);
+    }
+
+    void append_friction_factor_impl(std::function<int(int, int)> func, const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->add_friction_factor_impl(HookImpl<int(int, int)>(std::move(func)), plugin_id);
+    }
+    void append_friction_factor_2_impl(uintptr_t pointer, const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        using F_TYPE = int(int, int);
+        this->add_friction_factor_2_impl(HookImpl<F_TYPE>(reinterpret_cast<F_TYPE *>(pointer)), plugin_id);
+    }
+
+    void append_friction_factor_2_impl(std::function<int(int, int)> func, const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->add_friction_factor_2_impl(HookImpl<int(int, int)>(std::move(func)), plugin_id);
+    }
+    void append_env_temperature_impl(uintptr_t pointer, const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        using F_TYPE = float(float, float);
+        this->add_env_temperature_impl(HookImpl<F_TYPE>(reinterpret_cast<F_TYPE *>(pointer)), plugin_id);
+    }
+
+    void append_env_temperature_impl(std::function<float(float, float)> func, const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->add_env_temperature_impl(HookImpl<float(float, float)>(std::move(func)), plugin_id);
+    }
+
+    void remove_impls(const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        for (size_t i = this->_friction_factor_impls.size(); i > 0; --i) {
+            if (this->_friction_factor_plugin_ids[i - 1] == plugin_id) {
+                this->_friction_factor_impls.erase(this->_friction_factor_impls.begin() + (i - 1));
+                this->_friction_factor_plugin_ids.erase(this->_friction_factor_plugin_ids.begin() + (i - 1));
+                this->_friction_factor_batch_impls.erase(this->_friction_factor_batch_impls.begin() + (i - 1));
+            }
+        }
+        this->_friction_factor_index.clear();
+        for (size_t i = 0; i < this->_friction_factor_plugin_ids.size(); ++i) {
+            this->_friction_factor_index[this->_friction_factor_plugin_ids[i]] = i;
+        }
+        for (size_t i = this->_friction_factor_2_impls.size(); i > 0; --i) {
+            if (this->_friction_factor_2_plugin_ids[i - 1] == plugin_id) {
+                this->_friction_factor_2_impls.erase(this->_friction_factor_2_impls.begin() + (i - 1));
+                this->_friction_factor_2_plugin_ids.erase(this->_friction_factor_2_plugin_ids.begin() + (i - 1));
+            }
+        }
+        this->_friction_factor_2_index.clear();
+        for (size_t i = 0; i < this->_friction_factor_2_plugin_ids.size(); ++i) {
+            this->_friction_factor_2_index[this->_friction_factor_2_plugin_ids[i]] = i;
+        }
+        for (size_t i = this->_env_temperature_impls.size(); i > 0; --i) {
+            if (this->_env_temperature_plugin_ids[i - 1] == plugin_id) {
+                this->_env_temperature_impls.erase(this->_env_temperature_impls.begin() + (i - 1));
+                this->_env_temperature_plugin_ids.erase(this->_env_temperature_plugin_ids.begin() + (i - 1));
+            }
+        }
+        this->_env_temperature_index.clear();
+        for (size_t i = 0; i < this->_env_temperature_plugin_ids.size(); ++i) {
+            this->_env_temperature_index[this->_env_temperature_plugin_ids[i]] = i;
+        }
+        this->close_libraries(plugin_id);
+    }
+
+#if defined(_WIN32)
+
+public:
+    ~HookCaller() {
+        for (auto& handle : this->handles) {
+            FreeLibrary(handle.second);
+        }
+    }
+    void load_impls_from_library(const std::string& utf8_filename, const std::string& plugin_id) {
+        std::wstring w_filename = utf8_to_wstring(utf8_filename);
+        auto handle = this->load_dll(w_filename);
+        if (handle == NULL) {
+            DWORD error_code = GetLastError();
+            char error_buf[512] = {};
+            FormatMessageA(FORMAT_MESSAGE_FROM_SYSTEM | FORMAT_MESSAGE_IGNORE_INSERTS, nullptr, error_code, 0, error_buf, sizeof(error_buf), nullptr);
+            std::string error_msg(error_buf);
+            while (!error_msg.empty() && (error_msg.back() <= ' ')) { error_msg.pop_back(); }
+            throw std::runtime_error("Error loading library " + utf8_filename + ": " + error_msg + " (code " + std::to_string(error_code) + ")");
+        }
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->handles.emplace_back(plugin_id, handle);
+
+        auto p0 = GetProcAddress(handle, "acme_v1_friction_factor");
+        if (p0 != nullptr) {
+            this->add_friction_factor_impl(HookImpl<int(int, int)>(reinterpret_cast<int (*)(int, int)>(p0)), plugin_id);
+            auto batch_impl = GetProcAddress(handle, "acme_v1_friction_factor_batch");
+            if (batch_impl != nullptr) {
+                this->_friction_factor_batch_impls.back() = reinterpret_cast<void (*)(size_t, int*, int*, int*)>(batch_impl);
+            }
+        }
+
+        auto p1 = GetProcAddress(handle, "acme_v1_friction_factor_2");
+        if (p1 != nullptr) {
+            this->add_friction_factor_2_impl(HookImpl<int(int, int)>(reinterpret_cast<int (*)(int, int)>(p1)), plugin_id);
+        }
+
+        auto p2 = GetProcAddress(handle, "acme_v1_env_temperature");
+        if (p2 != nullptr) {
+            this->add_env_temperature_impl(HookImpl<float(float, float)>(reinterpret_cast<float (*)(float, float)>(p2)), plugin_id);
+        }
+
+    }
+
+
+private:
+    std::wstring utf8_to_wstring(const std::string& s) {
+        int flags = 0;
+        int required_size = MultiByteToWideChar(CP_UTF8, flags, s.c_str(), -1, nullptr, 0);
+        std::wstring result;
+        if (required_size == 0) {
+            return result;
+        }
+        result.resize(required_size);
+        int err = MultiByteToWideChar(CP_UTF8, flags, s.c_str(), -1, &result[0], required_size);
+        if (err == 0) {
+            // error handling: https://docs.microsoft.com/en-us/windows/desktop/api/stringapiset/nf-stringapiset-multibytetowidechar#return-value
+            switch (GetLastError()) {
+                case ERROR_INSUFFICIENT_BUFFER: throw std::runtime_error("utf8_to_wstring: ERROR_INSUFFICIENT_BUFFER");
+                case ERROR_INVALID_FLAGS: throw std::runtime_error("utf8_to_wstring: ERROR_INVALID_FLAGS");
+                case ERROR_INVALID_PARAMETER: throw std::runtime_error("utf8_to_wstring: ERROR_INVALID_PARAMETER");
+                case ERROR_NO_UNICODE_TRANSLATION: throw std::runtime_error("utf8_to_wstring: ERROR_NO_UNICODE_TRANSLATION");
+                default: throw std::runtime_error("Undefined error: " + std::to_string(GetLastError()));
+            }
+        }
+        return result;
+    }
+
+
+    class PathGuard {
+    public:
+        explicit PathGuard(std::wstring filename)
+            : path_env{ get_path() }
+        {
+            std::wstring::size_type dir_name_size = filename.find_last_of(L"/\\");
+            std::wstring new_path_env = path_env + L";" + filename.substr(0, dir_name_size);
+            _wputenv_s(L"PATH", new_path_env.c_str());
+        }
+
+        ~PathGuard() {
+            _wputenv_s(L"PATH", path_env.c_str());
+        }
+
+    private:
+        static std::wstring get_path() {
+            rsize_t _len = 0;
+            wchar_t *buf;
+            _wdupenv_s(&buf, &_len, L"PATH");
+            std::wstring path_env{ buf };
+            free(buf);
+            return path_env;
+        } 
+
+        std::wstring path_env;
+    };
+
+    HMODULE load_dll(const std::wstring& filename) {
+        // Path Modifier
+        PathGuard path_guard{ filename };
+        // Suppress the Windows hard-error dialog that LoadLibraryW would otherwise
+        // show for unresolved DLL imports before returning NULL.
+        // NOTE: the same suppression logic exists in suppress_dll_error_dialog() in
+        // hookman_utils.py - keep both in sync when changing flags or error handling.
+        DWORD old_error_mode = 0;
+        if (!SetThreadErrorMode(SEM_FAILCRITICALERRORS | SEM_NOOPENFILEERRORBOX, &old_error_mode)) {
+            throw std::runtime_error("SetThreadErrorMode failed: " + std::to_string(GetLastError()));
+        }
+        HMODULE handle = LoadLibraryW(filename.c_str());
+        if (!SetThreadErrorMode(old_error_mode, nullptr)) {
+            throw std::runtime_error("SetThreadErrorMode restore failed: " + std::to_string(GetLastError()));
+        }
+        return handle;
+    }
+
+
+    void close_libraries(const std::string& plugin_id) {
+        for (auto it = this->handles.begin(); it != this->handles.end();) {
+            if (it->first == plugin_id) {
+                FreeLibrary(it->second);
+                it = this->handles.erase(it);
+            } else {
+                ++it;
+            }
+        }
+    }
+
+
+private:
+    std::vector<std::pair<std::string, HMODULE>> handles;
+
+#elif defined(__linux__)
+
+private:
+    std::vector<std::pair<std::string, void*>> handles;
+
+    void close_libraries(const std::string& plugin_id) {
+        for (auto it = this->handles.begin(); it != this->handles.end();) {
+            if (it->first == plugin_id) {
+                dlclose(it->second);
+                it = this->handles.erase(it);
+            } else {
+                ++it;
+            }
+        }
+    }
+
+public:
+    ~HookCaller() {
+        for (auto& handle : this->handles) {
+            dlclose(handle.second);
+        }
+    }
+    void load_impls_from_library(const std::string& utf8_filename, const std::string& plugin_id) {
+        auto handle = dlopen(utf8_filename.c_str(), RTLD_LAZY);
+        if (handle == nullptr) {
+            throw std::runtime_error("Error loading library " + utf8_filename + ": dlopen failed");
+        }
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->handles.emplace_back(plugin_id, handle);
+
+        auto p0 = dlsym(handle, "acme_v1_friction_factor");
+        if (p0 != nullptr) {
+            this->add_friction_factor_impl(HookImpl<int(int, int)>(reinterpret_cast<int (*)(int, int)>(p0)), plugin_id);
+            auto batch_impl = dlsym(handle, "acme_v1_friction_factor_batch");
+            if (batch_impl != nullptr) {
+                this->_friction_factor_batch_impls.back() = reinterpret_cast<void (*)(size_t, int*, int*, int*)>(batch_impl);
+            }
+        }
+
+        auto p1 = dlsym(handle, "acme_v1_friction_factor_2");
+        if (p1 != nullptr) {
+            this->add_friction_factor_2_impl(HookImpl<int(int, int)>(reinterpret_cast<int (*)(int, int)>(p1)), plugin_id);
+        }
+
+        auto p2 = dlsym(handle, "acme_v1_env_temperature");
+        if (p2 != nullptr) {
+            this->add_env_temperature_impl(HookImpl<float(float, float)>(reinterpret_cast<float (*)(float, float)>(p2)), plugin_id);
+        }
+
+    }
+
+#else
+    #error "unknown platform"
+#endif
+
+private:
+    void add_friction_factor_impl(HookImpl<int(int, int)> impl, const std::string &plugin_id) {
+        this->_friction_factor_index[plugin_id] = this->_friction_factor_impls.size();
+        this->_friction_factor_impls.push_back(std::move(impl));
+        this->_friction_factor_plugin_ids.push_back(plugin_id);
+        this->_friction_factor_batch_impls.push_back(nullptr);
+    }
+    void add_friction_factor_2_impl(HookImpl<int(int, int)> impl, const std::string &plugin_id) {
+        this->_friction_factor_2_index[plugin_id] = this->_friction_factor_2_impls.size();
+        this->_friction_factor_2_impls.push_back(std::move(impl));
+        this->_friction_factor_2_plugin_ids.push_back(plugin_id);
+    }
+    void add_env_temperature_impl(HookImpl<float(float, float)> impl, const std::string &plugin_id) {
+        this->_env_temperature_index[plugin_id] = this->_env_temperature_impls.size();
+        this->_env_temperature_impls.push_back(std::move(impl));
+        this->_env_temperature_plugin_ids.push_back(plugin_id);
+    }
+
+    std::vector<HookImpl<int(int, int)>> _friction_factor_impls;
+    std::vector<std::string> _friction_factor_plugin_ids;
+    std::unordered_map<std::string, size_t> _friction_factor_index;
+    std::vector<void (*)(size_t, int*, int*, int*)> _friction_factor_batch_impls;
+    std::vector<HookImpl<int(int, int)>> _friction_factor_2_impls;
+    std::vector<std::string> _friction_factor_2_plugin_ids;
+    std::unordered_map<std::string, size_t> _friction_factor_2_index;
+    std::vector<HookImpl<float(float, float)>> _env_temperature_impls;
+    std::vector<std::string> _env_temperature_plugin_ids;
+    std::unordered_map<std::string, size_t> _env_temperature_index;
+    mutable std::shared_mutex mutex;
+};
+
+}  // namespace hookman
+#endif // _H_HOOKMAN_HOOK_CALLER
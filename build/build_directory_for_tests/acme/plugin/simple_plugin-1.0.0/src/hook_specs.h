@@ -0,0 +1,53 @@
+/* File automatically generated by hookman, **DO NOT MODIFY MANUALLY** */
+#ifndef ACME_HOOK_SPECS_HEADER_FILE
+#define ACME_HOOK_SPECS_HEADER_FILE
+#ifdef __cplusplus
+    #define _HOOKMAN_EXTERN_C extern "C"
+#else
+    #define _HOOKMAN_EXTERN_C
+#endif
+
+#include <stddef.h>
+
+#ifdef WIN32
+    #define HOOKMAN_API_EXP _HOOKMAN_EXTERN_C __declspec(dllexport)
+    #define HOOKMAN_FUNC_EXP __cdecl
+#else
+    #define HOOKMAN_API_EXP _HOOKMAN_EXTERN_C
+    #define HOOKMAN_FUNC_EXP
+#endif
+
+HOOKMAN_API_EXP const char* HOOKMAN_FUNC_EXP acme_version_api() {
+    return "v1";
+}
+
+HOOKMAN_API_EXP const char* HOOKMAN_FUNC_EXP get_plugin_id() {
+    return "simple_plugin";
+}
+
+
+/*!
+Docs for Friction Factor
+*/
+#define HOOK_FRICTION_FACTOR(v1, v2) HOOKMAN_API_EXP int HOOKMAN_FUNC_EXP acme_v1_friction_factor(int v1, int v2)
+
+/*!
+Array form of HOOK_FRICTION_FACTOR: evaluates it `count` times, the i-th time with the i-th
+element of each argument array, writing the i-th result to `results[i]`.
+*/
+#define HOOK_FRICTION_FACTOR_BATCH(count, v1, v2, results) HOOKMAN_API_EXP void HOOKMAN_FUNC_EXP acme_v1_friction_factor_batch(size_t count, int* v1, int* v2, int* results)
+
+/*!
+Docs for Friction Factor
+
+Just to test a duplicated signature
+*/
+#define HOOK_FRICTION_FACTOR_2(v1, v2) HOOKMAN_API_EXP int HOOKMAN_FUNC_EXP acme_v1_friction_factor_2(int v1, int v2)
+
+/*!
+Docs for Environment Temperature
+*/
+#define HOOK_ENV_TEMPERATURE(v3, v4) HOOKMAN_API_EXP float HOOKMAN_FUNC_EXP acme_v1_env_temperature(float v3, float v4)
+
+
+#endif // ACME_HOOK_SPECS_HEADER_FILE
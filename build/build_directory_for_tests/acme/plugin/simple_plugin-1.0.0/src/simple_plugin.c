@@ -0,0 +1,5 @@
+#include "hook_specs.h"
+
+HOOK_FRICTION_FACTOR(value1, value2) {
+    return value1 + value2;
+}
@@ -0,0 +1,227 @@
+import json
+import os
+from collections.abc import Mapping
+from collections.abc import Sequence
+from contextlib import suppress
+from pathlib import Path
+from typing import Any
+
+from hookman.hookman_utils import file_fingerprint
+from hookman.plugin_config import PluginInfo
+
+CACHE_FILE_NAME = ".hookman_cache.json"
+"""Name of the cache file written on the root of each plugin directory."""
+
+_CACHE_FORMAT_VERSION = 3
+
+
+def _plugin_fingerprints(yaml_location: Path, shared_lib_path: Path) -> dict[str, Any]:
+    return {
+        "plugin.yaml": file_fingerprint(yaml_location),
+        "README.md": file_fingerprint(yaml_location.parent / "README.md"),
+        "shared_lib": file_fingerprint(shared_lib_path),
+    }
+
+
+def _json_fingerprints(fingerprints: Mapping[str, Any]) -> dict[str, Any]:
+    return {k: list(v) if v is not None else None for k, v in fingerprints.items()}
+
+
+class _RootCache:
+    """
+    The cache entries of a single plugin root, backed by ``<root>/.hookman_cache.json``.
+    """
+
+    def __init__(self, root: Path, hooks_available: Mapping[str, str] | None) -> None:
+        self.root = root
+        self.cache_file = root / CACHE_FILE_NAME
+        self.hooks_available = dict(hooks_available) if hooks_available is not None else None
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.failures: dict[str, dict[str, Any]] = {}
+        self.seen: set[str] = set()
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            content = json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(content, dict):
+            return
+        if content.get("format_version") != _CACHE_FORMAT_VERSION:
+            return
+        # Entries computed against other hook specs have a different "hooks_implemented".
+        if content.get("hooks_available") != self.hooks_available:
+            return
+        entries = content.get("plugins")
+        if isinstance(entries, dict):
+            self.entries = entries
+        failures = content.get("failures")
+        if isinstance(failures, dict):
+            self.failures = failures
+
+    def save(self, *, prune: bool = True) -> None:
+        """
+        Write the cache file if any entry changed since it was loaded.
+
+        The cache file is written atomically, and any error writing it (for instance a read-only
+        plugin directory) is ignored: the cache is only an optimization.
+        """
+        if prune:
+            # Drop the entries of plugins that were not found during this discovery and no
+            # longer exist: the ignored plugins, skipped before the lookup when discovering
+            # from the directory names or from a plugin index, keep their entries.
+            for entries in (self.entries, self.failures):
+                for key in entries.keys() - self.seen:
+                    if not os.path.isfile(key):
+                        del entries[key]
+                        self.dirty = True
+        if not self.dirty or not self.root.is_dir():
+            return
+        content = {
+            "format_version": _CACHE_FORMAT_VERSION,
+            "hooks_available": self.hooks_available,
+            "plugins": self.entries,
+            "failures": self.failures,
+        }
+        tmp_file = self.cache_file.with_name(f"{CACHE_FILE_NAME}.{os.getpid()}.tmp")
+        with suppress(OSError):
+            tmp_file.write_text(json.dumps(content, indent=1), encoding="utf-8")
+            os.replace(tmp_file, self.cache_file)
+            self.dirty = False
+        with suppress(OSError):
+            tmp_file.unlink(missing_ok=True)
+
+
+class DiscoveryCache:
+    """
+    Persistent cache of the :class:`PluginInfo` objects resolved during plugin discovery, and of
+    the plugins that failed to load (when ``cache_failures`` is enabled).
+
+    Each plugin root receives a ``.hookman_cache.json`` file with the resolved fields of each
+    plugin found inside it. An entry is only reused while the ``plugin.yaml``, ``README.md`` and
+    shared library of the plugin have the same path, modification time, size and inode as when
+    the entry was stored, so unchanged plugins are served without parsing any YAML file or
+    loading any shared library.
+    """
+
+    def __init__(
+        self,
+        roots: Sequence[Path],
+        hooks_available: dict | None,
+        *,
+        cache_plugins: bool = True,
+        cache_failures: bool = False,
+    ) -> None:
+        self.hooks_available = hooks_available
+        self.cache_plugins = cache_plugins
+        self.cache_failures = cache_failures
+        self._root_caches = [_RootCache(root, hooks_available) for root in roots]
+
+    def _root_cache_for(self, yaml_location: Path) -> _RootCache | None:
+        parents = yaml_location.parents
+        for root_cache in self._root_caches:
+            if root_cache.root in parents:
+                return root_cache
+        return None
+
+    def lookup(self, yaml_location: Path) -> PluginInfo | None:
+        """
+        Return the cached :class:`PluginInfo` for the plugin at ``yaml_location``, or None if there
+        is no entry for it or if any of its files changed since the entry was stored.
+        """
+        root_cache = self._root_cache_for(yaml_location)
+        if root_cache is None:
+            return None
+        root_cache.seen.add(str(yaml_location))
+        entry = root_cache.entries.get(str(yaml_location))
+        if entry is None or not self.cache_plugins:
+            return None
+
+        fields = entry["fields"]
+        fingerprints = _plugin_fingerprints(yaml_location, Path(fields["shared_lib_path"]))
+        if _json_fingerprints(fingerprints) != entry["fingerprints"]:
+            return None
+        return PluginInfo._from_resolved_fields(yaml_location, self.hooks_available, fields)
+
+    def store(self, plugin_info: PluginInfo) -> None:
+        """
+        Store (or replace) the entry of the given plugin.
+        """
+        root_cache = self._root_cache_for(plugin_info.yaml_location)
+        if root_cache is None:
+            return
+        key = str(plugin_info.yaml_location)
+        root_cache.seen.add(key)
+        if root_cache.failures.pop(key, None) is not None:
+            root_cache.dirty = True
+        if not self.cache_plugins:
+            return
+        fingerprints = _plugin_fingerprints(plugin_info.yaml_location, plugin_info.shared_lib_path)
+        root_cache.entries[key] = {
+            "fingerprints": _json_fingerprints(fingerprints),
+            "fields": plugin_info._resolved_fields(),
+        }
+        root_cache.dirty = True
+
+    def lookup_failure(self, yaml_location: Path) -> str | None:
+        """
+        Return the reason of the failure stored for the plugin at ``yaml_location``, or None if
+        there is no failure stored for it, if any of its files changed since the failure was
+        stored, or if ``cache_failures`` is disabled.
+        """
+        if not self.cache_failures:
+            return None
+        root_cache = self._root_cache_for(yaml_location)
+        if root_cache is None:
+            return None
+        root_cache.seen.add(str(yaml_location))
+        entry = root_cache.failures.get(str(yaml_location))
+        if entry is None:
+            return None
+        fingerprints = _plugin_fingerprints(yaml_location, Path(entry["shared_lib_path"]))
+        if _json_fingerprints(fingerprints) != entry["fingerprints"]:
+            return None
+        return str(entry["reason"])
+
+    def store_failure(self, yaml_location: Path, shared_lib_path: Path, reason: str) -> None:
+        """
+        Store (or replace) the failure of the given plugin, if ``cache_failures`` is enabled.
+        The failure is reported by `lookup_failure` until any of the plugin files change.
+        """
+        root_cache = self._root_cache_for(yaml_location)
+        if root_cache is None or not self.cache_failures:
+            return
+        key = str(yaml_location)
+        root_cache.seen.add(key)
+        root_cache.entries.pop(key, None)
+        root_cache.failures[key] = {
+            "fingerprints": _json_fingerprints(
+                _plugin_fingerprints(yaml_location, shared_lib_path)
+            ),
+            "shared_lib_path": str(shared_lib_path),
+            "reason": reason,
+        }
+        root_cache.dirty = True
+
+    def clear_failures(self) -> None:
+        """
+        Drop all the failures stored, so the failed plugins are probed again.
+        """
+        for root_cache in self._root_caches:
+            if root_cache.failures:
+                root_cache.failures.clear()
+                root_cache.dirty = True
+
+    def save(self, *, prune: bool = True) -> None:
+        """
+        Persist the entries changed since the cache was loaded.
+
+        :param prune:
+            If True, the entries of the plugins that were not looked up and whose ``plugin.yaml``
+            no longer exists are dropped; pass False when only some of the plugins were
+            discovered.
+        """
+        for root_cache in self._root_caches:
+            root_cache.save(prune=prune)
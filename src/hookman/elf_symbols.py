@@ -0,0 +1,249 @@
+import mmap
+import struct
+from pathlib import Path
+
+_ELF_MAGIC = b"\x7fELF"
+_ELFCLASS32 = 1
+_ELFCLASS64 = 2
+_ELFDATA2LSB = 1
+_ELFDATA2MSB = 2
+
+_SHT_DYNSYM = 11
+_PT_LOAD = 1
+_PT_DYNAMIC = 2
+_DT_NULL = 0
+_DT_HASH = 4
+_DT_STRTAB = 5
+_DT_SYMTAB = 6
+_DT_STRSZ = 10
+_DT_SYMENT = 11
+_DT_GNU_HASH = 0x6FFFFEF5
+_SHN_UNDEF = 0
+_STB_GLOBAL = 1
+_STB_WEAK = 2
+_STV_DEFAULT = 0
+_STV_PROTECTED = 3
+
+
+def read_exported_symbols(shared_lib_path: Path) -> frozenset[str]:
+    """
+    Return the names of the symbols exported by the given ELF shared library.
+
+    The names are read from the dynamic symbol table (``.dynsym``) of the memory-mapped file,
+    so the library is not loaded: none of its code (such as static initializers) runs and its
+    dependencies are not resolved. Only defined symbols with global or weak binding and default
+    or protected visibility are considered, which are the ones ``dlsym`` can find.
+
+    The table is found from the section headers, or, for libraries stripped of them, from the
+    dynamic segment (``PT_DYNAMIC``) the dynamic loader itself uses, counting the symbols with
+    its ``DT_HASH`` or ``DT_GNU_HASH`` table.
+
+    :raises ValueError:
+        If the file is not a valid ELF file or has no dynamic symbol table.
+    """
+    with open(shared_lib_path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("not an ELF file (empty file)") from None
+    with data:
+        try:
+            return _read_dynsym(data)
+        except struct.error as error:
+            raise ValueError("truncated or corrupted ELF file") from error
+
+
+def _read_dynsym(data: mmap.mmap) -> frozenset[str]:
+    if data[:4] != _ELF_MAGIC:
+        raise ValueError("not an ELF file")
+
+    elf_class = data[4]
+    elf_data = data[5]
+    if elf_class not in (_ELFCLASS32, _ELFCLASS64) or elf_data not in (_ELFDATA2LSB, _ELFDATA2MSB):
+        raise ValueError(f"unsupported ELF class {elf_class} or data encoding {elf_data}")
+    is_64 = elf_class == _ELFCLASS64
+    endian = "<" if elf_data == _ELFDATA2LSB else ">"
+
+    # e_shoff, e_shentsize, e_shnum from the ELF header.
+    if is_64:
+        (section_headers_offset,) = struct.unpack_from(endian + "Q", data, 0x28)
+        section_header_size, section_count = struct.unpack_from(endian + "HH", data, 0x3A)
+        section_header_format = endian + "IIQQQQIIQQ"
+    else:
+        (section_headers_offset,) = struct.unpack_from(endian + "I", data, 0x20)
+        section_header_size, section_count = struct.unpack_from(endian + "HH", data, 0x2E)
+        section_header_format = endian + "IIIIIIIIII"
+    if section_headers_offset == 0:
+        section_count = 0
+
+    # Each section header as (sh_type, sh_offset, sh_size, sh_link, sh_entsize).
+    sections = []
+    for index in range(section_count):
+        (
+            _sh_name,
+            sh_type,
+            _sh_flags,
+            _sh_addr,
+            sh_offset,
+            sh_size,
+            sh_link,
+            _sh_info,
+            _sh_addralign,
+            sh_entsize,
+        ) = struct.unpack_from(
+            section_header_format, data, section_headers_offset + index * section_header_size
+        )
+        sections.append((sh_type, sh_offset, sh_size, sh_link, sh_entsize))
+
+    dynsym = next((section for section in sections if section[0] == _SHT_DYNSYM), None)
+    if dynsym is None:
+        return _read_dynamic_segment_symbols(data, is_64, endian)
+    _sh_type, symbols_offset, symbols_size, strings_index, symbol_size = dynsym
+    if symbol_size == 0 or strings_index >= len(sections):
+        raise ValueError("corrupted dynamic symbol table")
+    _sh_type, strings_offset, strings_size, _sh_link, _sh_entsize = sections[strings_index]
+    return _read_symbols(
+        data,
+        is_64,
+        endian,
+        symbols_offset,
+        symbols_size // symbol_size,
+        symbol_size,
+        strings_offset,
+        strings_size,
+    )
+
+
+def _read_dynamic_segment_symbols(data: mmap.mmap, is_64: bool, endian: str) -> frozenset[str]:
+    # e_phoff, e_phentsize, e_phnum from the ELF header.
+    if is_64:
+        (program_headers_offset,) = struct.unpack_from(endian + "Q", data, 0x20)
+        program_header_size, program_header_count = struct.unpack_from(endian + "HH", data, 0x36)
+    else:
+        (program_headers_offset,) = struct.unpack_from(endian + "I", data, 0x1C)
+        program_header_size, program_header_count = struct.unpack_from(endian + "HH", data, 0x2A)
+
+    # The PT_LOAD segments as (p_offset, p_vaddr, p_filesz), and the PT_DYNAMIC segment.
+    segments = []
+    dynamic = None
+    for index in range(program_header_count if program_headers_offset else 0):
+        offset = program_headers_offset + index * program_header_size
+        if is_64:
+            p_type, _p_flags, p_offset, p_vaddr, _p_paddr, p_filesz = struct.unpack_from(
+                endian + "IIQQQQ", data, offset
+            )
+        else:
+            p_type, p_offset, p_vaddr, _p_paddr, p_filesz = struct.unpack_from(
+                endian + "IIIII", data, offset
+            )
+        if p_type == _PT_LOAD:
+            segments.append((p_offset, p_vaddr, p_filesz))
+        elif p_type == _PT_DYNAMIC:
+            dynamic = (p_offset, p_filesz)
+    if dynamic is None:
+        raise ValueError("no dynamic symbol table (.dynsym) found")
+
+    def file_offset(address: int) -> int:
+        for p_offset, p_vaddr, p_filesz in segments:
+            if p_vaddr <= address < p_vaddr + p_filesz:
+                return int(address - p_vaddr + p_offset)
+        raise ValueError(f"address 0x{address:x} of the dynamic section is not in the file")
+
+    entries: dict[int, int] = {}
+    entry_format = endian + ("qQ" if is_64 else "iI")
+    entry_size = struct.calcsize(entry_format)
+    dynamic_offset, dynamic_size = dynamic
+    for offset in range(dynamic_offset, dynamic_offset + dynamic_size, entry_size):
+        d_tag, d_val = struct.unpack_from(entry_format, data, offset)
+        if d_tag == _DT_NULL:
+            break
+        entries.setdefault(d_tag, d_val)
+    if _DT_SYMTAB not in entries or _DT_STRTAB not in entries:
+        raise ValueError("no dynamic symbol table (.dynsym) found")
+
+    if _DT_HASH in entries:
+        # nbucket, nchain: there is a chain entry per symbol.
+        (symbol_count,) = struct.unpack_from(endian + "I", data, file_offset(entries[_DT_HASH]) + 4)
+    elif _DT_GNU_HASH in entries:
+        symbol_count = _gnu_hash_symbol_count(
+            data, is_64, endian, file_offset(entries[_DT_GNU_HASH])
+        )
+    else:
+        raise ValueError("no symbol hash table (DT_HASH or DT_GNU_HASH) found")
+
+    return _read_symbols(
+        data,
+        is_64,
+        endian,
+        file_offset(entries[_DT_SYMTAB]),
+        symbol_count,
+        entries.get(_DT_SYMENT, 24 if is_64 else 16),
+        file_offset(entries[_DT_STRTAB]),
+        entries.get(_DT_STRSZ, len(data) - file_offset(entries[_DT_STRTAB])),
+    )
+
+
+def _gnu_hash_symbol_count(data: mmap.mmap, is_64: bool, endian: str, offset: int) -> int:
+    """
+    The number of symbols of the dynamic symbol table, which the GNU hash table does not store:
+    the symbols before ``symoffset`` are not hashed, and the hashed ones are sorted by bucket, so
+    the last symbol is at the end of the chain of the last non empty bucket.
+    """
+    bucket_count, symbols_offset, bloom_size, _bloom_shift = struct.unpack_from(
+        endian + "IIII", data, offset
+    )
+    buckets_offset = offset + 16 + bloom_size * (8 if is_64 else 4)
+    buckets = struct.unpack_from(endian + f"{bucket_count}I", data, buckets_offset)
+    last_symbol = max(buckets, default=0)
+    if last_symbol < symbols_offset:
+        return int(symbols_offset)
+    chains_offset = buckets_offset + bucket_count * 4
+    while True:
+        (chain,) = struct.unpack_from(
+            endian + "I", data, chains_offset + (last_symbol - symbols_offset) * 4
+        )
+        if chain & 1:
+            return last_symbol + 1
+        last_symbol += 1
+
+
+def _read_symbols(
+    data: mmap.mmap,
+    is_64: bool,
+    endian: str,
+    symbols_offset: int,
+    symbol_count: int,
+    symbol_size: int,
+    strings_offset: int,
+    strings_size: int,
+) -> frozenset[str]:
+    if is_64:
+        # st_name, st_info, st_other, st_shndx, st_value, st_size
+        symbol_format = endian + "IBBHQQ"
+    else:
+        # st_name, st_value, st_size, st_info, st_other, st_shndx
+        symbol_format = endian + "IIIBBH"
+
+    names = set()
+    for index in range(symbol_count):
+        offset = symbols_offset + index * symbol_size
+        if is_64:
+            st_name, st_info, st_other, st_shndx, _st_value, _st_size = struct.unpack_from(
+                symbol_format, data, offset
+            )
+        else:
+            st_name, _st_value, _st_size, st_info, st_other, st_shndx = struct.unpack_from(
+                symbol_format, data, offset
+            )
+        if st_shndx == _SHN_UNDEF or st_name == 0 or st_name >= strings_size:
+            continue
+        if st_info >> 4 not in (_STB_GLOBAL, _STB_WEAK):
+            continue
+        if st_other & 0x3 not in (_STV_DEFAULT, _STV_PROTECTED):
+            continue
+        name_start = strings_offset + st_name
+        name_end = data.find(b"\0", name_start, strings_offset + strings_size)
+        if name_end == -1:
+            raise ValueError("corrupted dynamic string table")
+        names.add(data[name_start:name_end].decode("utf-8", errors="replace"))
+    return frozenset(names)
@@ -32,6 +32,14 @@ class SharedLibraryLoadError(HookmanError):
         super().__init__(f"Failed to load '{shared_lib_path}': {reason}")
 
 
+class PluginProbeError(SharedLibraryLoadError):
+    """
+    Exception raised when the worker process probing a plugin in isolation crashes or does not
+    finish within the timeout, usually because the static initializers of its shared library
+    crashed or hang.
+    """
+
+
 class InvalidDestinationPathError(HookmanError):
     """
     Exception raised when the destination path to install the plugin is not one of the paths used
@@ -13,7 +13,6 @@ from hookman.exceptions import ArtifactsDirNotFoundError
 from hookman.exceptions import AssetsDirNotFoundError
 from hookman.exceptions import HookmanError
 from hookman.hooks import HookSpecs
-from hookman.plugin_config import PLUGIN_CONFIG_SCHEMA
 from hookman.plugin_config import PluginInfo
 
 
@@ -41,6 +40,11 @@ class Hook(NamedTuple):
 
     r_type: Type of the return from the hook
 
+    batch_args: The name, element type and array size (None for scalars, empty for `int[]`) of
+        each argument, for the hooks with an array form (see `HookSpecs.batch_hooks`), None
+        for the other hooks
+        Ex.: (("v1", "int", None), ("v2", "double", "2"))
+
 
     """
 
@@ -52,6 +56,7 @@ class Hook(NamedTuple):
     macro_name: str
     name: str
     r_type: str
+    batch_args: tuple[tuple[str, str, str | None], ...] | None = None
 
 
 class HookManGenerator:
@@ -107,19 +112,10 @@ class HookManGenerator:
         self.version = f"v{hook_specs.version}"
 
         def get_arg_with_type(arg: str) -> str:
-            arg_type = hook_types[arg]
-            array_type_pattern = (
-                r"(?P<array_type>.+)"  # `double ` in `double [ 2 ]`
-                r"(?:\s*\[\s*"  # `[` and possible spaces
-                r"(?P<array_size>\d*)"  # `2` in `double [ 2 ]` or empty in `int[]`
-                r"\s*\]\s*)$"  # `]` with possible spaces and end of string
-            )
-            m = re.match(array_type_pattern, arg_type)
-            if m is not None:
-                array_type = m.group("array_type").strip()
-                array_size = m.group("array_size")
-                return f"{array_type} {arg}[{array_size}]"
-            return f"{arg_type.strip()} {arg}"
+            arg_type, array_size = _split_array_type(hook_types[arg])
+            if array_size is not None:
+                return f"{arg_type} {arg}[{array_size}]"
+            return f"{arg_type} {arg}"
 
         self.extra_includes = hook_specs.extra_includes
         self.hooks = []
@@ -128,6 +124,11 @@ class HookManGenerator:
             hook_arg_spec = inspect.getfullargspec(hook_spec)
             hook_arguments = hook_arg_spec.args
             hook_types = hook_arg_spec.annotations
+            batch_args = None
+            if hook_spec in hook_specs.batch_hooks:
+                batch_args = tuple(
+                    (arg, *_split_array_type(hook_types[arg])) for arg in hook_arguments
+                )
             self.hooks.append(
                 Hook(
                     args=", ".join(hook_arguments),
@@ -138,6 +139,7 @@ class HookManGenerator:
                     macro_name=hook_spec.__name__.upper(),
                     name=hook_spec.__name__.lower(),
                     r_type=hook_arg_spec.annotations["return"],
+                    batch_args=batch_args,
                 )
             )
 
@@ -307,6 +309,8 @@ class HookManGenerator:
         """
         import strictyaml
 
+        from hookman.plugin_config import PLUGIN_CONFIG_SCHEMA
+
         plugin_dir = Path(plugin_dir)
         if dst_path is None:
             dst_path = plugin_dir
@@ -431,6 +435,8 @@ class HookManGenerator:
             """
             )
             list_with_hook_specs_with_documentation += hook_specs_content
+            if hook.batch_args is not None:
+                list_with_hook_specs_with_documentation += _batch_hook_spec_content(hook)
 
         file_content = dedent(
             f"""\
@@ -461,6 +467,11 @@ class HookManGenerator:
 
         """
         )
+        if any(hook.batch_args is not None for hook in self.hooks):
+            # `size_t` of the array forms.
+            file_content = file_content.replace(
+                "#ifdef WIN32", "#include <stddef.h>\n\n#ifdef WIN32", 1
+            )
         file_content += list_with_hook_specs_with_documentation
         file_content += dedent(
             f"""
@@ -480,6 +491,7 @@ class HookManGenerator:
         list_with_hook_calls = []
         list_with_set_functions = []
         list_with_private_members = []
+        list_with_private_add_functions = []
 
         content_lines += [
             f"// {self._DO_NOT_MODIFY_MSG}",
@@ -487,10 +499,13 @@ class HookManGenerator:
             "#define _H_HOOKMAN_HOOK_CALLER",
             "",
             "#include <functional>",
+            "#include <mutex>",
+            "#include <shared_mutex>",
             "#include <stdexcept>",
             "#include <string>",
+            "#include <unordered_map>",
+            "#include <utility>",
             "#include <vector>",
-            "#include <map>",
             "",
             "#ifdef _WIN32",
             "    #include <cstdlib>",
@@ -509,44 +524,119 @@ class HookManGenerator:
             "    return std::function<F_TYPE>(reinterpret_cast<F_TYPE *>(p));",
             "}",
             "",
+            "// An implementation of a hook: a plain function pointer for the ones found in the plugin",
+            "// libraries, called without the type erasure of std::function, or a std::function for the",
+            "// ones appended as such.",
+            "template <typename F_TYPE> class HookImpl;",
+            "",
+            "template <typename R, typename... Args> class HookImpl<R(Args...)> {",
+            "public:",
+            "    HookImpl() = default;",
+            "    explicit HookImpl(R (*pointer)(Args...)) : pointer(pointer) {}",
+            "    explicit HookImpl(std::function<R(Args...)> function) : function(std::move(function)) {}",
+            "",
+            "    R operator()(Args... args) const {",
+            "        if (this->pointer != nullptr) {",
+            "            return this->pointer(args...);",
+            "        }",
+            "        return this->function(args...);",
+            "    }",
+            "",
+            "    explicit operator bool() const {",
+            "        return this->pointer != nullptr || static_cast<bool>(this->function);",
+            "    }",
+            "",
+            "    // The function pointer of a native implementation, nullptr otherwise.",
+            "    R (*native() const)(Args...) {",
+            "        return this->pointer;",
+            "    }",
+            "",
+            "private:",
+            "    R (*pointer)(Args...) = nullptr;",
+            "    std::function<R(Args...)> function;",
+            "};",
+            "",
             "class HookCaller {",
             "public:",
+            "    // The methods changing the implementations (load_impls_from_library(), append_*_impl() and",
+            "    // remove_impls()) hold an exclusive lock of the HookCaller. Hold this shared lock while",
+            "    // reading or calling the implementations (*_impls(), *_impl(), for_each_*_impl(),",
+            "    // call_*_all() and call_*_batch()) if other threads may change them concurrently.",
+            "    std::shared_lock<std::shared_mutex> read_lock() const {",
+            "        return std::shared_lock<std::shared_mutex>(this->mutex);",
+            "    }",
+            "",
         ]
 
         for hook in self.hooks:
             list_with_hook_calls += [
-                f"    std::vector<std::function<{hook.r_type}({hook.args_type})>> {hook.name}_impls() {{",
+                f"    const std::vector<HookImpl<{hook.r_type}({hook.args_type})>>& {hook.name}_impls() const {{",
                 f"        return this->_{hook.name}_impls;",
                 "    }",
-                f"    std::function<{hook.r_type}({hook.args_type})> {hook.name}_impl(const std::string &plugin_id) {{",
-                f"        return this->_{hook.name}_map[plugin_id];",
+                "    template <typename Visitor>",
+                f"    void for_each_{hook.name}_impl(Visitor&& visitor) const {{",
+                f"        for (const auto& impl : this->_{hook.name}_impls) {{",
+                "            visitor(impl);",
+                "        }",
+                "    }",
+                # Does not insert unknown plugin ids: an empty implementation (None in Python) is returned.
+                f"    const HookImpl<{hook.r_type}({hook.args_type})>& {hook.name}_impl(const std::string &plugin_id) const {{",
+                f"        static const HookImpl<{hook.r_type}({hook.args_type})> not_found;",
+                f"        auto it = this->_{hook.name}_index.find(plugin_id);",
+                f"        return it == this->_{hook.name}_index.end() ? not_found : this->_{hook.name}_impls[it->second];",
                 "    }",
             ]
+            list_with_hook_calls += _generate_call_all_function(hook)
+            list_with_hook_calls += _generate_call_batch_function(hook)
             list_with_private_members += [
-                f"    std::vector<std::function<{hook.r_type}({hook.args_type})>> _{hook.name}_impls;",
-                f"    std::map<std::string, std::function<{hook.r_type}({hook.args_type})>> _{hook.name}_map;",
+                f"    std::vector<HookImpl<{hook.r_type}({hook.args_type})>> _{hook.name}_impls;",
+                f"    std::vector<std::string> _{hook.name}_plugin_ids;",
+                f"    std::unordered_map<std::string, size_t> _{hook.name}_index;",
             ]
+            if hook.batch_args is not None:
+                # The array form of each implementation, nullptr when the plugin does not export it.
+                list_with_private_members.append(
+                    f"    std::vector<{_batch_function_pointer_type(hook)}> _{hook.name}_batch_impls;"
+                )
 
             list_with_set_functions += [
                 # uintptr overload
                 f"    void append_{hook.name}_impl(uintptr_t pointer, const std::string &plugin_id) {{",
-                f"        this->_{hook.name}_impls.push_back(from_c_pointer<{hook.r_type}({hook.args_type})>(pointer));",
-                f"        this->_{hook.name}_map[plugin_id] = from_c_pointer<{hook.r_type}({hook.args_type})>((uintptr_t)(pointer));",
+                "        std::unique_lock<std::shared_mutex> lock(this->mutex);",
+                f"        using F_TYPE = {hook.r_type}({hook.args_type});",
+                f"        this->add_{hook.name}_impl(HookImpl<F_TYPE>(reinterpret_cast<F_TYPE *>(pointer)), plugin_id);",
                 "    }",
                 "",
                 # std::function overload
                 f"    void append_{hook.name}_impl(std::function<{hook.r_type}({hook.args_type})> func, const std::string &plugin_id) {{",
-                f"        this->_{hook.name}_impls.push_back(func);",
-                f"        this->_{hook.name}_map[plugin_id] = func;",
+                "        std::unique_lock<std::shared_mutex> lock(this->mutex);",
+                f"        this->add_{hook.name}_impl(HookImpl<{hook.r_type}({hook.args_type})>(std::move(func)), plugin_id);",
+                "    }",
+            ]
+            list_with_private_add_functions += [
+                f"    void add_{hook.name}_impl(HookImpl<{hook.r_type}({hook.args_type})> impl, const std::string &plugin_id) {{",
+                f"        this->_{hook.name}_index[plugin_id] = this->_{hook.name}_impls.size();",
+                f"        this->_{hook.name}_impls.push_back(std::move(impl));",
+                f"        this->_{hook.name}_plugin_ids.push_back(plugin_id);",
+                *(
+                    [f"        this->_{hook.name}_batch_impls.push_back(nullptr);"]
+                    if hook.batch_args is not None
+                    else []
+                ),
                 "    }",
             ]
         content_lines += list_with_hook_calls
         content_lines.append("")
         content_lines += list_with_set_functions
         content_lines.append("")
+        content_lines += _generate_remove_function(self.hooks)
+        content_lines.append("")
         content_lines += _generate_load_function(self.hooks)
         content_lines.append("private:")
+        content_lines += list_with_private_add_functions
+        content_lines.append("")
         content_lines += list_with_private_members
+        content_lines.append("    mutable std::shared_mutex mutex;")
         content_lines.append("};")
         content_lines.append("")
         content_lines.append("}  // namespace hookman")
@@ -562,9 +652,11 @@ class HookManGenerator:
         content_lines = [
             f"// {self._DO_NOT_MODIFY_MSG}",
             "#include <pybind11/functional.h>",
+            "#include <pybind11/numpy.h>",
             "#include <pybind11/pybind11.h>",
             "#include <pybind11/stl_bind.h>",
             "#include <HookCaller.hpp>",
+            "#include <memory>",
             "",
             "namespace py = pybind11;",
             "",
@@ -572,24 +664,54 @@ class HookManGenerator:
         signatures = {(x.r_type, x.args_type) for x in self.hooks}
         for r_type, args_type in sorted(signatures):
             content_lines.append(
-                f"PYBIND11_MAKE_OPAQUE(std::vector<std::function<{r_type}({args_type})>>);"
+                f"PYBIND11_MAKE_OPAQUE(std::vector<hookman::HookImpl<{r_type}({args_type})>>);"
             )
         content_lines.append("")
 
+        call_bindings = {hook.name: _generate_call_binding(hook) for hook in self.hooks}
+        call_at_bindings = {hook.name: _generate_call_at_binding(hook) for hook in self.hooks}
+        call_all_bindings = {hook.name: _generate_call_all_binding(hook) for hook in self.hooks}
+        call_batch_bindings = {hook.name: _generate_call_batch_binding(hook) for hook in self.hooks}
+        content_lines.append("namespace {")
+        content_lines.append("")
+        content_lines += _BINDING_HELPERS
+        content_lines.append("")
+        for hook in self.hooks:
+            for lines in (
+                call_bindings[hook.name],
+                call_at_bindings[hook.name],
+                call_all_bindings[hook.name],
+                call_batch_bindings[hook.name],
+            ):
+                if lines:
+                    content_lines += lines
+                    content_lines.append("")
+        content_lines.append("}  // namespace")
+        content_lines.append("")
+
         content_lines.append(f"PYBIND11_MODULE({self.pyd_name}, m) {{")
 
         for index, (r_type, args_type) in enumerate(sorted(signatures)):
+            impl_type = f"hookman::HookImpl<{r_type}({args_type})>"
+            content_lines += [
+                f'    py::class_<{impl_type}>(m, "hook_impl_type_{index}", "Hook implementation type {index}")',
+                f'        .def("__call__", &{impl_type}::operator());',
+            ]
             name = f"vector_hook_impl_type_{index}"
-            vector_type = f"std::vector<std::function<{r_type}({args_type})>>"
+            vector_type = f"std::vector<{impl_type}>"
             content_lines.append(
                 f'    py::bind_vector<{vector_type}>(m, "{name}", "Hook for vector implementation type {index}");'
             )
         content_lines.append("")
 
+        # The GIL is released by every method taking the lock of the HookCaller, so a thread
+        # holding the lock can always acquire the GIL (to call implementations written in Python).
+        release_gil = "py::call_guard<py::gil_scoped_release>()"
         content_lines += [
             '    py::class_<hookman::HookCaller>(m, "HookCaller")',
             "        .def(py::init<>())",
-            '        .def("load_impls_from_library", &hookman::HookCaller::load_impls_from_library)',
+            f'        .def("load_impls_from_library", &hookman::HookCaller::load_impls_from_library, {release_gil})',
+            f'        .def("remove_impls", &hookman::HookCaller::remove_impls, {release_gil})',
         ]
         for hook in self.hooks:
             append_ptr = f"&hookman::HookCaller::append_{hook.name}_impl"
@@ -597,11 +719,37 @@ class HookManGenerator:
             append_function_sig = f"void (hookman::HookCaller::*)(std::function<{hook.r_type}({hook.args_type})>, const std::string&)"
 
             content_lines += [
-                f'        .def("{hook.name}_impls", &hookman::HookCaller::{hook.name}_impls)',
-                f'        .def("{hook.name}_impl", &hookman::HookCaller::{hook.name}_impl)',
-                f'        .def("append_{hook.name}_impl", ({append_uint_sig}) {append_ptr})',
-                f'        .def("append_{hook.name}_impl", ({append_function_sig}) {append_ptr})',
+                # Both return copies, unaffected by later changes to the HookCaller: use
+                # <hook>_impls_count() and call_<hook>_at() to call them without copying.
+                f'        .def("{hook.name}_impls", [](const hookman::HookCaller &self) {{ auto lock = self.read_lock(); return self.{hook.name}_impls(); }}, {release_gil})',
+                f'        .def("{hook.name}_impls_count", [](const hookman::HookCaller &self) {{ auto lock = self.read_lock(); return self.{hook.name}_impls().size(); }}, {release_gil})',
+                # Unknown plugin ids return None.
+                f'        .def("{hook.name}_impl", [](const hookman::HookCaller &self, const std::string &plugin_id) {{ auto lock = self.read_lock(); const auto &impl = self.{hook.name}_impl(plugin_id); return impl ? std::make_unique<hookman::HookImpl<{hook.r_type}({hook.args_type})>>(impl) : nullptr; }}, {release_gil})',
+                f'        .def("append_{hook.name}_impl", ({append_uint_sig}) {append_ptr}, {release_gil})',
+                f'        .def("append_{hook.name}_impl", ({append_function_sig}) {append_ptr}, {release_gil})',
             ]
+            # The GIL is released while the implementation runs.
+            def_args = [f'"call_{hook.name}"', f"&call_{hook.name}", 'py::arg("plugin_id")']
+            def_args += [f'py::arg("{arg}")' for arg in hook.args.split(", ") if arg]
+            def_args.append(release_gil)
+            content_lines.append(f"        .def({', '.join(def_args)})")
+            def_args = [f'"call_{hook.name}_at"', f"&call_{hook.name}_at", 'py::arg("index")']
+            def_args += [f'py::arg("{arg}")' for arg in hook.args.split(", ") if arg]
+            def_args.append(release_gil)
+            content_lines.append(f"        .def({', '.join(def_args)})")
+            if call_all_bindings[hook.name]:
+                def_args = [f'"call_{hook.name}_all"', f"&call_{hook.name}_all"]
+                def_args += [f'py::arg("{arg}")' for arg in hook.args.split(", ") if arg]
+                if hook.r_type.strip() != "void":
+                    def_args.append('py::arg("out") = py::none()')
+                content_lines.append(f"        .def({', '.join(def_args)})")
+            if call_batch_bindings[hook.name]:
+                def_args = [f'"call_{hook.name}_batch"', f"&call_{hook.name}_batch"]
+                def_args += ['py::arg("plugin_id")']
+                def_args += [f'py::arg("{arg}")' for arg in hook.args.split(", ") if arg]
+                if hook.r_type.strip() != "void":
+                    def_args.append('py::arg("out") = py::none()')
+                content_lines.append(f"        .def({', '.join(def_args)})")
         content_lines.append("    ;")
         content_lines.append("}")
         content_lines.append("")
@@ -617,6 +765,7 @@ class HookManGenerator:
                     f"""\
                 add_library({self.pyd_name}_interface INTERFACE)
                 target_include_directories({self.pyd_name}_interface INTERFACE ./)
+                target_compile_features({self.pyd_name}_interface INTERFACE cxx_std_17)
                 """
                 )
             )
@@ -824,6 +973,393 @@ class HookManGenerator:
         )
 
 
+# Types of the hook results and arguments that are converted from and to NumPy arrays.
+_NUMPY_SCALAR_TYPES = frozenset(
+    [
+        "bool",
+        "char",
+        "signed char",
+        "unsigned char",
+        "short",
+        "unsigned short",
+        "int",
+        "unsigned int",
+        "long",
+        "unsigned long",
+        "long long",
+        "unsigned long long",
+        "float",
+        "double",
+        "int8_t",
+        "int16_t",
+        "int32_t",
+        "int64_t",
+        "uint8_t",
+        "uint16_t",
+        "uint32_t",
+        "uint64_t",
+        "size_t",
+    ]
+)
+
+
+# Helpers of the call_<hook>_all() and call_<hook>_batch() bindings.
+_BINDING_HELPERS = [
+    "template <typename T>",
+    "using batch_array = py::array_t<T, py::array::c_style | py::array::forcecast>;",
+    "",
+    "// The array where `size` results are written: `out`, or a new array if `out` is None.",
+    "template <typename T>",
+    "py::array_t<T> results_array(py::object out, py::ssize_t size, const char *type_name) {",
+    "    if (out.is_none()) {",
+    "        return py::array_t<T>(size);",
+    "    }",
+    "    if (!py::isinstance<py::array_t<T, py::array::c_style>>(out) || py::array(out).ndim() != 1 || py::array(out).shape(0) != size) {",
+    '        throw py::value_error(std::string("out must be a contiguous 1-dimensional array of ") + type_name + " with " + std::to_string(size) + " elements");',
+    "    }",
+    "    return py::reinterpret_borrow<py::array_t<T>>(out);",
+    "}",
+    "",
+    "// The data of a call_<hook>_batch() argument, which must have `count` elements, or `count`",
+    "// rows of `size` elements for array arguments.",
+    "template <typename T>",
+    "T* batch_data(batch_array<T> &array, const char *name, py::ssize_t count, py::ssize_t size) {",
+    "    bool valid = size == 0 ? array.ndim() == 1 : array.ndim() == 2 && array.shape(1) == size;",
+    "    if (!valid || array.shape(0) != count) {",
+    '        throw py::value_error(std::string("argument ") + name + " must have " + std::to_string(count) + " elements, one per evaluation");',
+    "    }",
+    "    return array.mutable_data();",
+    "}",
+]
+
+
+def _split_array_type(arg_type: str) -> tuple[str, str | None]:
+    """
+    Split a type like `double[2]` in its element type and array size (empty for `int[]`), the
+    array size is None for other types.
+    """
+    array_type_pattern = (
+        r"(?P<array_type>.+)"  # `double ` in `double [ 2 ]`
+        r"(?:\s*\[\s*"  # `[` and possible spaces
+        r"(?P<array_size>\d*)"  # `2` in `double [ 2 ]` or empty in `int[]`
+        r"\s*\]\s*)$"  # `]` with possible spaces and end of string
+    )
+    m = re.match(array_type_pattern, arg_type)
+    if m is not None:
+        return m.group("array_type").strip(), m.group("array_size")
+    return arg_type.strip(), None
+
+
+def _batch_arg_type(arg_type: str, array_size: str | None, arg: str = "") -> str:
+    """
+    Type of the array form argument of a hook argument: a pointer to contiguous elements, each
+    one an array of `array_size` elements for the sized array arguments.
+    """
+    if array_size:
+        return f"{arg_type} (*{arg})[{array_size}]"
+    if array_size is not None:
+        return f"{arg_type}** {arg}".rstrip()
+    return f"{arg_type}* {arg}".rstrip()
+
+
+def _batch_hook_spec_content(hook: Hook) -> str:
+    """
+    Declaration in hook_specs.h of the array form of a hook.
+    """
+    assert hook.batch_args is not None
+    params = [arg for arg, _, _ in hook.batch_args]
+    params_with_type = [_batch_arg_type(t, size, arg) for arg, t, size in hook.batch_args]
+    results_doc = ""
+    if hook.r_type.strip() != "void":
+        params.append("results")
+        params_with_type.append(f"{hook.r_type}* results")
+        results_doc = ", writing the i-th result to `results[i]`"
+    return dedent(
+        f"""
+        /*!
+        Array form of HOOK_{hook.macro_name}: evaluates it `count` times, the i-th time with the i-th
+        element of each argument array{results_doc}.
+        */
+        #define HOOK_{hook.macro_name}_BATCH({_join_args("count", *params)}) HOOKMAN_API_EXP void HOOKMAN_FUNC_EXP {hook.function_name}_batch({_join_args("size_t count", *params_with_type)})
+        """
+    )
+
+
+def _join_args(*args: str) -> str:
+    return ", ".join(arg for arg in args if arg)
+
+
+def _generate_call_all_function(hook: Hook) -> list[str]:
+    """
+    Generate call_<hook>_all(), which calls all the implementations of a hook with the same
+    arguments, writing the result of each one to a buffer given by the caller.
+    """
+    if hook.r_type.strip() == "void":
+        return [
+            f"    void call_{hook.name}_all({hook.args_with_type}) const {{",
+            f"        for (const auto& impl : this->_{hook.name}_impls) {{",
+            f"            impl({hook.args});",
+            "        }",
+            "    }",
+        ]
+    return [
+        f"    // Write the result of the i-th implementation to results[i], see {hook.name}_impls().size().",
+        f"    void call_{hook.name}_all({_join_args(hook.args_with_type, f'{hook.r_type}* results')}) const {{",
+        f"        const auto& impls = this->_{hook.name}_impls;",
+        "        for (size_t i = 0; i < impls.size(); ++i) {",
+        f"            results[i] = impls[i]({hook.args});",
+        "        }",
+        "    }",
+    ]
+
+
+def _batch_function_pointer_type(hook: Hook) -> str:
+    """
+    Function pointer type of the array form of a hook, like
+    `void (*)(size_t, int*, double (*)[2], int*)`.
+    """
+    assert hook.batch_args is not None
+    args_type = [_batch_arg_type(t, size) for _, t, size in hook.batch_args]
+    if hook.r_type.strip() != "void":
+        args_type.append(f"{hook.r_type}*")
+    return f"void (*)({_join_args('size_t', *args_type)})"
+
+
+def _generate_call_batch_function(hook: Hook) -> list[str]:
+    """
+    Generate call_<hook>_batch(), which evaluates the implementation of a plugin for arrays of
+    arguments: with a single call when the plugin exports the array form of the hook, otherwise
+    calling the scalar hook for each element.
+    """
+    if hook.batch_args is None:
+        return []
+    params = [_batch_arg_type(t, size, arg) for arg, t, size in hook.batch_args]
+    args = [arg for arg, _, _ in hook.batch_args]
+    elements = [f"{arg}[i]" for arg in args]
+    if hook.r_type.strip() != "void":
+        params.append(f"{hook.r_type}* results")
+        args.append("results")
+        call_scalar = f"results[i] = impl({', '.join(elements)});"
+    else:
+        call_scalar = f"impl({', '.join(elements)});"
+    return [
+        f"    void call_{hook.name}_batch({_join_args('const std::string &plugin_id', 'size_t count', *params)}) const {{",
+        f"        auto it = this->_{hook.name}_index.find(plugin_id);",
+        f"        if (it == this->_{hook.name}_index.end()) {{",
+        f'            throw std::out_of_range("No implementation of hook {hook.name} for plugin " + plugin_id);',
+        "        }",
+        f"        auto batch_impl = this->_{hook.name}_batch_impls[it->second];",
+        "        if (batch_impl != nullptr) {",
+        f"            batch_impl({_join_args('count', *args)});",
+        "            return;",
+        "        }",
+        f"        const auto& impl = this->_{hook.name}_impls[it->second];",
+        "        for (size_t i = 0; i < count; ++i) {",
+        f"            {call_scalar}",
+        "        }",
+        "    }",
+    ]
+
+
+def _generate_load_impl(hook: Hook, pointer: str) -> list[str]:
+    """
+    Generate the lines of load_impls_from_library() appending the implementation of a hook found
+    in the library, with the HookCaller already locked.
+    """
+    function_type = f"{hook.r_type}({hook.args_type})"
+    pointer_type = f"{hook.r_type} (*)({hook.args_type})"
+    return [
+        f"            this->add_{hook.name}_impl(HookImpl<{function_type}>(reinterpret_cast<{pointer_type}>({pointer})), plugin_id);",
+    ]
+
+
+def _generate_load_batch_impl(hook: Hook, find_symbol: str) -> list[str]:
+    """
+    Generate the lines of load_impls_from_library() storing the array form of a hook, if the
+    library exports it, for the implementation just appended.
+    """
+    if hook.batch_args is None:
+        return []
+    return [
+        f"            auto batch_impl = {find_symbol};",
+        "            if (batch_impl != nullptr) {",
+        f"                this->_{hook.name}_batch_impls.back() = reinterpret_cast<{_batch_function_pointer_type(hook)}>(batch_impl);",
+        "            }",
+    ]
+
+
+def _generate_call_binding(hook: Hook) -> list[str]:
+    """
+    Generate the function binding call_<hook>(), which calls the implementation of a plugin. It
+    is bound with the GIL released, so Python threads can call hooks concurrently.
+    """
+    self_arg = "const hookman::HookCaller &self"
+    return [
+        f"{hook.r_type} call_{hook.name}({_join_args(self_arg, 'const std::string &plugin_id', hook.args_with_type)}) {{",
+        "    auto lock = self.read_lock();",
+        f"    const auto &impl = self.{hook.name}_impl(plugin_id);",
+        "    if (!impl) {",
+        f'        throw py::key_error("No implementation of hook {hook.name} for plugin " + plugin_id);',
+        "    }",
+        f"    return impl({hook.args});",
+        "}",
+    ]
+
+
+def _generate_call_at_binding(hook: Hook) -> list[str]:
+    """
+    Generate the function binding call_<hook>_at(), which calls the i-th implementation of a hook
+    (in the order of <hook>_impls()) without copying the implementations.
+    """
+    self_arg = "const hookman::HookCaller &self"
+    return [
+        f"{hook.r_type} call_{hook.name}_at({_join_args(self_arg, 'size_t index', hook.args_with_type)}) {{",
+        "    auto lock = self.read_lock();",
+        f"    const auto &impls = self.{hook.name}_impls();",
+        "    if (index >= impls.size()) {",
+        f'        throw py::index_error("Index " + std::to_string(index) + " out of range for the " + std::to_string(impls.size()) + " implementations of hook {hook.name}");',
+        "    }",
+        f"    return impls[index]({hook.args});",
+        "}",
+    ]
+
+
+def _generate_call_all_binding(hook: Hook) -> list[str]:
+    """
+    Generate the function binding call_<hook>_all(), returning the results in a NumPy array, or
+    writing them to the array given in ``out``. Hooks returning non numeric types are not bound.
+    """
+    r_type = hook.r_type.strip()
+    self_arg = "const hookman::HookCaller &self"
+    if r_type == "void":
+        return [
+            f"void call_{hook.name}_all({_join_args(self_arg, hook.args_with_type)}) {{",
+            "    py::gil_scoped_release release;",
+            "    auto lock = self.read_lock();",
+            f"    self.call_{hook.name}_all({hook.args});",
+            "}",
+        ]
+    if r_type not in _NUMPY_SCALAR_TYPES:
+        return []
+    return [
+        f"py::array_t<{r_type}> call_{hook.name}_all({_join_args(self_arg, hook.args_with_type, 'py::object out')}) {{",
+        f"    py::array_t<{r_type}> results;",
+        "    {",
+        "        py::gil_scoped_release release;",
+        "        auto lock = self.read_lock();",
+        f"        auto size = static_cast<py::ssize_t>(self.{hook.name}_impls().size());",
+        f"        {r_type}* results_data = nullptr;",
+        "        {",
+        "            py::gil_scoped_acquire acquire;",
+        f'            results = results_array<{r_type}>(out, size, "{r_type}");',
+        "            results_data = results.mutable_data();",
+        "        }",
+        f"        self.call_{hook.name}_all({_join_args(hook.args, 'results_data')});",
+        "    }",
+        "    return results;",
+        "}",
+    ]
+
+
+def _generate_call_batch_binding(hook: Hook) -> list[str]:
+    """
+    Generate the function binding call_<hook>_batch(), taking a NumPy array for each argument of
+    the hook, with one element (or row, for array arguments) per evaluation, and returning the
+    results in a NumPy array, or writing them to the array given in ``out``. Hooks with non
+    numeric types or arguments of unknown size are not bound.
+    """
+    if hook.batch_args is None:
+        return []
+    r_type = hook.r_type.strip()
+    if r_type != "void" and r_type not in _NUMPY_SCALAR_TYPES:
+        return []
+    if any(t not in _NUMPY_SCALAR_TYPES or size == "" for _, t, size in hook.batch_args):
+        return []
+
+    params = ["const hookman::HookCaller &self", "const std::string &plugin_id"]
+    params += [f"batch_array<{t}> {arg}" for arg, t, _ in hook.batch_args]
+    first_arg = hook.batch_args[0][0]
+    result = [
+        f"{'void' if r_type == 'void' else f'py::array_t<{r_type}>'} call_{hook.name}_batch({_join_args(*params, 'py::object out' if r_type != 'void' else '')}) {{",
+        f"    py::ssize_t count = {first_arg}.ndim() > 0 ? {first_arg}.shape(0) : 0;",
+    ]
+    data_args = []
+    for arg, t, size in hook.batch_args:
+        if size:
+            result.append(
+                f'    auto {arg}_data = reinterpret_cast<{_batch_arg_type(t, size)}>(batch_data({arg}, "{arg}", count, {size}));'
+            )
+        else:
+            result.append(f'    auto {arg}_data = batch_data({arg}, "{arg}", count, 0);')
+        data_args.append(f"{arg}_data")
+    call_args = ["plugin_id", "static_cast<size_t>(count)", *data_args]
+    check_plugin = [
+        f"        if (!self.{hook.name}_impl(plugin_id)) {{",
+        f'            throw py::key_error("No implementation of hook {hook.name} for plugin " + plugin_id);',
+        "        }",
+    ]
+    if r_type == "void":
+        result += [
+            "    {",
+            "        py::gil_scoped_release release;",
+            "        auto lock = self.read_lock();",
+            *check_plugin,
+            f"        self.call_{hook.name}_batch({', '.join(call_args)});",
+            "    }",
+            "}",
+        ]
+    else:
+        result += [
+            f'    auto results = results_array<{r_type}>(out, count, "{r_type}");',
+            "    auto results_data = results.mutable_data();",
+            "    {",
+            "        py::gil_scoped_release release;",
+            "        auto lock = self.read_lock();",
+            *check_plugin,
+            f"        self.call_{hook.name}_batch({', '.join(call_args)}, results_data);",
+            "    }",
+            "    return results;",
+            "}",
+        ]
+    return result
+
+
+def _generate_remove_function(hooks: list[Hook]) -> list[str]:
+    """
+    Generate remove_impls(), which drops the implementations of a plugin, rebuilds the plugin id
+    index of each hook and releases the libraries loaded for it by load_impls_from_library().
+    """
+    result = [
+        "    void remove_impls(const std::string &plugin_id) {",
+        "        std::unique_lock<std::shared_mutex> lock(this->mutex);",
+    ]
+    for hook in hooks:
+        result += [
+            f"        for (size_t i = this->_{hook.name}_impls.size(); i > 0; --i) {{",
+            f"            if (this->_{hook.name}_plugin_ids[i - 1] == plugin_id) {{",
+            f"                this->_{hook.name}_impls.erase(this->_{hook.name}_impls.begin() + (i - 1));",
+            f"                this->_{hook.name}_plugin_ids.erase(this->_{hook.name}_plugin_ids.begin() + (i - 1));",
+            *(
+                [
+                    f"                this->_{hook.name}_batch_impls.erase(this->_{hook.name}_batch_impls.begin() + (i - 1));"
+                ]
+                if hook.batch_args is not None
+                else []
+            ),
+            "            }",
+            "        }",
+            f"        this->_{hook.name}_index.clear();",
+            f"        for (size_t i = 0; i < this->_{hook.name}_plugin_ids.size(); ++i) {{",
+            f"            this->_{hook.name}_index[this->_{hook.name}_plugin_ids[i]] = i;",
+            "        }",
+        ]
+    result += [
+        "        this->close_libraries(plugin_id);",
+        "    }",
+    ]
+    return result
+
+
 def _generate_load_function(hooks: list[Hook]) -> list[str]:
     result = ["#if defined(_WIN32)", ""]
     result += _generate_windows_body(hooks)
@@ -844,8 +1380,8 @@ def _generate_windows_body(hooks: list[Hook]) -> list[str]:
     result = [
         "public:",
         "    ~HookCaller() {",
-        "        for (auto handle : this->handles) {",
-        "            FreeLibrary(handle);",
+        "        for (auto& handle : this->handles) {",
+        "            FreeLibrary(handle.second);",
         "        }",
         "    }",
     ]
@@ -863,7 +1399,8 @@ def _generate_windows_body(hooks: list[Hook]) -> list[str]:
         "            while (!error_msg.empty() && (error_msg.back() <= ' ')) { error_msg.pop_back(); }",
         '            throw std::runtime_error("Error loading library " + utf8_filename + ": " + error_msg + " (code " + std::to_string(error_code) + ")");',
         "        }",
-        "        this->handles.push_back(handle);",
+        "        std::unique_lock<std::shared_mutex> lock(this->mutex);",
+        "        this->handles.emplace_back(plugin_id, handle);",
         "",
     ]
 
@@ -871,7 +1408,10 @@ def _generate_windows_body(hooks: list[Hook]) -> list[str]:
         result += [
             f'        auto p{index} = GetProcAddress(handle, "{hook.function_name}");',
             f"        if (p{index} != nullptr) {{",
-            f"            this->append_{hook.name}_impl((uintptr_t)(p{index}), plugin_id);",
+            *_generate_load_impl(hook, f"p{index}"),
+            *_generate_load_batch_impl(
+                hook, f'GetProcAddress(handle, "{hook.function_name}_batch")'
+            ),
             "        }",
             "",
         ]
@@ -950,8 +1490,20 @@ def _generate_windows_body(hooks: list[Hook]) -> list[str]:
         "    }",
         "",
         "",
+        "    void close_libraries(const std::string& plugin_id) {",
+        "        for (auto it = this->handles.begin(); it != this->handles.end();) {",
+        "            if (it->first == plugin_id) {",
+        "                FreeLibrary(it->second);",
+        "                it = this->handles.erase(it);",
+        "            } else {",
+        "                ++it;",
+        "            }",
+        "        }",
+        "    }",
+        "",
+        "",
         "private:",
-        "    std::vector<HMODULE> handles;",
+        "    std::vector<std::pair<std::string, HMODULE>> handles;",
     ]
     return result
 
@@ -966,12 +1518,23 @@ def _generate_linux_body(hooks: list[Hook]) -> list[str]:
     # generate destructor to free the library handles opened by load_from_library()
     result = [
         "private:",
-        "    std::vector<void*> handles;",
+        "    std::vector<std::pair<std::string, void*>> handles;",
+        "",
+        "    void close_libraries(const std::string& plugin_id) {",
+        "        for (auto it = this->handles.begin(); it != this->handles.end();) {",
+        "            if (it->first == plugin_id) {",
+        "                dlclose(it->second);",
+        "                it = this->handles.erase(it);",
+        "            } else {",
+        "                ++it;",
+        "            }",
+        "        }",
+        "    }",
         "",
         "public:",
         "    ~HookCaller() {",
-        "        for (auto handle : this->handles) {",
-        "            dlclose(handle);",
+        "        for (auto& handle : this->handles) {",
+        "            dlclose(handle.second);",
         "        }",
         "    }",
     ]
@@ -983,7 +1546,8 @@ def _generate_linux_body(hooks: list[Hook]) -> list[str]:
         "        if (handle == nullptr) {",
         '            throw std::runtime_error("Error loading library " + utf8_filename + ": dlopen failed");',
         "        }",
-        "        this->handles.push_back(handle);",
+        "        std::unique_lock<std::shared_mutex> lock(this->mutex);",
+        "        this->handles.emplace_back(plugin_id, handle);",
         "",
     ]
 
@@ -991,7 +1555,8 @@ def _generate_linux_body(hooks: list[Hook]) -> list[str]:
         result += [
             f'        auto p{index} = dlsym(handle, "{hook.function_name}");',
             f"        if (p{index} != nullptr) {{",
-            f"            this->append_{hook.name}_impl((uintptr_t)(p{index}), plugin_id);",
+            *_generate_load_impl(hook, f"p{index}"),
+            *_generate_load_batch_impl(hook, f'dlsym(handle, "{hook.function_name}_batch")'),
             "        }",
             "",
         ]
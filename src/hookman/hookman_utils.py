@@ -1,13 +1,19 @@
-import ctypes
 import os
 import sys
+import threading
+import time
 from collections.abc import Iterator
 from collections.abc import Sequence
 from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import final
 
 from hookman.exceptions import SharedLibraryLoadError
 
+if TYPE_CHECKING:
+    import ctypes
+
 
 def find_config_files(
     plugin_dirs: Sequence[Path] | Path, *, ignored_sub_dir_names: Sequence[str] = ()
@@ -15,43 +21,112 @@ def find_config_files(
     """
     Try to find all configurations files from plugins implementations on the given path (plugins_dirs)
     If in the given there is any plugin, this function will return None
+
+    This walks the whole tree below each directory, see `find_installed_config_files` for a faster
+    alternative that only looks at the layout used by installed plugins.
     """
     config_files: list[Path] = []
 
     if not isinstance(plugin_dirs, Sequence):
         plugin_dirs = [plugin_dirs]
 
-    def is_ignored(filename: Path, ignored_dirs: Sequence[Path]) -> bool:
-        return any(folder in filename.parents for folder in ignored_dirs)
+    ignored_names = frozenset(ignored_sub_dir_names)
+
+    def is_ignored(filename: Path, plugin_dir: Path) -> bool:
+        return filename.relative_to(plugin_dir).parts[0] in ignored_names
 
     for plugin_dir in plugin_dirs:
-        ignored_dirs = [plugin_dir / name for name in ignored_sub_dir_names]
         config_files += (
             filename
             for filename in plugin_dir.glob("**/plugin.yaml")
-            if not is_ignored(filename, ignored_dirs)
+            if not is_ignored(filename, plugin_dir)
         )
 
     return config_files
 
 
+def find_installed_config_files(
+    plugin_dirs: Sequence[Path] | Path,
+    *,
+    ignored_sub_dir_names: Sequence[str] = (),
+    ignored_plugin_ids: Sequence[str] = (),
+) -> Sequence[Path]:
+    """
+    Find the configuration files of the plugins installed on the given directories.
+
+    Differently from `find_config_files`, only the layout created by `HookMan.install_plugin`
+    is considered: ``<plugin_dir>/<id>-<version>/assets/plugin.yaml``. Each plugin directory
+    is listed with ``os.scandir`` and the sub directories in ``ignored_sub_dir_names`` or
+    whose name starts with one of ``ignored_plugin_ids`` are pruned by their name, without
+    touching any of their files.
+
+    The files are returned sorted by plugin directory name within each of the ``plugin_dirs``.
+    """
+    config_files: list[Path] = []
+
+    if not isinstance(plugin_dirs, Sequence):
+        plugin_dirs = [plugin_dirs]
+
+    ignored_names = frozenset(ignored_sub_dir_names)
+    ignored_ids = frozenset(ignored_plugin_ids)
+
+    for plugin_dir in plugin_dirs:
+        try:
+            entries = sorted(os.scandir(plugin_dir), key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        for entry in entries:
+            if entry.name in ignored_names or entry.name.rpartition("-")[0] in ignored_ids:
+                continue
+            if not entry.is_dir():
+                continue
+            config_file = os.path.join(entry.path, "assets", "plugin.yaml")
+            if os.path.isfile(config_file):
+                config_files.append(Path(config_file))
+
+    return config_files
+
+
+_path_env_lock = threading.RLock()
+
+
+FileFingerprint = tuple[int, int, int]
+
+
+def file_fingerprint(path: Path | str) -> FileFingerprint | None:
+    """
+    Return a ``(mtime_ns, size, inode)`` tuple identifying the current state of ``path``,
+    or None if the file does not exist.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
 @contextmanager
 def change_path_env(shared_lib_path: str) -> Iterator[None]:
     """
     Change PATH environment adding the shared library path to it.
+
+    The change is process-wide, so concurrent threads changing it are serialized.
     """
-    old_path = os.environ["PATH"]
-    handle = None
-    if sys.platform.startswith("win"):
-        # We explict opted to not cover this on windows.
-        os.environ["PATH"] = old_path + os.pathsep + os.path.dirname(shared_lib_path)
-        handle = os.add_dll_directory(os.path.dirname(shared_lib_path))  # pragma: no cover
-    try:
+    if not sys.platform.startswith("win"):
         yield
-    finally:
-        os.environ["PATH"] = old_path
-        if handle is not None:
-            handle.close()  # pragma: no cover
+        return
+
+    # We explict opted to not cover this on windows.
+    with _path_env_lock:  # pragma: no cover
+        old_path = os.environ["PATH"]
+        os.environ["PATH"] = old_path + os.pathsep + os.path.dirname(shared_lib_path)
+        handle = os.add_dll_directory(os.path.dirname(shared_lib_path))
+        try:
+            yield
+        finally:
+            os.environ["PATH"] = old_path
+            handle.close()
 
 
 @contextmanager
@@ -78,6 +153,8 @@ def suppress_dll_error_dialog() -> Iterator[None]:  # pragma: no cover
     # path.
     SEM_FAILCRITICALERRORS = 0x0001
     SEM_NOOPENFILEERRORBOX = 0x8000
+    import ctypes
+
     # ctypes.WinDLL is Windows-only; mypy on non-Windows platforms does not resolve this attribute.
     kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)  # type: ignore[attr-defined]
     old_mode = ctypes.c_uint(0)
@@ -95,8 +172,106 @@ def suppress_dll_error_dialog() -> Iterator[None]:  # pragma: no cover
             raise OSError(ctypes.get_last_error(), "SetThreadErrorMode restore failed")
 
 
+def _open_shared_lib(shared_lib_path: str) -> "ctypes.CDLL":
+    import ctypes
+
+    with change_path_env(shared_lib_path):
+        with suppress_dll_error_dialog():
+            try:
+                return ctypes.cdll.LoadLibrary(shared_lib_path)
+            except OSError as error:
+                raise SharedLibraryLoadError(Path(shared_lib_path), str(error)) from error
+
+
+def _close_shared_lib(plugin_dll: "ctypes.CDLL") -> None:
+    if sys.platform == "win32":
+        from _ctypes import FreeLibrary
+
+        FreeLibrary(plugin_dll._handle)
+    else:
+        from _ctypes import dlclose
+
+        dlclose(plugin_dll._handle)
+
+
+@final
+class SharedLibSession:
+    """
+    Keeps the shared libraries loaded through `load_shared_lib` open until the session is closed.
+
+    Loading a library runs its static initializers and resolves its dependencies, so during
+    plugin discovery a session is used to load each library a single time, even if it is
+    inspected more than once. Loading the library again while the session holds it (for
+    instance by the ``HookCaller``) only increments the reference count kept by the OS loader,
+    so the library is mapped and initialized only once.
+
+    With ``keep_loaded`` False, the discovery releases each library (see `release`) as soon as
+    its plugin is probed, instead of keeping all of them loaded until the session is closed.
+
+    Can be used from multiple threads.
+    """
+
+    def __init__(self, *, keep_loaded: bool = True) -> None:
+        self.keep_loaded = keep_loaded
+        self._libs: dict[str, ctypes.CDLL] = {}
+        self._lock = threading.Lock()
+        self.load_times: dict[str, float] = {}
+        """The time in seconds spent loading each library, by path."""
+
+    def load(self, shared_lib_path: str) -> "ctypes.CDLL":
+        """
+        Return the library loaded from ``shared_lib_path``, loading it if it is not loaded yet.
+
+        :raises SharedLibraryLoadError:
+            If the shared library exists but fails to load.
+        """
+        with self._lock:
+            plugin_dll = self._libs.get(shared_lib_path)
+        if plugin_dll is not None:
+            return plugin_dll
+
+        start = time.perf_counter()
+        plugin_dll = _open_shared_lib(shared_lib_path)
+        load_time = time.perf_counter() - start
+        with self._lock:
+            loaded_dll = self._libs.setdefault(shared_lib_path, plugin_dll)
+            if loaded_dll is plugin_dll:
+                self.load_times[shared_lib_path] = load_time
+        if loaded_dll is not plugin_dll:
+            # Loaded concurrently by another thread.
+            _close_shared_lib(plugin_dll)
+        return loaded_dll
+
+    def release(self, shared_lib_path: str) -> None:
+        """
+        Release the library loaded from ``shared_lib_path``, if it is loaded by this session.
+        """
+        with self._lock:
+            plugin_dll = self._libs.pop(shared_lib_path, None)
+        if plugin_dll is not None:
+            _close_shared_lib(plugin_dll)
+
+    def close(self) -> None:
+        """
+        Release all the libraries loaded by this session.
+        """
+        with self._lock:
+            libs = list(self._libs.values())
+            self._libs.clear()
+        for plugin_dll in libs:
+            _close_shared_lib(plugin_dll)
+
+    def __enter__(self) -> "SharedLibSession":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
 @contextmanager
-def load_shared_lib(shared_lib_path: str) -> Iterator[ctypes.CDLL]:
+def load_shared_lib(
+    shared_lib_path: str, session: SharedLibSession | None = None
+) -> Iterator["ctypes.CDLL"]:
     """
     Load a shared library using ctypes freeing the resource at end.
 
@@ -104,25 +279,19 @@ def load_shared_lib(shared_lib_path: str) -> Iterator[ctypes.CDLL]:
     suppressed so that load failures surface as `SharedLibraryLoadError`
     instead of blocking modal dialogs.
 
+    If a `SharedLibSession` is given, the library is loaded through it, and is only freed
+    when the session is closed.
+
     :raises SharedLibraryLoadError:
         If the shared library exists but fails to load, e.g. because of an
         incompatible or missing dependency DLL.
     """
-    with change_path_env(shared_lib_path):
-        with suppress_dll_error_dialog():
-            try:
-                plugin_dll = ctypes.cdll.LoadLibrary(shared_lib_path)
-            except OSError as error:
-                raise SharedLibraryLoadError(Path(shared_lib_path), str(error)) from error
+    if session is not None:
+        yield session.load(shared_lib_path)
+        return
 
+    plugin_dll = _open_shared_lib(shared_lib_path)
     try:
         yield plugin_dll
     finally:
-        if sys.platform == "win32":
-            from _ctypes import FreeLibrary
-
-            FreeLibrary(plugin_dll._handle)
-        else:
-            from _ctypes import dlclose
-
-            dlclose(plugin_dll._handle)
+        _close_shared_lib(plugin_dll)
@@ -1,37 +1,53 @@
 import inspect
 import logging
-import shutil
+import time
 from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
 from collections.abc import Sequence
+from contextlib import contextmanager
 from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import replace
 from pathlib import Path
-from zipfile import ZipFile
-
-from packaging.version import Version
-from pluggy import HookCaller
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
 
 from hookman import hookman_utils
 from hookman.exceptions import InvalidDestinationPathError
 from hookman.exceptions import PluginAlreadyInstalledError
+from hookman.exceptions import PluginProbeError
 from hookman.exceptions import SharedLibraryLoadError
 from hookman.exceptions import SharedLibraryNotFoundError
+from hookman.hookman_utils import SharedLibSession
 from hookman.hookman_utils import change_path_env
 from hookman.plugin_config import PluginInfo
 
+if TYPE_CHECKING:
+    from packaging.version import Version
+    from pluggy import HookCaller
+
+    from hookman.discovery_cache import DiscoveryCache
+    from hookman.plugin_index import PluginIndex
+    from hookman.plugin_registry import PluginRegistry
+    from hookman.plugin_watcher import PluginWatcher
+    from hookman.probe_pool import ProbePool
+
 _logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class InstalledPluginInfo:
     """
     Responsible to store the information about an installed plugin.
     """
 
     id: str
-    version: Version
+    version: "Version"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PluginLoadFailure:
     """Information about a plugin that was found but failed to load during discovery."""
 
@@ -44,6 +60,60 @@ class PluginLoadFailure:
     reason: str
     """Human-readable description of why the plugin failed to load."""
 
+    load_report: "PluginLoadReport | None" = field(default=None, compare=False)
+    """The time spent trying to load the plugin, not taken into account by comparisons."""
+
+
+@dataclass(frozen=True, slots=True)
+class PluginLoadReport:
+    """
+    The cost of loading a plugin, see the ``load_reports`` argument of
+    `HookMan.get_plugins_available_and_failures` and `HookMan.get_hook_caller`.
+
+    The ``README.md`` of the plugin is not part of the report, as it is only read when
+    ``PluginInfo.description`` is first accessed.
+    """
+
+    yaml_location: Path
+    """Path to the plugin's plugin.yaml file."""
+
+    plugin_id: str
+    """The plugin id, read from the plugin's YAML config file."""
+
+    shared_lib_size: int | None
+    """Size in bytes of the shared library on disk, None if it does not exist."""
+
+    from_cache: bool = False
+    """True if the plugin was served by the discovery cache, so nothing was loaded."""
+
+    parse_seconds: float = 0.0
+    """Time parsing the ``plugin.yaml`` file (zero when it was read from the plugin index)."""
+
+    dlopen_seconds: tuple[float, ...] = ()
+    """
+    Time of each load of the shared library while probing the plugin (none with
+    ``static_inspection`` or ``isolated_probing``, as the library is not loaded by this process).
+    """
+
+    symbol_resolution_seconds: float = 0.0
+    """
+    Time probing the plugin besides loading its library: resolving ``get_plugin_id`` and the
+    hook symbols, or reading its symbol table with ``static_inspection``. With
+    ``isolated_probing`` it is the whole time spent by the worker process.
+    """
+
+    load_impls_seconds: float = 0.0
+    """Time of ``HookCaller.load_impls_from_library``, only measured by `HookMan.get_hook_caller`."""
+
+    @property
+    def total_seconds(self) -> float:
+        return (
+            self.parse_seconds
+            + sum(self.dlopen_seconds)
+            + self.symbol_resolution_seconds
+            + self.load_impls_seconds
+        )
+
 
 class HookSpecs:
     """
@@ -65,6 +135,13 @@ class HookSpecs:
 
     :kwparam List[str] extra_includes:
         Extra #include directives that will be added to the generated HookCaller.hpp file.
+
+    :kwparam List[function] batch_hooks:
+        The hooks, among ``hooks``, that also have an array form, evaluating the hook for many
+        sets of arguments in a single call: the plugins may export it with the
+        ``HOOK_<NAME>_BATCH`` macro of the generated ``hook_specs.h``, and the ``HookCaller``
+        evaluates a batch with ``call_<name>_batch``, looping over the scalar hook of the plugins
+        that do not export it.
     """
 
     def __init__(
@@ -75,14 +152,17 @@ class HookSpecs:
         pyd_name: str | None = None,
         hooks: Sequence[Callable],
         extra_includes: Sequence[str] = (),
+        batch_hooks: Sequence[Callable] = (),
     ) -> None:
         for hook in hooks:
             self._check_hook_arguments(hook)
+        self._check_batch_hooks(hooks, batch_hooks)
         self.project_name = project_name
         self.version = version
         self.pyd_name = pyd_name
         self.hooks = hooks
         self.extra_includes = list(extra_includes)
+        self.batch_hooks = list(batch_hooks)
 
     def _check_hook_arguments(self, hook: Callable) -> None:
         """
@@ -104,21 +184,125 @@ class HookSpecs:
         if not inspect.getdoc(hook):
             raise TypeError("All hooks must have documentation")
 
+    def _check_batch_hooks(
+        self, hooks: Sequence[Callable], batch_hooks: Sequence[Callable]
+    ) -> None:
+        """
+        Check if the batch hooks are hooks of the specification, and if the names of their array
+        form do not clash with the other hooks. If an error is found, a ValueError is raised.
+        """
+        hook_names = {hook.__name__.lower() for hook in hooks}
+        for hook in batch_hooks:
+            if hook not in hooks:
+                raise ValueError(f"Batch hook '{hook.__name__}' is not one of the hooks")
+            if f"{hook.__name__.lower()}_batch" in hook_names:
+                raise ValueError(
+                    f"The array form of '{hook.__name__}' clashes with the hook "
+                    f"'{hook.__name__.lower()}_batch'"
+                )
+
 
 class HookMan:
     """
     Main class of HookMan, this class holds all the information related to the plugins
+
+    :kwparam specs:
+        The :ref:`hook-specs-api-section` of the application.
+
+    :kwparam plugin_dirs:
+        The directories where the plugins are installed.
+
+    :kwparam discovery_cache:
+        If True, the information resolved for each plugin during discovery is stored in a
+        ``.hookman_cache.json`` file on the root of each directory in ``plugin_dirs``, and reused
+        on the next discoveries while the ``plugin.yaml``, ``README.md`` and shared library of the
+        plugin remain unchanged. Cached plugins are listed without parsing their ``plugin.yaml``
+        or loading their shared library.
+
+    :kwparam failure_cache:
+        If True, the plugins that fail to load are stored in the same ``.hookman_cache.json`` file
+        used by ``discovery_cache``, and reported as a `PluginLoadFailure` by the next discoveries
+        without loading them again, while their ``plugin.yaml`` and shared library remain
+        unchanged. Use `clear_failure_cache` to probe them again.
+
+    :kwparam deep_discovery:
+        If True (the default), every ``plugin.yaml`` below ``plugin_dirs`` is found, at any depth.
+        If False, only the layout created by `install_plugin` is scanned
+        (``<plugin_dir>/<id>-<version>/assets/plugin.yaml``), which is much cheaper for
+        directories with many plugins or on network file systems.
+
+    :kwparam static_inspection:
+        If True, on Linux the hooks implemented by each plugin are read from the dynamic symbol
+        table of its shared library, so listing the plugins never loads any of them (the plugin
+        id is then taken from its plugin.yaml). It has no effect on Windows. See `PluginInfo`.
+
+    :kwparam plugin_index:
+        If True, `install_plugin` and `remove_plugin` maintain a ``.hookman_index.json`` file on
+        the root of each directory in ``plugin_dirs`` with the plugins installed on it (see
+        `PluginIndex`), and discovery lists the plugins of a root from its index instead of
+        scanning the root and parsing each ``plugin.yaml``. Roots without an index, or whose
+        index is stale (for instance because a plugin was copied there by hand), are scanned
+        as usual.
+
+    :kwparam plugin_resolution:
+        Which plugins are loaded when several versions of the same plugin id are found:
+
+        * ``"all"`` (the default): all of them.
+        * ``"newest"``: only the one with the newest version.
+        * ``"first"``: only the ones on the first directory of ``plugins_dirs`` with the plugin,
+          and then only the newest version among them.
+
+        The versions are selected using only the ``plugin.yaml`` files (or the discovery cache
+        and plugin index), so the superseded versions are never loaded. Selecting them needs
+        all the ``plugin.yaml`` files before probing the first plugin.
+
+    :kwparam isolated_probing:
+        If True, the plugins are probed in worker processes (see `ProbePool`), so a plugin whose
+        shared library hangs or crashes while loaded is reported as a `PluginLoadFailure` instead
+        of freezing or taking down the application. The shared libraries are then never loaded
+        by the calling process during discovery, and ``max_workers`` is the number of worker
+        processes.
+
+    :kwparam probe_timeout:
+        With ``isolated_probing``, the time in seconds each plugin has to be probed before its
+        worker process is killed and the plugin reported as a failure. None means no timeout.
     """
 
     _TRASH_DIR_NAME = ".trash"
 
-    def __init__(self, *, specs: HookSpecs, plugin_dirs: Sequence[Path]) -> None:
+    def __init__(
+        self,
+        *,
+        specs: HookSpecs,
+        plugin_dirs: Sequence[Path],
+        discovery_cache: bool = False,
+        failure_cache: bool = False,
+        deep_discovery: bool = True,
+        static_inspection: bool = False,
+        plugin_index: bool = False,
+        plugin_resolution: Literal["all", "newest", "first"] = "all",
+        isolated_probing: bool = False,
+        probe_timeout: float | None = None,
+    ) -> None:
+        if plugin_resolution not in ("all", "newest", "first"):
+            raise ValueError(
+                f"plugin_resolution must be 'all', 'newest' or 'first', got {plugin_resolution!r}"
+            )
         self.specs = specs
         self.plugins_dirs = plugin_dirs
+        self.discovery_cache = discovery_cache
+        self.failure_cache = failure_cache
+        self.deep_discovery = deep_discovery
+        self.static_inspection = static_inspection
+        self.plugin_index = plugin_index
+        self.plugin_resolution = plugin_resolution
+        self.isolated_probing = isolated_probing
+        self.probe_timeout = probe_timeout
         self.hooks_available = {
             f"{hook.__name__.lower()}": f"{specs.project_name.lower()}_v{specs.version}_{hook.__name__.lower()}"
             for hook in specs.hooks
         }
+        self._hook_callers: dict[frozenset[str], _HookCallerState] = {}
 
     def install_plugin(self, plugin_file_path: Path, dest_path: Path) -> InstalledPluginInfo:
         """
@@ -136,7 +320,14 @@ class HookMan:
 
         :param dest_path:
             The destination to where the plugin should be placed.
+
+        The ``HookCaller`` objects already returned by `get_hook_caller` are left unchanged, and
+        the next calls of `get_hook_caller` create new ones with the installed plugin.
         """
+        from zipfile import ZipFile
+
+        from packaging.version import Version
+
         plugin_file_zip = ZipFile(plugin_file_path)
         PluginInfo.validate_plugin_file(plugin_file_zip=plugin_file_zip)
 
@@ -159,9 +350,15 @@ class HookMan:
         if plugin_id_version in [x.name for x in plugins_dirs]:
             raise PluginAlreadyInstalledError("Plugin already installed")
 
+        # Load the index before changing the root, otherwise it would always be stale.
+        index = self._load_plugin_index(dest_path)
         plugin_destination_folder = dest_path / plugin_id_version
         plugin_destination_folder.mkdir(parents=True)
         plugin_file_zip.extractall(plugin_destination_folder)
+        if index is not None:
+            index.add(plugin_id_version)
+            index.save()
+        self._hook_callers.clear()
         return InstalledPluginInfo(version=Version(plugin_version), id=plugin_id)
 
     def _move_to_trash(self, root_dir: Path, name: str) -> None:
@@ -185,6 +382,7 @@ class HookMan:
         """
         Clear the trash sub folder from ``root_dir``.
         """
+        import shutil
         from contextlib import suppress
 
         trash_dir = root_dir / self._TRASH_DIR_NAME
@@ -195,7 +393,7 @@ class HookMan:
                 with suppress(OSError):
                     filename.unlink()
 
-    def remove_plugin(self, caption: str, version: Version | None = None) -> None:
+    def remove_plugin(self, caption: str, version: "Version | None" = None) -> None:
         """
         This method receives the name and version of plugin as input, and will remove completely the
         plugin from ``plugin_dirs``.
@@ -206,24 +404,44 @@ class HookMan:
         :param version:
             Optional parameter used to remove a specific version of plugin. Case it is not specified,
             all versions of a given plugin will be removed.
+
+        The ``HookCaller`` objects already returned by `get_hook_caller` are left unchanged, and
+        the next calls of `get_hook_caller` create new ones without the removed plugin.
         """
-        for plugin in self.get_plugins_available():
-            plugin_dir = plugin.yaml_location.parents[1]
-            root_dir = plugin_dir.parent
-            remove_plugin = False
+        from packaging.version import Version
 
-            if version is None and caption in plugin_dir.name:
-                remove_plugin = True
-            elif plugin.id == caption and version == plugin.version:
-                remove_plugin = True
+        # Every installed version is considered, regardless of ``plugin_resolution``, and the
+        # plugins are found from their plugin.yaml files only, without loading them.
+        plugin_files, indexed_configs = self._find_plugins(())
+        yaml_locations = []
+        for yaml_location in plugin_files:
+            candidate = _PluginCandidate.create(
+                yaml_location, None, indexed_configs.get(yaml_location)
+            )
+            if candidate.plugin_id != caption:
+                continue
+            assert candidate.config is not None
+            if version is None or Version(str(candidate.config["version"])) == version:
+                yaml_locations.append(yaml_location)
 
-            if remove_plugin:
-                self._move_to_trash(root_dir, plugin_dir.name)
-                self._try_clear_trash(root_dir)
-                break
+        for yaml_location in yaml_locations:
+            plugin_dir = yaml_location.parents[1]
+            root_dir = plugin_dir.parent
+            index = self._load_plugin_index(root_dir)
+            self._move_to_trash(root_dir, plugin_dir.name)
+            if index is not None:
+                index.remove(plugin_dir.name)
+                index.save()
+            self._try_clear_trash(root_dir)
+        if yaml_locations:
+            self._hook_callers.clear()
 
     def get_plugins_available_and_failures(
-        self, ignored_plugins: Sequence[str] = ()
+        self,
+        ignored_plugins: Sequence[str] = (),
+        *,
+        max_workers: int = 1,
+        load_reports: list[PluginLoadReport] | None = None,
     ) -> tuple[list[PluginInfo], list[PluginLoadFailure]]:
         """
         Return all plugins that loaded successfully, plus a list of those that failed.
@@ -234,38 +452,443 @@ class HookMan:
 
         Optionally you can pass a list of plugin ids to exclude from both lists.
 
+        When ``discovery_cache`` is enabled, plugins whose files did not change since the last
+        discovery are served from the cache, see :class:`HookMan`.
+
+        :param max_workers:
+            Number of threads used to probe the plugins (reading their files and loading their
+            shared libraries) concurrently. The default of 1 probes the plugins sequentially
+            in the calling thread. The results are always returned in the discovery order.
+
+        :param load_reports:
+            If given, a `PluginLoadReport` for each plugin that loaded or failed is appended to
+            it, in the discovery order. The failures always carry their report.
+
+        See `iter_plugins` to receive each plugin as soon as it is probed.
+
         :returns:
             A tuple of (successful `PluginInfo` list, `PluginLoadFailure` list).
         """
-        plugin_ids_and_files = [
-            (plugin_id, f)
-            for f in hookman_utils.find_config_files(
-                self.plugins_dirs, ignored_sub_dir_names=[self._TRASH_DIR_NAME]
-            )
-            if (plugin_id := PluginInfo.parse_id(f)) not in ignored_plugins
-        ]
+        with SharedLibSession(keep_loaded=False) as session:
+            return self._discover(ignored_plugins, max_workers, session, load_reports=load_reports)
 
+    def get_plugin_registry(
+        self, ignored_plugins: Sequence[str] = (), *, max_workers: int = 1
+    ) -> "PluginRegistry":
+        """
+        Return the plugins that loaded successfully as a `PluginRegistry`, indexed by id, id and
+        version, and implemented hook.
+
+        See `get_plugins_available_and_failures` for the parameters.
+        """
+        from hookman.plugin_registry import PluginRegistry
+
+        plugins, _failures = self.get_plugins_available_and_failures(
+            ignored_plugins, max_workers=max_workers
+        )
+        return PluginRegistry(plugins, self.hooks_available)
+
+    def probe_plugins(
+        self, yaml_locations: Sequence[Path], *, max_workers: int = 1
+    ) -> tuple[list[PluginInfo], list[PluginLoadFailure]]:
+        """
+        Same as `get_plugins_available_and_failures`, but only for the plugins with the given
+        ``plugin.yaml`` files, for instance the ones reported as added or changed by a
+        `PluginWatcher` (see `watch_plugins`).
+        """
+        with SharedLibSession(keep_loaded=False) as session:
+            return self._discover((), max_workers, session, yaml_locations)
+
+    def watch_plugins(self, *, use_inotify: bool = True) -> "PluginWatcher":
+        """
+        Return a `PluginWatcher` that keeps track of the plugins installed, removed and changed on
+        ``plugins_dirs``, so long-running applications only need to probe (see `probe_plugins`)
+        the plugins that actually changed instead of calling `get_plugins_available` again.
+
+        The watcher follows the ``deep_discovery`` setting, and should be closed when no longer
+        needed. Set ``use_inotify`` to False to use the polling fallback even on Linux.
+        """
+        from hookman.plugin_watcher import PluginWatcher
+
+        return PluginWatcher(
+            self.plugins_dirs,
+            ignored_sub_dir_names=[self._TRASH_DIR_NAME],
+            deep_discovery=self.deep_discovery,
+            use_inotify=use_inotify,
+        )
+
+    def iter_plugins(
+        self, ignored_plugins: Sequence[str] = (), *, max_workers: int = 1
+    ) -> Iterator[PluginInfo | PluginLoadFailure]:
+        """
+        Yield a `PluginInfo` for each plugin that loads successfully, and a `PluginLoadFailure`
+        for each one that fails, as soon as each plugin is probed.
+
+        The plugins are yielded in the discovery order, see `get_plugins_available_and_failures`
+        for the other parameters. Plugins are only probed while the iteration proceeds, so
+        stopping it early (for instance as soon as a plugin implementing a given hook is found)
+        skips loading the remaining ones. With ``max_workers`` greater than 1 the plugins are
+        probed ahead of the iteration, and the pending probes are cancelled when the iterator is
+        closed.
+        """
+        with SharedLibSession(keep_loaded=False) as session:
+            yield from self._iter_discover(ignored_plugins, max_workers, session)
+
+    def _discover(
+        self,
+        ignored_plugins: Sequence[str],
+        max_workers: int,
+        session: SharedLibSession,
+        plugin_files: Sequence[Path] | None = None,
+        *,
+        load_reports: list[PluginLoadReport] | None = None,
+    ) -> tuple[list[PluginInfo], list[PluginLoadFailure]]:
+        """
+        Implementation of `get_plugins_available_and_failures`, see `_iter_discover`.
+        """
         plugins: list[PluginInfo] = []
         failures: list[PluginLoadFailure] = []
-        for plugin_id, plugin_file in plugin_ids_and_files:
-            try:
-                plugin_info = PluginInfo(plugin_file, self.hooks_available)
-            except (SharedLibraryLoadError, SharedLibraryNotFoundError) as error:
-                reason = str(error)
-                _logger.warning("Plugin at '%s' failed to load: %s", plugin_file, reason)
-                failures.append(
-                    PluginLoadFailure(
-                        yaml_location=plugin_file,
-                        plugin_id=plugin_id,
-                        reason=reason,
-                    )
-                )
-                continue
+        for result in self._iter_discover(
+            ignored_plugins, max_workers, session, plugin_files, load_reports=load_reports
+        ):
+            if isinstance(result, PluginLoadFailure):
+                failures.append(result)
             else:
-                plugins.append(plugin_info)
+                plugins.append(result)
         return plugins, failures
 
-    def get_plugins_available(self, ignored_plugins: Sequence[str] = ()) -> Sequence[PluginInfo]:
+    def _iter_discover(
+        self,
+        ignored_plugins: Sequence[str],
+        max_workers: int,
+        session: SharedLibSession,
+        plugin_files: Sequence[Path] | None = None,
+        *,
+        load_reports: list[PluginLoadReport] | None = None,
+    ) -> Iterator[PluginInfo | PluginLoadFailure]:
+        """
+        Implementation of `iter_plugins`, the shared libraries of the probed plugins are loaded
+        through ``session``, and kept loaded until it is closed if ``session.keep_loaded`` is True
+        (so a ``HookCaller`` loading them reuses them) or released after each probe otherwise.
+
+        If ``plugin_files`` is given only those plugins are probed, instead of the ones found
+        on ``plugins_dirs``. If ``load_reports`` is given, the report of each plugin yielded is
+        appended to it.
+        """
+        cache = self._load_discovery_cache()
+        partial_discovery = plugin_files is not None
+        indexed_configs: dict[Path, dict[str, Any]] = {}
+        if plugin_files is None:
+            plugin_files, indexed_configs = self._find_plugins(ignored_plugins)
+        cached_plugins = [
+            cache.lookup(plugin_file) if cache is not None else None for plugin_file in plugin_files
+        ]
+        cached_failures: dict[Path, str] = {}
+        if cache is not None:
+            for plugin_file in plugin_files:
+                reason = cache.lookup_failure(plugin_file)
+                if reason is not None:
+                    cached_failures[plugin_file] = reason
+        configs = [indexed_configs.get(plugin_file) for plugin_file in plugin_files]
+        candidates: Sequence[_PluginCandidate | None] = [None] * len(plugin_files)
+        if self.plugin_resolution != "all":
+            # All the plugin.yaml files are needed upfront to select the plugins to probe.
+            candidates = self._select_candidates(
+                plugin_files, cached_plugins, configs, ignored_plugins
+            )
+            plugin_files = [candidate.yaml_location for candidate in candidates]
+            cached_plugins = [candidate.cached_plugin for candidate in candidates]
+            configs = [candidate.config for candidate in candidates]
+
+        def load_plugin(
+            yaml_location: Path,
+            cached_plugin: PluginInfo | None,
+            config: dict[str, Any] | None,
+            candidate: _PluginCandidate | None,
+        ) -> tuple[PluginInfo | PluginLoadFailure, PluginLoadReport] | None:
+            if candidate is None:
+                candidate = _PluginCandidate.create(yaml_location, cached_plugin, config)
+            if candidate.plugin_id in ignored_plugins:
+                return None
+            if candidate.cached_plugin is not None:
+                report = PluginLoadReport(
+                    yaml_location,
+                    candidate.plugin_id,
+                    _file_size(candidate.cached_plugin.shared_lib_path),
+                    from_cache=True,
+                )
+                return candidate.cached_plugin, report
+
+            shared_lib_path = _shared_lib_path(yaml_location, candidate.plugin_id)
+            cached_failure = cached_failures.get(yaml_location)
+            if cached_failure is not None:
+                report = PluginLoadReport(
+                    yaml_location,
+                    candidate.plugin_id,
+                    _file_size(shared_lib_path),
+                    from_cache=True,
+                    parse_seconds=candidate.parse_seconds,
+                )
+                failure = PluginLoadFailure(
+                    yaml_location, candidate.plugin_id, cached_failure, load_report=report
+                )
+                return failure, report
+
+            start = time.perf_counter()
+            result = self._probe_plugin(candidate, session, probe_pool, probe_errors)
+            probe_seconds = time.perf_counter() - start
+            load_time = session.load_times.get(str(shared_lib_path))
+            if not session.keep_loaded:
+                session.release(str(shared_lib_path))
+            dlopen_seconds = (load_time,) if load_time is not None else ()
+            report = PluginLoadReport(
+                yaml_location,
+                candidate.plugin_id,
+                _file_size(shared_lib_path),
+                parse_seconds=candidate.parse_seconds,
+                dlopen_seconds=dlopen_seconds,
+                symbol_resolution_seconds=max(probe_seconds - sum(dlopen_seconds), 0.0),
+            )
+            if isinstance(result, PluginLoadFailure):
+                result = replace(result, load_report=report)
+            return result, report
+
+        probe_errors: set[Path] = set()
+        completed = False
+        try:
+            with (
+                self._create_probe_pool() as probe_pool,
+                _probing_imap(max_workers) as probing_imap,
+            ):
+                results = probing_imap(
+                    load_plugin, plugin_files, cached_plugins, configs, candidates
+                )
+                for cached_plugin, result_and_report in zip(cached_plugins, results):
+                    if result_and_report is None:
+                        continue
+                    result, report = result_and_report
+                    if load_reports is not None:
+                        load_reports.append(report)
+                    if (
+                        cache is not None
+                        and isinstance(result, PluginInfo)
+                        and result is not cached_plugin
+                    ):
+                        cache.store(result)
+                    # Probe timeouts and crashes of the probing process might not happen again,
+                    # so only the failures to load the library are cached.
+                    if (
+                        cache is not None
+                        and isinstance(result, PluginLoadFailure)
+                        and not report.from_cache
+                        and result.yaml_location not in probe_errors
+                    ):
+                        cache.store_failure(
+                            result.yaml_location,
+                            _shared_lib_path(result.yaml_location, result.plugin_id),
+                            result.reason,
+                        )
+                    yield result
+            completed = True
+        finally:
+            if cache is not None:
+                # Only drop the entries of plugins not found when all plugins were discovered.
+                cache.save(prune=completed and not partial_discovery)
+
+    def _select_candidates(
+        self,
+        plugin_files: Sequence[Path],
+        cached_plugins: Sequence[PluginInfo | None],
+        configs: Sequence[dict[str, Any] | None],
+        ignored_plugins: Sequence[str],
+    ) -> list["_PluginCandidate"]:
+        """
+        Return the candidates of the given plugins that are not ignored, keeping a single
+        version of each plugin id according to ``plugin_resolution``, in the discovery order.
+        """
+        from packaging.version import Version
+
+        roots = self._plugin_roots()
+
+        def root_index(candidate: _PluginCandidate) -> int:
+            parents = candidate.yaml_location.parents
+            return next((i for i, root in enumerate(roots) if root in parents), len(roots))
+
+        def version(candidate: _PluginCandidate) -> Version:
+            if candidate.cached_plugin is not None:
+                return candidate.cached_plugin.version
+            assert candidate.config is not None
+            return Version(candidate.config["version"])
+
+        def preference(candidate: _PluginCandidate) -> tuple[int, Version]:
+            if self.plugin_resolution == "newest":
+                return 0, version(candidate)
+            # "first": the newest version within the first directory with the plugin.
+            return -root_index(candidate), version(candidate)
+
+        candidates = [
+            candidate
+            for candidate in map(_PluginCandidate.create, plugin_files, cached_plugins, configs)
+            if candidate.plugin_id not in ignored_plugins
+        ]
+        selected: dict[str, _PluginCandidate] = {}
+        for candidate in candidates:
+            current = selected.get(candidate.plugin_id)
+            if current is None or preference(candidate) > preference(current):
+                selected[candidate.plugin_id] = candidate
+        selected_candidates = {id(candidate) for candidate in selected.values()}
+        return [candidate for candidate in candidates if id(candidate) in selected_candidates]
+
+    def _probe_plugin(
+        self,
+        candidate: "_PluginCandidate",
+        session: SharedLibSession,
+        probe_pool: "ProbePool | None" = None,
+        probe_errors: set[Path] | None = None,
+    ) -> PluginInfo | PluginLoadFailure:
+        """
+        Create the `PluginInfo` of the given plugin, or a `PluginLoadFailure` if its shared
+        library could not be loaded. If ``probe_pool`` is given the plugin is probed by it,
+        otherwise its shared library is loaded through ``session``.
+
+        The ``yaml_location`` of a plugin failing with a `PluginProbeError` is added to
+        ``probe_errors``, if given.
+        """
+        try:
+            if probe_pool is not None:
+                assert candidate.config is not None
+                return probe_pool.probe(candidate.yaml_location, candidate.config)
+            return PluginInfo(
+                candidate.yaml_location,
+                self.hooks_available,
+                shared_lib_session=session,
+                plugin_config=candidate.config,
+                static_inspection=self.static_inspection,
+            )
+        except (SharedLibraryLoadError, SharedLibraryNotFoundError) as error:
+            if probe_errors is not None and isinstance(error, PluginProbeError):
+                probe_errors.add(candidate.yaml_location)
+            reason = str(error)
+            _logger.warning("Plugin at '%s' failed to load: %s", candidate.yaml_location, reason)
+            return PluginLoadFailure(
+                yaml_location=candidate.yaml_location,
+                plugin_id=candidate.plugin_id,
+                reason=reason,
+            )
+
+    def _plugin_roots(self) -> list[Path]:
+        """
+        Return ``plugins_dirs`` as a list, as it also accepts a single Path.
+        """
+        if isinstance(self.plugins_dirs, Path):
+            return [self.plugins_dirs]
+        return list(self.plugins_dirs)
+
+    def _find_plugins(
+        self, ignored_plugins: Sequence[str]
+    ) -> tuple[list[Path], dict[Path, dict[str, Any]]]:
+        """
+        Find the ``plugin.yaml`` files on ``plugins_dirs``, reading the plugin index of each root
+        when ``plugin_index`` is enabled.
+
+        :returns:
+            The ``plugin.yaml`` files, and the parsed contents of the ones read from an index.
+        """
+        if not self.plugin_index:
+            return list(self._find_config_files(ignored_plugins, self.plugins_dirs)), {}
+
+        from hookman.plugin_index import PluginIndex
+
+        plugin_files: list[Path] = []
+        indexed_configs: dict[Path, dict[str, Any]] = {}
+        for root in self._plugin_roots():
+            index = PluginIndex.load(root)
+            if index is None or not index.is_fresh():
+                plugin_files.extend(self._find_config_files(ignored_plugins, [root]))
+                continue
+            for plugin in index.plugins():
+                if plugin.id in ignored_plugins:
+                    continue
+                yaml_location = index.yaml_location(plugin)
+                plugin_files.append(yaml_location)
+                indexed_configs[yaml_location] = plugin.config
+        return plugin_files, indexed_configs
+
+    def _find_config_files(
+        self, ignored_plugins: Sequence[str], plugin_dirs: Sequence[Path]
+    ) -> Sequence[Path]:
+        """
+        Find the ``plugin.yaml`` files on ``plugin_dirs``, according to ``deep_discovery``.
+        """
+        if self.deep_discovery:
+            return hookman_utils.find_config_files(
+                plugin_dirs, ignored_sub_dir_names=[self._TRASH_DIR_NAME]
+            )
+        return hookman_utils.find_installed_config_files(
+            plugin_dirs,
+            ignored_sub_dir_names=[self._TRASH_DIR_NAME],
+            ignored_plugin_ids=ignored_plugins,
+        )
+
+    def _load_plugin_index(self, root: Path) -> "PluginIndex | None":
+        """
+        Return the `PluginIndex` of the given root, to be updated by an installation or removal,
+        or None if ``plugin_index`` is disabled or ``root`` is not one of ``plugins_dirs``.
+        """
+        if not self.plugin_index or root not in self._plugin_roots():
+            return None
+        from hookman.plugin_index import PluginIndex
+
+        return PluginIndex.load_or_build(root, ignored_sub_dir_names=[self._TRASH_DIR_NAME])
+
+    @contextmanager
+    def _create_probe_pool(self) -> Iterator["ProbePool | None"]:
+        """
+        Yield the `ProbePool` used to probe the plugins, or None if ``isolated_probing`` is
+        disabled. The worker processes are only started when a plugin is probed.
+        """
+        if not self.isolated_probing:
+            yield None
+            return
+        from hookman.probe_pool import ProbePool
+
+        with ProbePool(
+            self.hooks_available,
+            timeout=self.probe_timeout,
+            static_inspection=self.static_inspection,
+        ) as probe_pool:
+            yield probe_pool
+
+    def _load_discovery_cache(self) -> "DiscoveryCache | None":
+        """
+        Return the `DiscoveryCache` of ``plugins_dirs``, or None if both ``discovery_cache`` and
+        ``failure_cache`` are disabled.
+        """
+        if not self.discovery_cache and not self.failure_cache:
+            return None
+        from hookman.discovery_cache import DiscoveryCache
+
+        return DiscoveryCache(
+            self._plugin_roots(),
+            self.hooks_available,
+            cache_plugins=self.discovery_cache,
+            cache_failures=self.failure_cache,
+        )
+
+    def clear_failure_cache(self) -> None:
+        """
+        Forget the plugins that failed to load stored by ``failure_cache``, so they are probed
+        again on the next discovery (for instance after installing a missing dependency).
+        """
+        from hookman.discovery_cache import DiscoveryCache
+
+        cache = DiscoveryCache(self._plugin_roots(), self.hooks_available)
+        cache.clear_failures()
+        cache.save(prune=False)
+
+    def get_plugins_available(
+        self, ignored_plugins: Sequence[str] = (), *, max_workers: int = 1
+    ) -> Sequence[PluginInfo]:
         """
         Return a list of :ref:`plugin-info-api-section` that are available on ``plugins_dirs``
 
@@ -274,12 +897,21 @@ class HookMan:
         instead of the plugin caption.
 
         Plugins whose DLL fails to load are silently skipped with a warning logged.
-        Use `get_plugins_available_and_failures` to receive the failure details.
+        Use `get_plugins_available_and_failures` to receive the failure details, and for the
+        description of ``max_workers``.
         """
-        plugins, _failures = self.get_plugins_available_and_failures(ignored_plugins)
+        plugins, _failures = self.get_plugins_available_and_failures(
+            ignored_plugins, max_workers=max_workers
+        )
         return plugins
 
-    def get_hook_caller(self, ignored_plugins: Sequence[str] = ()) -> HookCaller:
+    def get_hook_caller(
+        self,
+        ignored_plugins: Sequence[str] = (),
+        *,
+        max_workers: int = 1,
+        load_reports: list[PluginLoadReport] | None = None,
+    ) -> "HookCaller":
         """
         Return a HookCaller class that holds all references for the functions implemented
         on the plugins.
@@ -290,11 +922,274 @@ class HookMan:
         Plugins whose DLL fails to load are silently skipped with a warning logged — they
         do not raise an exception here. Use `get_plugins_available_and_failures` to
         inspect load failures.
+
+        Each shared library is mapped and initialized only once: the library loaded to probe
+        the plugin is kept loaded until the ``HookCaller`` loads it, which then only increments
+        its reference count.
+
+        The ``HookCaller`` is created on the first call, and the same object is returned by the
+        following calls with the same ``ignored_plugins``, regardless of their order, until
+        `install_plugin` or `remove_plugin` is called. Call `refresh` to update the returned
+        ``HookCaller`` objects after plugins are installed, removed or changed by other means.
+
+        :param max_workers:
+            Number of threads used to probe the plugins, see `get_plugins_available_and_failures`.
+
+        :param load_reports:
+            If given and the ``HookCaller`` is created by this call, a `PluginLoadReport` for
+            each plugin that loaded or failed is appended to it, see
+            `get_plugins_available_and_failures`. The reports of the loaded plugins include the
+            time loading them into the ``HookCaller``. Nothing is appended when an existing
+            ``HookCaller`` is returned, as no plugin is loaded.
         """
-        assert self.specs.pyd_name is not None, f"Specs {self.specs!r}.pyd_name must be set"
-        _hookman = __import__(self.specs.pyd_name)
-        hook_caller = _hookman.HookCaller()
-        for plugin in self.get_plugins_available(ignored_plugins):
-            with change_path_env(str(plugin.shared_lib_path)):
-                hook_caller.load_impls_from_library(str(plugin.shared_lib_path), plugin.id)
+        key = frozenset(ignored_plugins)
+        state = self._hook_callers.get(key)
+        if state is None:
+            assert self.specs.pyd_name is not None, f"Specs {self.specs!r}.pyd_name must be set"
+            _hookman = __import__(self.specs.pyd_name)
+            state = _HookCallerState(_hookman.HookCaller(), ignored_plugins=tuple(ignored_plugins))
+            reports: list[PluginLoadReport] = []
+            with SharedLibSession() as session:
+                plugins, failures = self._discover(
+                    ignored_plugins, max_workers, session, load_reports=reports
+                )
+                load_impls_seconds = state.load(plugins)
+                state.record_failures(failures)
+            self._hook_callers[key] = state
+            if load_reports is not None:
+                load_reports += (
+                    replace(report, load_impls_seconds=load_impls_seconds[report.yaml_location])
+                    if report.yaml_location in load_impls_seconds
+                    else report
+                    for report in reports
+                )
+        hook_caller: HookCaller = state.hook_caller
         return hook_caller
+
+    def refresh(self, *, max_workers: int = 1) -> None:
+        """
+        Update the ``HookCaller`` objects returned by `get_hook_caller` to the plugins currently
+        found on ``plugins_dirs``.
+
+        Only the plugins added or changed since the ``HookCaller`` was created (or last
+        refreshed) are probed and loaded (so the plugins that failed to load are only probed
+        again once their files change), their implementations being appended after the ones
+        already loaded. The implementations of the plugins removed or changed are dropped and
+        their shared libraries released, so functions previously obtained from those plugins
+        must not be called anymore.
+
+        :param max_workers:
+            Number of threads used to probe the plugins, see `get_plugins_available_and_failures`.
+        """
+        # Release the stale libraries of all the HookCallers before probing, otherwise loading a
+        # changed library would return the old one, still loaded by the HookCaller.
+        to_probe = {}
+        for key, state in self._hook_callers.items():
+            plugin_files, indexed_configs = self._find_plugins(state.ignored_plugins)
+            if self.plugin_resolution != "all":
+                # Also removes the plugins superseded by the ones added.
+                candidates = self._select_candidates(
+                    plugin_files,
+                    [None] * len(plugin_files),
+                    [indexed_configs.get(plugin_file) for plugin_file in plugin_files],
+                    state.ignored_plugins,
+                )
+                plugin_files = [candidate.yaml_location for candidate in candidates]
+            to_probe[key] = state.remove_stale(plugin_files)
+
+        # A single session, so the library of a plugin added to several HookCallers is only
+        # opened once, even though the plugin is probed for each of them.
+        with SharedLibSession() as session:
+            for key, state in self._hook_callers.items():
+                if not to_probe[key]:
+                    continue
+                plugins, failures = self._discover(
+                    state.ignored_plugins, max_workers, session, to_probe[key]
+                )
+                state.load(plugins)
+                state.record_failures(failures)
+
+
+class _HookCallerState:
+    """
+    A ``HookCaller`` kept by `HookMan.get_hook_caller`, with the plugins loaded into it.
+    """
+
+    def __init__(self, hook_caller: Any, *, ignored_plugins: tuple[str, ...]) -> None:
+        # The HookCaller class of the pyd generated for the specs.
+        self.hook_caller = hook_caller
+        self.ignored_plugins = ignored_plugins
+        self.loaded: dict[Path, _LoadedPlugin] = {}
+        # The plugins that failed to load, only probed again once their files change.
+        self.failed: dict[Path, _LoadedPlugin] = {}
+
+    def load(self, plugins: Iterable[PluginInfo]) -> dict[Path, float]:
+        """
+        Load the implementations of the given plugins into the ``HookCaller``.
+
+        :returns:
+            The time in seconds loading each plugin, by its ``yaml_location``.
+        """
+        load_times = {}
+        for plugin in plugins:
+            # Fingerprint before loading, so a library replaced meanwhile is reloaded on refresh.
+            loaded_plugin = _LoadedPlugin.create(
+                plugin.id, plugin.yaml_location, plugin.shared_lib_path
+            )
+            start = time.perf_counter()
+            with change_path_env(str(plugin.shared_lib_path)):
+                self.hook_caller.load_impls_from_library(str(plugin.shared_lib_path), plugin.id)
+            load_times[plugin.yaml_location] = time.perf_counter() - start
+            self.loaded[plugin.yaml_location] = loaded_plugin
+        return load_times
+
+    def record_failures(self, failures: Iterable[PluginLoadFailure]) -> None:
+        """
+        Record the plugins that failed to load, so `remove_stale` does not return them again
+        while their files are unchanged.
+        """
+        for failure in failures:
+            self.failed[failure.yaml_location] = _LoadedPlugin.create(
+                failure.plugin_id,
+                failure.yaml_location,
+                _shared_lib_path(failure.yaml_location, failure.plugin_id),
+            )
+
+    def remove_stale(self, plugin_files: Sequence[Path]) -> list[Path]:
+        """
+        Remove from the ``HookCaller`` the plugins that are no longer among ``plugin_files``, or
+        whose files changed since they were loaded.
+
+        As implementations are removed by plugin id, the other plugins loaded with the id of a
+        stale plugin are removed as well.
+
+        The plugins that failed to load are forgotten once they are removed or changed.
+
+        :returns:
+            The files of the plugins that need to be loaded: the new ones, the changed ones and
+            the ones removed together with a stale plugin. Unchanged failed plugins are not
+            included.
+        """
+        found = set(plugin_files)
+        stale_ids = {
+            loaded_plugin.plugin_id
+            for yaml_location, loaded_plugin in self.loaded.items()
+            if yaml_location not in found or not loaded_plugin.is_current(yaml_location)
+        }
+        for plugin_id in stale_ids:
+            self.hook_caller.remove_impls(plugin_id)
+        self.loaded = {
+            yaml_location: loaded_plugin
+            for yaml_location, loaded_plugin in self.loaded.items()
+            if loaded_plugin.plugin_id not in stale_ids
+        }
+        self.failed = {
+            yaml_location: failed_plugin
+            for yaml_location, failed_plugin in self.failed.items()
+            if yaml_location in found and failed_plugin.is_current(yaml_location)
+        }
+        return [
+            plugin_file
+            for plugin_file in plugin_files
+            if plugin_file not in self.loaded and plugin_file not in self.failed
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class _LoadedPlugin:
+    """
+    A plugin loaded into a ``HookCaller`` (or that failed to load), with the state of its files
+    when it was loaded.
+    """
+
+    plugin_id: str
+    shared_lib_path: Path
+    fingerprints: tuple[hookman_utils.FileFingerprint | None, hookman_utils.FileFingerprint | None]
+
+    @classmethod
+    def create(cls, plugin_id: str, yaml_location: Path, shared_lib_path: Path) -> "_LoadedPlugin":
+        return cls(plugin_id, shared_lib_path, cls._fingerprints(yaml_location, shared_lib_path))
+
+    @staticmethod
+    def _fingerprints(
+        yaml_location: Path, shared_lib_path: Path
+    ) -> tuple[hookman_utils.FileFingerprint | None, hookman_utils.FileFingerprint | None]:
+        return (
+            hookman_utils.file_fingerprint(yaml_location),
+            hookman_utils.file_fingerprint(shared_lib_path),
+        )
+
+    def is_current(self, yaml_location: Path) -> bool:
+        """
+        Return True if the plugin files did not change since the plugin was loaded.
+        """
+        return self.fingerprints == self._fingerprints(yaml_location, self.shared_lib_path)
+
+
+@dataclass(frozen=True)
+class _PluginCandidate:
+    """A plugin found during discovery, before its shared library is loaded."""
+
+    yaml_location: Path
+    plugin_id: str
+
+    config: dict[str, Any] | None
+    """The parsed plugin.yaml, passed to `PluginInfo` so the file is parsed only once."""
+
+    cached_plugin: PluginInfo | None
+    """The plugin served by the discovery cache, if any (then the yaml is not parsed at all)."""
+
+    parse_seconds: float = 0.0
+    """Time parsing the plugin.yaml."""
+
+    @classmethod
+    def create(
+        cls,
+        yaml_location: Path,
+        cached_plugin: PluginInfo | None,
+        config: dict[str, Any] | None = None,
+    ) -> "_PluginCandidate":
+        if cached_plugin is not None:
+            return cls(yaml_location, cached_plugin.id, None, cached_plugin)
+        if config is not None:
+            return cls(yaml_location, str(config["id"]), config, None)
+        start = time.perf_counter()
+        config = PluginInfo.read_config_file(yaml_location)
+        parse_seconds = time.perf_counter() - start
+        return cls(yaml_location, str(config["id"]), config, None, parse_seconds)
+
+
+def _shared_lib_path(yaml_location: Path, plugin_id: str) -> Path:
+    return PluginInfo._shared_lib_path(yaml_location, PluginInfo._shared_lib_name(plugin_id))
+
+
+def _file_size(path: Path) -> int | None:
+    fingerprint = hookman_utils.file_fingerprint(path)
+    return fingerprint[1] if fingerprint is not None else None
+
+
+@contextmanager
+def _probing_imap(max_workers: int) -> Iterator[Callable[..., Iterator]]:
+    """
+    Yield a ``map``-like function that returns an iterator with the results in the order of the
+    inputs, evaluated by a pool of ``max_workers`` threads, or lazily in the calling thread when
+    ``max_workers`` is 1. The calls still pending when the context exits are cancelled.
+    """
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+    if max_workers == 1:
+        yield map
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def probing_imap(function: Callable, *iterables: Iterable) -> Iterator:
+        futures = [executor.submit(function, *args) for args in zip(*iterables)]
+        return (future.result() for future in futures)
+
+    try:
+        yield probing_imap
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,43 +1,279 @@
-import ctypes
 import sys
+from collections.abc import Iterable
+from collections.abc import Iterator
 from collections.abc import Sequence
+from contextlib import suppress
+from dataclasses import InitVar
 from dataclasses import dataclass
 from dataclasses import field
+from functools import cache
 from pathlib import Path
-from zipfile import ZipFile
-
-from packaging.version import Version
-from strictyaml import Map
-from strictyaml import MapPattern
-from strictyaml import Optional
-from strictyaml import Str
-from strictyaml import YAML
-from strictyaml import YAMLValidationError
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import ClassVar
+from typing import overload
 
+from hookman.exceptions import SharedLibraryLoadError
 from hookman.exceptions import SharedLibraryNotFoundError
+from hookman.hookman_utils import SharedLibSession
 from hookman.hookman_utils import load_shared_lib
 
-PLUGIN_CONFIG_SCHEMA = Map(
-    {
-        "caption": Str(),
-        "version": Str(),
-        "author": Str(),
-        "email": Str(),
-        "id": Str(),
-        Optional("requirements"): MapPattern(Str(), Str()),
-        Optional("extras"): MapPattern(Str(), Str()),
-    }
-)
+if TYPE_CHECKING:
+    import ctypes
+    from zipfile import ZipFile
+
+    from packaging.version import Version
+    from strictyaml import Map
+
+    PLUGIN_CONFIG_SCHEMA: Map
+
+
+@cache
+def _plugin_config_schema() -> "Map":
+    # strictyaml is slow to import, so the schema is only created when first needed.
+    from strictyaml import Map
+    from strictyaml import MapPattern
+    from strictyaml import Optional
+    from strictyaml import Str
+
+    return Map(
+        {
+            "caption": Str(),
+            "version": Str(),
+            "author": Str(),
+            "email": Str(),
+            "id": Str(),
+            Optional("requirements"): MapPattern(Str(), Str()),
+            Optional("extras"): MapPattern(Str(), Str()),
+        }
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name == "PLUGIN_CONFIG_SCHEMA":
+        return _plugin_config_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_REQUIRED_CONFIG_KEYS = frozenset({"caption", "version", "author", "email", "id"})
+_OPTIONAL_CONFIG_MAP_KEYS = frozenset({"requirements", "extras"})
+_PLAIN_SCALAR_FORBIDDEN_START = frozenset("-?:,[]{}#&*!|>'\"%@`")
+
+
+def _parse_config_scalar(text: str) -> str | None:
+    """
+    Parse a single line YAML scalar (plain, single or double quoted without escapes), returning
+    None if it uses any other YAML feature.
+    """
+    text = text.strip(" ")
+    if not text:
+        return None
+    if text[0] == "'":
+        inner = text[1:-1]
+        if len(text) < 2 or text[-1] != "'" or "'" in inner.replace("''", ""):
+            return None
+        return inner.replace("''", "'")
+    if text[0] == '"':
+        inner = text[1:-1]
+        if len(text) < 2 or text[-1] != '"' or '"' in inner or "\\" in inner:
+            return None
+        return inner
+    if text[0] in _PLAIN_SCALAR_FORBIDDEN_START or " #" in text:
+        return None
+    # A colon followed by a space, a tab or the end of the text starts a mapping.
+    if ": " in text or ":\t" in text or text.endswith(":"):
+        return None
+    return text
+
+
+def _fast_load_plugin_config(yaml_content: str) -> dict[str, Any] | None:
+    """
+    Parse the contents of a plugin.yaml file that follows `PLUGIN_CONFIG_SCHEMA`, using only the
+    simple subset of YAML written by hookman (one ``key: value`` per line and the indented
+    ``requirements`` and ``extras`` maps).
+
+    Returns None for anything outside of that subset or not following the schema, so the
+    caller falls back to the full (and much slower) strictyaml parser, which also produces the
+    validation errors.
+    """
+    if "\t" in yaml_content:
+        return None
+
+    result: dict[str, Any] = {}
+    nested: dict[str, str] | None = None
+    nested_indent = 0
+    for line in yaml_content.splitlines():
+        stripped = line.strip(" ")
+        if not stripped or stripped.startswith("#"):
+            continue
+        key_text, separator, value_text = stripped.partition(":")
+        if not separator or (value_text and value_text[0] != " "):
+            return None
+        key = _parse_config_scalar(key_text)
+        if key is None:
+            return None
+
+        indent = len(line) - len(line.lstrip(" "))
+        if indent == 0:
+            if key in result:
+                return None
+            if value_text.strip(" "):
+                nested = None
+                value = _parse_config_scalar(value_text)
+                if value is None:
+                    return None
+                result[key] = value
+            else:
+                nested = result[key] = {}
+        else:
+            # strictyaml requires the same indentation for all the nested maps.
+            if nested is None or key in nested or nested_indent not in (0, indent):
+                return None
+            nested_indent = indent
+            value = _parse_config_scalar(value_text)
+            if value is None:
+                return None
+            nested[key] = value
+
+    keys = result.keys()
+    if (
+        not _REQUIRED_CONFIG_KEYS <= keys
+        or keys - _REQUIRED_CONFIG_KEYS - _OPTIONAL_CONFIG_MAP_KEYS
+    ):
+        return None
+    if any(not isinstance(result[key], str) for key in _REQUIRED_CONFIG_KEYS):
+        return None
+    if any(
+        not isinstance(result[key], dict) or not result[key]
+        for key in keys & _OPTIONAL_CONFIG_MAP_KEYS
+    ):
+        return None
+    return result
+
+
+class HooksImplemented(Sequence[str]):
+    """
+    Immutable sequence with the names of the hooks implemented by a plugin, stored as a bitmask
+    over the names of the hooks available (which are shared by all the plugins), instead of a
+    list of strings per plugin.
+
+    It compares equal to any other sequence with the same names in the same order, for instance
+    ``plugin.hooks_implemented == ["friction_factor"]``, and can be concatenated with lists. It is
+    not a `list` though: use ``list(plugin.hooks_implemented)`` to serialize it to JSON.
+    """
+
+    __slots__ = ("_hook_names", "_mask")
+
+    # The hook names of each specs, shared by all the plugins. Bounded in case specs are created
+    # dynamically, the names of the specs not stored here are kept by each instance.
+    _shared_hook_names: ClassVar[dict[tuple[str, ...], tuple[str, ...]]] = {}
+    _MAX_SHARED_HOOK_NAMES: ClassVar[int] = 64
+
+    def __init__(self, hook_names: Iterable[str], implemented: Iterable[str]) -> None:
+        names = tuple(sys.intern(name) for name in hook_names)
+        shared_names = self._shared_hook_names.get(names)
+        if shared_names is None:
+            shared_names = names
+            if len(self._shared_hook_names) < self._MAX_SHARED_HOOK_NAMES:
+                self._shared_hook_names[names] = names
+        self._hook_names = shared_names
+        implemented = set(implemented)
+        self._mask = sum(
+            1 << index for index, name in enumerate(self._hook_names) if name in implemented
+        )
+
+    @property
+    def hook_names(self) -> tuple[str, ...]:
+        """The names of all the hooks available, in the order of the bits of `mask`."""
+        return self._hook_names
+
+    @property
+    def mask(self) -> int:
+        """Bitmask of the hooks implemented, bit ``i`` standing for ``hook_names[i]``."""
+        return self._mask
+
+    def _names(self) -> list[str]:
+        return [name for index, name in enumerate(self._hook_names) if self._mask >> index & 1]
+
+    def __len__(self) -> int:
+        return self._mask.bit_count()
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        return self._names()[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names())
+
+    def __contains__(self, name: object) -> bool:
+        try:
+            index = self._hook_names.index(name)  # type:ignore[arg-type]
+        except ValueError:
+            return False
+        return bool(self._mask >> index & 1)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, HooksImplemented):
+            if self._hook_names is other._hook_names:
+                return self._mask == other._mask
+            return self._names() == other._names()
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return self._names() == list(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self._names()))
+
+    def __add__(self, other: Iterable[str]) -> list[str]:
+        return self._names() + list(other)
+
+    def __radd__(self, other: Iterable[str]) -> list[str]:
+        return list(other) + self._names()
+
+    def __repr__(self) -> str:
+        return repr(self._names())
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self._hook_names, self._names())
 
 
-@dataclass
+@dataclass(slots=True)
 class PluginInfo:
     """
     Class that holds all information related to the plugin with some auxiliary methods
+
+    The shared library of the plugin is loaded to check its id and which hooks it implements;
+    if ``shared_lib_session`` is given, the library is loaded through it and kept loaded until
+    the session is closed, see `SharedLibSession`.
+
+    If ``static_inspection`` is True, on Linux the shared library is not loaded at all: the hooks
+    implemented are read from its dynamic symbol table, see `read_exported_symbols`, and the
+    plugin id is taken from plugin.yaml (the name of the library is derived from it) after
+    checking that the library exports ``get_plugin_id``. It has no effect on Windows.
+
+    The ``plugin_config`` argument allows to pass the contents of ``yaml_location`` already
+    parsed with `read_config_file`, so the file is not parsed again.
+
+    The fields in `LAZY_FIELDS` (``description``, read from the ``README.md`` file) are only read
+    from the plugin files when first accessed, and can be released with `release_lazy_fields`.
+    Accessing them raises `AttributeError` if the plugin files can no longer be read.
+
+    Instances use ``__slots__`` to keep large plugin catalogs small: ``author``, ``email`` and
+    ``caption`` are interned, and ``hooks_implemented`` is a `HooksImplemented` bitmask.
     """
 
+    LAZY_FIELDS = ("description",)
+
     yaml_location: Path
     hooks_available: dict | None = None
+    shared_lib_session: InitVar[SharedLibSession | None] = None
+    plugin_config: InitVar[dict[str, Any] | None] = None
+    static_inspection: InitVar[bool] = False
 
     description: str = field(init=False)
     author: str = field(init=False)
@@ -46,40 +282,144 @@ class PluginInfo:
     caption: str = field(init=False)
     shared_lib_name: str = field(init=False)
     shared_lib_path: Path = field(init=False)
-    version: Version = field(init=False)
+    version: "Version" = field(init=False)
     requirements: dict[str, str] = field(init=False)
     extras: dict = field(init=False)
     id: str = field(init=False)
 
-    def __post_init__(self) -> None:
-        plugin_config_file_content = self._load_yaml_file(
-            self.yaml_location.read_text(encoding="utf-8")
+    def __post_init__(
+        self,
+        shared_lib_session: SharedLibSession | None,
+        plugin_config: dict[str, Any] | None,
+        static_inspection: bool,
+    ) -> None:
+        plugin_config_file_content = (
+            plugin_config
+            if plugin_config is not None
+            else self.read_config_file(self.yaml_location)
         )
 
-        name = plugin_config_file_content["id"]
-        shared_lib_name = f"{name}.dll" if sys.platform == "win32" else f"lib{name}.so"
+        self.shared_lib_name = self._shared_lib_name(plugin_config_file_content["id"])
+        self.shared_lib_path = self._shared_lib_path(self.yaml_location, self.shared_lib_name)
+        self.author = sys.intern(plugin_config_file_content["author"])
+        self.caption = sys.intern(plugin_config_file_content["caption"])
+        self.email = sys.intern(plugin_config_file_content["email"])
+        from packaging.version import Version
 
-        self.shared_lib_name = shared_lib_name
-        self.shared_lib_path = self.yaml_location.parents[1] / "artifacts" / shared_lib_name
-        self.author = plugin_config_file_content["author"]
-        self.caption = plugin_config_file_content["caption"]
-        self.email = plugin_config_file_content["email"]
         self.version = Version(plugin_config_file_content["version"])
         self.requirements = plugin_config_file_content.get("requirements", {})
         self.extras = plugin_config_file_content.get("extras", {})
 
+        exported_symbols = (
+            self._read_exported_symbols() if static_inspection and sys.platform != "win32" else None
+        )
+
         # The id bellow guarantee to me that the id to be used in the application was not changed by a config file.
-        self.id = self._get_plugin_id_from_dll(plugin_config_file_content["id"])
+        self.id = self._get_plugin_id_from_dll(
+            plugin_config_file_content["id"], shared_lib_session, exported_symbols
+        )
+
+        if self.hooks_available is not None:
+            self.hooks_implemented = self._get_hooks_implemented(
+                shared_lib_session, exported_symbols
+            )
+
+    if not TYPE_CHECKING:
+        # Hidden from type checkers, otherwise any attribute access would be accepted.
+
+        def __getattr__(self, name: str) -> Any:
+            """
+            Load the lazy fields on first access, see `LAZY_FIELDS`.
+            """
+            if name not in PluginInfo.LAZY_FIELDS:
+                raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+            try:
+                value = self._load_lazy_field(name)
+            except (OSError, ValueError) as error:
+                # The plugin files were removed or changed since the plugin was found.
+                raise AttributeError(
+                    f"Could not read the {name} of the plugin at '{self.yaml_location}': {error}"
+                ) from error
+            setattr(self, name, value)
+            return value
 
+    def _load_lazy_field(self, name: str) -> Any:
+        assert name == "description", name
         readme_file = self.yaml_location.parent / "README.md"
-        self.description = (
+        return (
             readme_file.read_text(encoding="utf-8")
             if readme_file.is_file()
             else "Could not find a description"
         )
 
-        if self.hooks_available is not None:
-            self.hooks_implemented = self._get_hooks_implemented()
+    def release_lazy_fields(self) -> None:
+        """
+        Release the memory used by the lazy fields (see `LAZY_FIELDS`) loaded so far, they are
+        read again from the plugin files if accessed later.
+        """
+        for name in self.LAZY_FIELDS:
+            with suppress(AttributeError):
+                delattr(self, name)
+
+    _RESOLVED_FIELDS = (
+        "author",
+        "email",
+        "hooks_implemented",
+        "caption",
+        "shared_lib_name",
+        "shared_lib_path",
+        "version",
+        "requirements",
+        "extras",
+        "id",
+    )
+
+    def _resolved_fields(self) -> dict[str, Any]:
+        """
+        Return the fields computed from the plugin files as JSON compatible values,
+        see `_from_resolved_fields`. The lazy fields are not included.
+        """
+        fields = {
+            name: getattr(self, name) for name in self._RESOLVED_FIELDS if hasattr(self, name)
+        }
+        fields["shared_lib_path"] = str(self.shared_lib_path)
+        fields["version"] = str(self.version)
+        if "hooks_implemented" in fields:
+            fields["hooks_implemented"] = list(fields["hooks_implemented"])
+        return fields
+
+    @classmethod
+    def _from_resolved_fields(
+        cls, yaml_location: Path, hooks_available: dict | None, fields: dict[str, Any]
+    ) -> "PluginInfo":
+        """
+        Create a PluginInfo from the fields returned by `_resolved_fields`, without reading
+        any of the plugin files or loading its shared library.
+        """
+        plugin_info = cls.__new__(cls)
+        plugin_info.yaml_location = yaml_location
+        plugin_info.hooks_available = hooks_available
+        for name, value in fields.items():
+            setattr(plugin_info, name, value)
+        for name in ("author", "caption", "email"):
+            setattr(plugin_info, name, sys.intern(fields[name]))
+        plugin_info.shared_lib_path = Path(fields["shared_lib_path"])
+        from packaging.version import Version
+
+        plugin_info.version = Version(fields["version"])
+        if hooks_available is not None and "hooks_implemented" in fields:
+            plugin_info.hooks_implemented = HooksImplemented(
+                hooks_available, fields["hooks_implemented"]
+            )
+        return plugin_info
+
+    @staticmethod
+    def _shared_lib_name(plugin_id: str) -> str:
+        return f"{plugin_id}.dll" if sys.platform == "win32" else f"lib{plugin_id}.so"
+
+    @staticmethod
+    def _shared_lib_path(yaml_location: Path, shared_lib_name: str) -> Path:
+        return yaml_location.parents[1] / "artifacts" / shared_lib_name
 
     def _check_if_shared_lib_exists(self) -> None:
         if not self.shared_lib_path.is_file():
@@ -87,9 +427,32 @@ class PluginInfo:
                 f"{self.shared_lib_name} could not be found in {self.shared_lib_path.parent}"
             )
 
-    def _get_plugin_id_from_dll(self, plugin_id_from_plugin_yaml: str) -> str:
+    def _read_exported_symbols(self) -> frozenset[str]:
+        from hookman.elf_symbols import read_exported_symbols
+
         self._check_if_shared_lib_exists()
-        with load_shared_lib(str(self.shared_lib_path)) as plugin_dll:
+        try:
+            return read_exported_symbols(self.shared_lib_path)
+        except (OSError, ValueError) as error:
+            raise SharedLibraryLoadError(self.shared_lib_path, str(error)) from error
+
+    def _get_plugin_id_from_dll(
+        self,
+        plugin_id_from_plugin_yaml: str,
+        session: SharedLibSession | None = None,
+        exported_symbols: frozenset[str] | None = None,
+    ) -> str:
+        self._check_if_shared_lib_exists()
+        if exported_symbols is not None:
+            if "get_plugin_id" not in exported_symbols:
+                raise SharedLibraryLoadError(
+                    self.shared_lib_path, "get_plugin_id is not exported by the library"
+                )
+            return plugin_id_from_plugin_yaml
+
+        with load_shared_lib(str(self.shared_lib_path), session) as plugin_dll:
+            import ctypes
+
             plugin_dll.get_plugin_id.restype = ctypes.c_char_p
             plugin_id_from_shared_lib = str(plugin_dll.get_plugin_id().decode("UTF-8"))
             if plugin_id_from_shared_lib != plugin_id_from_plugin_yaml:
@@ -100,7 +463,11 @@ class PluginInfo:
                 raise RuntimeError(msg)
             return plugin_id_from_shared_lib
 
-    def _get_hooks_implemented(self) -> Sequence[str]:
+    def _get_hooks_implemented(
+        self,
+        session: SharedLibSession | None = None,
+        exported_symbols: frozenset[str] | None = None,
+    ) -> Sequence[str]:
         """
         Return a list of which hooks from "hooks_available" the shared library implements
         """
@@ -108,22 +475,44 @@ class PluginInfo:
         if self.hooks_available is None:
             return []
 
-        with load_shared_lib(str(self.shared_lib_path)) as plugin_dll:
-            hooks_implemented = [
-                hook_name
-                for hook_name, full_hook_name in self.hooks_available.items()
-                if PluginInfo.is_implemented_on_plugin(plugin_dll, full_hook_name)
-            ]
+        if exported_symbols is not None:
+            return HooksImplemented(
+                self.hooks_available,
+                (
+                    hook_name
+                    for hook_name, full_hook_name in self.hooks_available.items()
+                    if full_hook_name in exported_symbols
+                ),
+            )
+
+        with load_shared_lib(str(self.shared_lib_path), session) as plugin_dll:
+            hooks_implemented = HooksImplemented(
+                self.hooks_available,
+                (
+                    hook_name
+                    for hook_name, full_hook_name in self.hooks_available.items()
+                    if PluginInfo.is_implemented_on_plugin(plugin_dll, full_hook_name)
+                ),
+            )
         return hooks_implemented
 
     @classmethod
     def parse_id(cls, yaml_location: Path) -> str:
         """Read the plugin id from the YAML config file without loading the shared library."""
-        content = cls._load_yaml_file(yaml_location.read_text(encoding="utf-8"))
+        content = cls.read_config_file(yaml_location)
         return str(content["id"])
 
     @classmethod
-    def is_implemented_on_plugin(cls, plugin_dll: ctypes.CDLL, hook_name: str) -> bool:
+    def read_config_file(cls, yaml_location: Path) -> dict[str, Any]:
+        """
+        Read and validate the given plugin.yaml file against `PLUGIN_CONFIG_SCHEMA`.
+
+        :raises ValueError: If the file does not follow the schema.
+        """
+        return cls._load_yaml_file(yaml_location.read_text(encoding="utf-8"))
+
+    @classmethod
+    def is_implemented_on_plugin(cls, plugin_dll: "ctypes.CDLL", hook_name: str) -> bool:
         """
         Check if the given function name is available on the plugin_dll informed
 
@@ -138,18 +527,10 @@ class PluginInfo:
         return True
 
     @classmethod
-    def _load_yaml_file(cls, yaml_content: str) -> YAML:
-        import strictyaml
-
-        try:
-            plugin_config_file_content = strictyaml.load(yaml_content, PLUGIN_CONFIG_SCHEMA).data
-        except YAMLValidationError:
-            current_plugin_schema = "\n".join(
-                f"{key} : {value}" for key, value in PLUGIN_CONFIG_SCHEMA._validator.items()
-            )
-            raise ValueError(
-                f"The plugin.yaml does not follow the PLUGIN_CONFIG_SCHEMA: {current_plugin_schema}"
-            )
+    def _load_yaml_file(cls, yaml_content: str) -> dict[str, Any]:
+        plugin_config_file_content = _fast_load_plugin_config(yaml_content)
+        if plugin_config_file_content is None:
+            plugin_config_file_content = cls._strict_load_yaml_file(yaml_content)
 
         if sys.platform == "win32":
             plugin_config_file_content["shared_lib_name"] = (
@@ -162,7 +543,23 @@ class PluginInfo:
         return plugin_config_file_content
 
     @classmethod
-    def validate_plugin_file(cls, plugin_file_zip: ZipFile) -> None:
+    def _strict_load_yaml_file(cls, yaml_content: str) -> dict[str, Any]:
+        import strictyaml
+
+        schema = _plugin_config_schema()
+        try:
+            plugin_config_file_content: dict[str, Any] = strictyaml.load(yaml_content, schema).data
+        except strictyaml.YAMLValidationError:
+            current_plugin_schema = "\n".join(
+                f"{key} : {value}" for key, value in schema._validator.items()
+            )
+            raise ValueError(
+                f"The plugin.yaml does not follow the PLUGIN_CONFIG_SCHEMA: {current_plugin_schema}"
+            )
+        return plugin_config_file_content
+
+    @classmethod
+    def validate_plugin_file(cls, plugin_file_zip: "ZipFile") -> None:
         """
         Check if the given plugin_file is valid,
         currently the only check that this method do is to verify if the id is available
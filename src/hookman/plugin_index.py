@@ -0,0 +1,201 @@
+import json
+import os
+from collections.abc import Sequence
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from hookman import hookman_utils
+from hookman.hookman_utils import file_fingerprint
+from hookman.plugin_config import PluginInfo
+
+INDEX_FILE_NAME = ".hookman_index.json"
+"""Name of the index file written on the root of each plugin directory."""
+
+_INDEX_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class IndexedPlugin:
+    """An installed plugin, as recorded in a `PluginIndex`."""
+
+    dir_name: str
+    """Name of the plugin directory, relative to the plugin root."""
+
+    id: str
+    version: str
+
+    shared_lib_path: str
+    """Path of the shared library, relative to the plugin root."""
+
+    fingerprints: dict[str, Any]
+    """Fingerprints of the plugin files when the plugin was indexed, see `file_fingerprint`."""
+
+    config: dict[str, Any]
+    """The parsed ``plugin.yaml``, as returned by `PluginInfo.read_config_file`."""
+
+
+class PluginIndex:
+    """
+    Index of the plugins installed on a plugin root, backed by ``<root>/.hookman_index.json``.
+
+    The index records, for each plugin directory of the installation layout
+    (``<root>/<id>-<version>/assets/plugin.yaml``), the plugin id, version, directory, shared
+    library path, file fingerprints and parsed ``plugin.yaml``, so discovery can list the
+    plugins of the root reading a single file instead of walking the root and parsing each
+    ``plugin.yaml``.
+
+    `HookMan.install_plugin` and `HookMan.remove_plugin` keep the index up to date. Changes made
+    by other means (for instance copying a plugin directory by hand) are detected by
+    `is_fresh`, in which case discovery falls back to scanning the root.
+    """
+
+    def __init__(self, root: Path, plugins: dict[str, IndexedPlugin]) -> None:
+        self.root = root
+        self._plugins = plugins
+
+    @property
+    def index_file(self) -> Path:
+        return self.root / INDEX_FILE_NAME
+
+    def plugins(self) -> list[IndexedPlugin]:
+        """The indexed plugins, sorted by directory name."""
+        return [self._plugins[name] for name in sorted(self._plugins)]
+
+    def yaml_location(self, plugin: IndexedPlugin) -> Path:
+        """Return the absolute path of the ``plugin.yaml`` of the given plugin."""
+        return self.root / plugin.dir_name / "assets" / "plugin.yaml"
+
+    @classmethod
+    def load(cls, root: Path) -> "PluginIndex | None":
+        """
+        Load the index of the given root, or return None if it does not exist or is unreadable.
+        """
+        try:
+            content = json.loads((root / INDEX_FILE_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(content, dict) or content.get("format_version") != _INDEX_FORMAT_VERSION:
+            return None
+        try:
+            plugins = {
+                name: IndexedPlugin(dir_name=name, **entry)
+                for name, entry in content["plugins"].items()
+            }
+        except (KeyError, TypeError, AttributeError):
+            return None
+        return cls(root, plugins)
+
+    @classmethod
+    def build(cls, root: Path, *, ignored_sub_dir_names: Sequence[str] = ()) -> "PluginIndex":
+        """
+        Create the index of the given root by scanning it.
+
+        Plugins whose ``plugin.yaml`` is invalid are left out, so the index is not considered
+        fresh while they are installed and discovery keeps reporting their errors.
+        """
+        index = cls(root, {})
+        for yaml_location in hookman_utils.find_installed_config_files(
+            [root], ignored_sub_dir_names=ignored_sub_dir_names
+        ):
+            with suppress(ValueError, OSError):
+                index.add(yaml_location.parents[1].name)
+        return index
+
+    @classmethod
+    def load_or_build(
+        cls, root: Path, *, ignored_sub_dir_names: Sequence[str] = ()
+    ) -> "PluginIndex":
+        """
+        Return the index of the given root if it is fresh, otherwise build it by scanning the root.
+        """
+        index = cls.load(root)
+        if index is not None and index.is_fresh():
+            return index
+        return cls.build(root, ignored_sub_dir_names=ignored_sub_dir_names)
+
+    def is_fresh(self) -> bool:
+        """
+        Return whether the index still describes the plugins on the root: the sub directories of
+        the root (other than hidden ones, like the trash) must be the indexed plugin directories,
+        and their ``plugin.yaml`` files must be unchanged.
+
+        This costs a single listing of the root plus a ``stat`` per plugin.
+        """
+        try:
+            with os.scandir(self.root) as entries:
+                dir_names = {
+                    entry.name
+                    for entry in entries
+                    if not entry.name.startswith(".") and entry.is_dir()
+                }
+        except OSError:
+            return False
+        if dir_names != self._plugins.keys():
+            return False
+        for plugin in self._plugins.values():
+            fingerprint = file_fingerprint(self.yaml_location(plugin))
+            if _json_fingerprint(fingerprint) != plugin.fingerprints["plugin.yaml"]:
+                return False
+        return True
+
+    def add(self, dir_name: str) -> None:
+        """
+        Add (or replace) the entry of the plugin installed on ``<root>/<dir_name>``.
+
+        :raises ValueError: If the plugin.yaml of the plugin does not follow the schema.
+        """
+        yaml_location = self.root / dir_name / "assets" / "plugin.yaml"
+        config = PluginInfo.read_config_file(yaml_location)
+        shared_lib_path = Path(dir_name, "artifacts", config["shared_lib_name"])
+        fingerprints = {
+            "plugin.yaml": file_fingerprint(yaml_location),
+            "README.md": file_fingerprint(yaml_location.parent / "README.md"),
+            "shared_lib": file_fingerprint(self.root / shared_lib_path),
+        }
+        self._plugins[dir_name] = IndexedPlugin(
+            dir_name=dir_name,
+            id=str(config["id"]),
+            version=str(config["version"]),
+            shared_lib_path=shared_lib_path.as_posix(),
+            fingerprints={key: _json_fingerprint(value) for key, value in fingerprints.items()},
+            config=config,
+        )
+
+    def remove(self, dir_name: str) -> None:
+        """
+        Remove the entry of the plugin installed on ``<root>/<dir_name>``, if any.
+        """
+        self._plugins.pop(dir_name, None)
+
+    def save(self) -> None:
+        """
+        Write the index file atomically.
+
+        Any error writing it (for instance a read-only plugin directory) is ignored: discovery
+        falls back to scanning roots without a fresh index.
+        """
+        content = {
+            "format_version": _INDEX_FORMAT_VERSION,
+            "plugins": {
+                plugin.dir_name: {
+                    "id": plugin.id,
+                    "version": plugin.version,
+                    "shared_lib_path": plugin.shared_lib_path,
+                    "fingerprints": plugin.fingerprints,
+                    "config": plugin.config,
+                }
+                for plugin in self.plugins()
+            },
+        }
+        tmp_file = self.index_file.with_name(f"{INDEX_FILE_NAME}.{os.getpid()}.tmp")
+        with suppress(OSError):
+            tmp_file.write_text(json.dumps(content, indent=1), encoding="utf-8")
+            os.replace(tmp_file, self.index_file)
+        with suppress(OSError):
+            tmp_file.unlink(missing_ok=True)
+
+
+def _json_fingerprint(fingerprint: tuple[int, int, int] | None) -> list[int] | None:
+    return list(fingerprint) if fingerprint is not None else None
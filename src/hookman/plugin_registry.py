@@ -0,0 +1,124 @@
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+from typing import overload
+
+from hookman.plugin_config import HooksImplemented
+from hookman.plugin_config import PluginInfo
+
+if TYPE_CHECKING:
+    from packaging.version import Version
+
+
+class PluginRegistry(Sequence[PluginInfo]):
+    """
+    The plugins found by discovery (see `HookMan.get_plugin_registry`), in the discovery order,
+    indexed to answer in constant time which plugins have a given id, a given id and version,
+    or implement a given hook.
+
+    Each plugin also has a bitmask of the hooks it implements (see `hook_bit` and `masks`),
+    bit ``i`` standing for ``hook_names[i]``, so queries over several hooks are done with
+    integer operations.
+    """
+
+    def __init__(self, plugins: Iterable[PluginInfo], hook_names: Iterable[str] = ()) -> None:
+        self._plugins = tuple(plugins)
+        self.hook_names = tuple(hook_names)
+        self._hook_bits = {name: 1 << index for index, name in enumerate(self.hook_names)}
+        self._masks = tuple(self._hooks_mask(plugin) for plugin in self._plugins)
+
+        by_id: dict[str, list[PluginInfo]] = {}
+        by_hook: dict[str, list[PluginInfo]] = {name: [] for name in self.hook_names}
+        self._by_id_version: dict[tuple[str, Version], PluginInfo] = {}
+        for plugin, mask in zip(self._plugins, self._masks):
+            by_id.setdefault(plugin.id, []).append(plugin)
+            self._by_id_version.setdefault((plugin.id, plugin.version), plugin)
+            for name, bit in self._hook_bits.items():
+                if mask & bit:
+                    by_hook[name].append(plugin)
+        self._by_id = {plugin_id: tuple(plugins) for plugin_id, plugins in by_id.items()}
+        self._by_hook = {name: tuple(plugins) for name, plugins in by_hook.items()}
+
+    def _hooks_mask(self, plugin: PluginInfo) -> int:
+        hooks_implemented = getattr(plugin, "hooks_implemented", ())
+        if (
+            isinstance(hooks_implemented, HooksImplemented)
+            and hooks_implemented.hook_names == self.hook_names
+        ):
+            return hooks_implemented.mask
+        return sum(self._hook_bits.get(name, 0) for name in hooks_implemented)
+
+    def __len__(self) -> int:
+        return len(self._plugins)
+
+    @overload
+    def __getitem__(self, index: int) -> PluginInfo: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[PluginInfo]: ...
+
+    def __getitem__(self, index: int | slice) -> PluginInfo | Sequence[PluginInfo]:
+        return self._plugins[index]
+
+    def __iter__(self) -> Iterator[PluginInfo]:
+        return iter(self._plugins)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self._plugins)!r})"
+
+    @property
+    def ids(self) -> Sequence[str]:
+        """The ids of the plugins, without repetitions, in the discovery order."""
+        return tuple(self._by_id)
+
+    @property
+    def masks(self) -> Sequence[int]:
+        """The bitmask of the hooks implemented by each plugin, see `hook_bit`."""
+        return self._masks
+
+    def hook_bit(self, hook_name: str) -> int:
+        """
+        Return the bit standing for ``hook_name`` in `masks`.
+
+        :raises KeyError: If ``hook_name`` is not one of `hook_names`.
+        """
+        return self._hook_bits[hook_name]
+
+    def get_by_id(self, plugin_id: str) -> Sequence[PluginInfo]:
+        """
+        Return all the versions found of the plugin with the given id (possibly none).
+        """
+        return self._by_id.get(plugin_id, ())
+
+    def get(self, plugin_id: str, version: "Version | str") -> PluginInfo | None:
+        """
+        Return the plugin with the given id and version, or None if it was not found. When the
+        same version is found more than once, the first one in the discovery order is returned.
+        """
+        if isinstance(version, str):
+            from packaging.version import Version
+
+            version = Version(version)
+        return self._by_id_version.get((plugin_id, version))
+
+    def implementing(self, hook_name: str) -> Sequence[PluginInfo]:
+        """
+        Return the plugins implementing the given hook, in the discovery order.
+        """
+        return self._by_hook.get(hook_name, ())
+
+    def implementing_all(self, hook_names: Iterable[str]) -> Sequence[PluginInfo]:
+        """
+        Return the plugins implementing all the given hooks, in the discovery order.
+        """
+        mask = 0
+        for hook_name in hook_names:
+            if hook_name not in self._hook_bits:
+                return ()
+            mask |= self._hook_bits[hook_name]
+        return tuple(
+            plugin
+            for plugin, plugin_mask in zip(self._plugins, self._masks)
+            if plugin_mask & mask == mask
+        )
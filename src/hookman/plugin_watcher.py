@@ -0,0 +1,464 @@
+import ctypes
+import os
+import struct
+import sys
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import final
+
+from hookman import hookman_utils
+from hookman.hookman_utils import file_fingerprint
+
+# Flags from <sys/inotify.h>.
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+_DIRECTORY_MASK = (
+    _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+_CONTENTS_MASK = _DIRECTORY_MASK | _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE
+
+
+@dataclass(frozen=True)
+class PluginChanges:
+    """
+    The plugins added, removed and changed on the watched directories between two tokens,
+    as returned by `PluginWatcher.changes_since`. Plugins are identified by the path of their
+    ``plugin.yaml`` file.
+    """
+
+    token: int
+    """The token of the state the changes lead to, to pass to the next `changes_since` call."""
+
+    added: list[Path] = field(default_factory=list)
+    """Plugins that were not installed at the given token."""
+
+    removed: list[Path] = field(default_factory=list)
+    """Plugins that were installed at the given token, and are no longer installed."""
+
+    changed: list[Path] = field(default_factory=list)
+    """
+    Plugins whose ``plugin.yaml``, ``README.md`` or ``artifacts`` directory changed since the
+    given token, which includes plugins that were removed and installed again.
+    """
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+@dataclass
+class _WatchedPlugin:
+    root: Path
+    fingerprint: Any
+    added_generation: int
+    changed_generation: int
+
+
+@final
+class PluginWatcher:
+    """
+    Keeps an incremental view of the plugins installed on a set of plugin directories, and
+    reports the plugins added, removed and changed between two points in time.
+
+    Each call to `poll` brings the view up to date and returns a token identifying its state;
+    `changes_since` returns the difference between the state of a previous token and the
+    current one. The token 0 is the empty state, so ``changes_since(0)`` reports every plugin
+    as added.
+
+    On Linux, the directories are watched with inotify, so `poll` only rescans the directories
+    where something happened and costs nothing when there were no changes. Elsewhere (or when
+    ``use_inotify`` is False or inotify is not available) every `poll` stats the files of all
+    plugins, which still never reads their contents or loads their shared libraries.
+
+    Obtain instances with `HookMan.watch_plugins`, and `close` the watcher when it is no longer
+    needed (it is also a context manager).
+
+    :param plugin_dirs:
+        The directories to watch.
+
+    :param ignored_sub_dir_names:
+        Names of directories right below each plugin directory that are never considered.
+
+    :param deep_discovery:
+        Same as in `HookMan`: whether plugins are looked for at any depth or only on the layout
+        created by `HookMan.install_plugin`.
+
+    :param use_inotify:
+        Set to False to always use the polling fallback.
+    """
+
+    def __init__(
+        self,
+        plugin_dirs: Sequence[Path] | Path,
+        *,
+        ignored_sub_dir_names: Sequence[str] = (),
+        deep_discovery: bool = True,
+        use_inotify: bool = True,
+    ) -> None:
+        self._roots = [plugin_dirs] if isinstance(plugin_dirs, Path) else list(plugin_dirs)
+        self._ignored_sub_dir_names = list(ignored_sub_dir_names)
+        self._deep_discovery = deep_discovery
+        self._lock = threading.Lock()
+
+        self._generation = 0
+        self._plugins: dict[Path, _WatchedPlugin] = {}
+        # The past installations of each plugin, as (generation it was added, generation it was
+        # removed), so `changes_since` knows which plugins were installed at any token.
+        self._removed: dict[Path, list[tuple[int, int]]] = {}
+
+        self._inotify = _Inotify.create() if use_inotify else None
+        # Maps each watch descriptor to the root it belongs to, and to the plugin it belongs to
+        # (None for the directories whose changes require rescanning the whole root).
+        self._watches: dict[int, tuple[Path, Path | None]] = {}
+        self._root_watches: dict[Path, int] = {}
+        self._plugin_watches: dict[Path, list[int]] = {}
+        self._unwatched_roots = set(self._roots)
+        self.poll()
+
+    @property
+    def uses_inotify(self) -> bool:
+        """Whether the directories are watched with inotify (instead of being polled)."""
+        return self._inotify is not None
+
+    @property
+    def token(self) -> int:
+        """The token of the current state, as of the last `poll`."""
+        return self._generation
+
+    def plugins(self) -> list[Path]:
+        """The ``plugin.yaml`` files of the plugins currently installed, as of the last `poll`."""
+        with self._lock:
+            return sorted(self._plugins)
+
+    def poll(self) -> int:
+        """
+        Bring the view of the plugin directories up to date, and return its token.
+        """
+        with self._lock:
+            return self._poll()
+
+    def _poll(self) -> int:
+        generation = self._generation + 1
+        modified = False
+
+        dirty_roots: set[Path] = set()
+        dirty_plugins: set[Path] = set()
+        if self._inotify is None:
+            dirty_roots.update(self._roots)
+        else:
+            self._read_events(dirty_roots, dirty_plugins)
+            dirty_roots.update(self._unwatched_roots)
+
+        for root in self._roots:
+            if root in dirty_roots:
+                modified |= self._scan_root(root, generation)
+        for yaml_location in sorted(dirty_plugins):
+            plugin = self._plugins.get(yaml_location)
+            if plugin is not None and plugin.root not in dirty_roots:
+                modified |= self._refresh_plugin(plugin.root, yaml_location, generation)
+
+        if modified:
+            self._generation = generation
+        return self._generation
+
+    def changes_since(self, token: int) -> PluginChanges:
+        """
+        `poll` the plugin directories and return the plugins added, removed and changed since
+        the state identified by ``token``.
+        """
+        with self._lock:
+            current_token = self._poll()
+            if not 0 <= token <= current_token:
+                raise ValueError(f"Invalid token {token}, the current token is {current_token}")
+            added = []
+            changed = []
+            for yaml_location, plugin in self._plugins.items():
+                if plugin.added_generation <= token:
+                    if plugin.changed_generation > token:
+                        changed.append(yaml_location)
+                elif self._was_installed(yaml_location, token):
+                    # Removed and installed again since the token.
+                    changed.append(yaml_location)
+                else:
+                    added.append(yaml_location)
+            removed = [
+                yaml_location
+                for yaml_location in self._removed
+                if yaml_location not in self._plugins and self._was_installed(yaml_location, token)
+            ]
+        return PluginChanges(
+            token=current_token,
+            added=sorted(added),
+            removed=sorted(removed),
+            changed=sorted(changed),
+        )
+
+    def _was_installed(self, yaml_location: Path, token: int) -> bool:
+        """
+        Return whether the plugin was installed at ``token``, by one of its past installations.
+        """
+        return any(
+            added_generation <= token < removed_generation
+            for added_generation, removed_generation in self._removed.get(yaml_location, [])
+        )
+
+    def close(self) -> None:
+        """
+        Stop watching the plugin directories.
+        """
+        with self._lock:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+                self._watches.clear()
+                self._root_watches.clear()
+                self._plugin_watches.clear()
+
+    def __enter__(self) -> "PluginWatcher":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _read_events(self, dirty_roots: set[Path], dirty_plugins: set[Path]) -> None:
+        assert self._inotify is not None
+        for wd, mask in self._inotify.read_events():
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, rescan everything.
+                dirty_roots.update(self._roots)
+                continue
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            root, yaml_location = watch
+            if mask & _IN_IGNORED:
+                # The kernel removed the watch, because the directory was deleted.
+                del self._watches[wd]
+                if self._root_watches.get(root) == wd:
+                    del self._root_watches[root]
+                    self._unwatched_roots.add(root)
+            if yaml_location is None:
+                dirty_roots.add(root)
+            else:
+                dirty_plugins.add(yaml_location)
+
+    def _add_watch(
+        self, path: Path, mask: int, root: Path, yaml_location: Path | None
+    ) -> int | None:
+        assert self._inotify is not None
+        wd = self._inotify.add_watch(path, mask | _IN_ONLYDIR)
+        if wd is not None:
+            self._watches[wd] = (root, yaml_location)
+        return wd
+
+    def _find_config_files(self, root: Path) -> Sequence[Path]:
+        if self._deep_discovery:
+            return hookman_utils.find_config_files(
+                [root], ignored_sub_dir_names=self._ignored_sub_dir_names
+            )
+        return hookman_utils.find_installed_config_files(
+            [root], ignored_sub_dir_names=self._ignored_sub_dir_names
+        )
+
+    def _watch_root(self, root: Path) -> None:
+        """
+        Watch the directories of ``root`` whose changes require rescanning it: for the installed
+        layout the root itself and the plugin directories without a plugin.yaml yet, but every
+        directory below it for deep discovery.
+        """
+        wd = self._add_watch(root, _DIRECTORY_MASK, root, None)
+        if wd is None:
+            self._unwatched_roots.add(root)
+            return
+        self._root_watches[root] = wd
+        self._unwatched_roots.discard(root)
+        ignored_names = set(self._ignored_sub_dir_names)
+        if not self._deep_discovery:
+            # Plugin directories are created before their files (for instance by
+            # `HookMan.install_plugin`), so they are watched until their plugin.yaml appears.
+            try:
+                with os.scandir(root) as entries:
+                    plugin_dirs = [
+                        Path(entry.path)
+                        for entry in entries
+                        if entry.name not in ignored_names and entry.is_dir()
+                    ]
+            except OSError:
+                return
+            for plugin_dir in plugin_dirs:
+                if plugin_dir / "assets/plugin.yaml" not in self._plugins:
+                    self._add_watch(plugin_dir, _DIRECTORY_MASK, root, None)
+                    self._add_watch(plugin_dir / "assets", _DIRECTORY_MASK, root, None)
+            return
+        for dir_path, dir_names, _file_names in os.walk(root):
+            if dir_path == str(root):
+                dir_names[:] = [name for name in dir_names if name not in ignored_names]
+            for name in dir_names:
+                self._add_watch(Path(dir_path, name), _CONTENTS_MASK, root, None)
+
+    def _scan_root(self, root: Path, generation: int) -> bool:
+        """
+        Update the plugins found on ``root``, returning whether any of them changed.
+        """
+        if self._inotify is not None:
+            # Watch before scanning, so changes made during the scan are not missed.
+            self._watch_root(root)
+        yaml_locations = set(self._find_config_files(root))
+        modified = False
+        for yaml_location, plugin in list(self._plugins.items()):
+            if plugin.root == root and yaml_location not in yaml_locations:
+                self._remove_plugin(yaml_location, generation)
+                modified = True
+        for yaml_location in sorted(yaml_locations):
+            modified |= self._refresh_plugin(root, yaml_location, generation)
+        return modified
+
+    def _refresh_plugin(self, root: Path, yaml_location: Path, generation: int) -> bool:
+        """
+        Update the state of a single plugin, returning whether it changed.
+        """
+        if self._inotify is not None and not self._deep_discovery:
+            self._watch_plugin(root, yaml_location)
+        fingerprint = _plugin_fingerprint(yaml_location)
+        plugin = self._plugins.get(yaml_location)
+        if fingerprint is None:
+            if plugin is None:
+                return False
+            self._remove_plugin(yaml_location, generation)
+            return True
+
+        if plugin is None:
+            self._plugins[yaml_location] = _WatchedPlugin(root, fingerprint, generation, generation)
+            return True
+        if plugin.fingerprint != fingerprint:
+            plugin.fingerprint = fingerprint
+            plugin.changed_generation = generation
+            return True
+        return False
+
+    def _watch_plugin(self, root: Path, yaml_location: Path) -> None:
+        """
+        Watch the directories of an installed plugin, so changes to its files only refresh it.
+        """
+        plugin_dir = yaml_location.parents[1]
+        wds = [
+            self._add_watch(plugin_dir, _DIRECTORY_MASK, root, yaml_location),
+            self._add_watch(yaml_location.parent, _CONTENTS_MASK, root, yaml_location),
+            self._add_watch(plugin_dir / "artifacts", _CONTENTS_MASK, root, yaml_location),
+        ]
+        self._plugin_watches[yaml_location] = [wd for wd in wds if wd is not None]
+
+    def _remove_plugin(self, yaml_location: Path, generation: int) -> None:
+        plugin = self._plugins.pop(yaml_location)
+        self._removed.setdefault(yaml_location, []).append((plugin.added_generation, generation))
+        if self._inotify is not None:
+            for wd in self._plugin_watches.pop(yaml_location, []):
+                # The directory may have been moved out of the plugin directory (for instance to
+                # the trash by `HookMan.remove_plugin`), which keeps the watch alive.
+                if self._watches.pop(wd, None) is not None:
+                    self._inotify.remove_watch(wd)
+            if not self._deep_discovery:
+                # Its plugin.yaml may be created again while the plugin directory remains.
+                plugin_dir = yaml_location.parents[1]
+                self._add_watch(plugin_dir, _DIRECTORY_MASK, plugin.root, None)
+                self._add_watch(plugin_dir / "assets", _DIRECTORY_MASK, plugin.root, None)
+
+
+def _plugin_fingerprint(yaml_location: Path) -> Any:
+    """
+    Return a value that changes whenever the files of the plugin change, or None if its
+    ``plugin.yaml`` does not exist.
+    """
+    yaml_fingerprint = file_fingerprint(yaml_location)
+    if yaml_fingerprint is None:
+        return None
+    artifacts = []
+    try:
+        with os.scandir(yaml_location.parents[1] / "artifacts") as entries:
+            for entry in entries:
+                stat_result = entry.stat()
+                artifacts.append(
+                    (entry.name, stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+                )
+    except OSError:
+        pass
+    return (
+        yaml_fingerprint,
+        file_fingerprint(yaml_location.parent / "README.md"),
+        tuple(sorted(artifacts)),
+    )
+
+
+class _Inotify:
+    """
+    Minimal wrapper of the Linux inotify API, through the C library.
+    """
+
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, libc: ctypes.CDLL, fd: int) -> None:
+        self._libc = libc
+        self._fd = fd
+
+    @classmethod
+    def create(cls) -> "_Inotify | None":
+        """
+        Return a new inotify instance, or None if inotify is not available on this platform.
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def add_watch(self, path: Path, mask: int) -> int | None:
+        """
+        Watch (or update the watch of) the given directory, returning the watch descriptor, or
+        None if the directory could not be watched (for instance because it does not exist).
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), ctypes.c_uint32(mask))
+        return wd if wd >= 0 else None
+
+    def remove_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read_events(self) -> list[tuple[int, int]]:
+        """
+        Return the pending events as ``(watch descriptor, mask)`` tuples, without blocking.
+        """
+        events = []
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _cookie, name_length = self._EVENT_HEADER.unpack_from(buffer, offset)
+                events.append((wd, mask))
+                offset += self._EVENT_HEADER.size + name_length
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -0,0 +1,212 @@
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import final
+
+from hookman.exceptions import PluginProbeError
+from hookman.exceptions import SharedLibraryLoadError
+from hookman.exceptions import SharedLibraryNotFoundError
+from hookman.plugin_config import PluginInfo
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+
+def _probe_worker_main(
+    connection: "Connection", hooks_available: dict | None, static_inspection: bool
+) -> None:
+    """
+    Entry point of the worker processes: create the `PluginInfo` of each requested plugin and
+    send back its resolved fields, or the reason it failed to load, until None is received.
+    """
+    from hookman.hookman_utils import SharedLibSession
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        yaml_location, plugin_config = request
+        reply: tuple[Any, ...]
+        try:
+            with SharedLibSession() as session:
+                plugin_info = PluginInfo(
+                    Path(yaml_location),
+                    hooks_available,
+                    shared_lib_session=session,
+                    plugin_config=plugin_config,
+                    static_inspection=static_inspection,
+                )
+        except SharedLibraryLoadError as error:
+            reply = ("load_error", str(error.shared_lib_path), error.reason)
+        except SharedLibraryNotFoundError as error:
+            reply = ("not_found", str(error))
+        except (OSError, ValueError, RuntimeError, AttributeError) as error:
+            # The plugin files could not be read or are invalid (for instance the library does not
+            # export get_plugin_id, or exports another id). Any other error ends the worker, which
+            # is reported as a crash.
+            reply = ("error", f"{type(error).__name__}: {error}")
+        else:
+            reply = ("ok", plugin_info._resolved_fields())
+        connection.send(reply)
+
+
+class _ProbeWorker:
+    """A worker process of a `ProbePool`, with the parent end of its pipe."""
+
+    def __init__(self, process: "BaseProcess", connection: "Connection") -> None:
+        self.process = process
+        self.connection = connection
+
+    def stop(self, *, kill: bool) -> None:
+        if not kill:
+            try:
+                self.connection.send(None)
+            except OSError:
+                kill = True
+            else:
+                self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+@final
+class ProbePool:
+    """
+    Probes plugins in a pool of worker processes, so a plugin whose shared library hangs or
+    crashes while loaded (for instance in its static initializers) cannot freeze or take down
+    the calling process.
+
+    Each `probe` call runs the `PluginInfo` construction in an idle worker process, started on
+    demand, and waits at most ``timeout`` seconds for it. A worker that crashes or exceeds the
+    timeout is killed and replaced, and the plugin is reported with a `PluginProbeError`.
+    Concurrent `probe` calls (from multiple threads) use different workers, so the number of
+    worker processes grows up to the number of concurrent calls.
+
+    Workers are started with the ``spawn`` method, so the main module of the application must
+    be importable without side effects (see the ``multiprocessing`` documentation).
+
+    The shared libraries are only loaded by the workers: the returned `PluginInfo` objects are
+    created from the fields resolved by them, like the ones served by the `DiscoveryCache`.
+    """
+
+    def __init__(
+        self,
+        hooks_available: dict | None,
+        *,
+        timeout: float | None = None,
+        static_inspection: bool = False,
+    ) -> None:
+        self.hooks_available = hooks_available
+        self.timeout = timeout
+        self.static_inspection = static_inspection
+        self._idle_workers: list[_ProbeWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start_worker(self) -> _ProbeWorker:
+        import multiprocessing
+
+        context = multiprocessing.get_context("spawn")
+        connection, worker_connection = context.Pipe()
+        process = context.Process(
+            target=_probe_worker_main,
+            args=(worker_connection, self.hooks_available, self.static_inspection),
+            name="hookman-probe-worker",
+            daemon=True,
+        )
+        process.start()
+        worker_connection.close()
+        return _ProbeWorker(process, connection)
+
+    def _acquire_worker(self) -> _ProbeWorker:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ProbePool is closed")
+            if self._idle_workers:
+                return self._idle_workers.pop()
+        return self._start_worker()
+
+    def _release_worker(self, worker: _ProbeWorker) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle_workers.append(worker)
+                return
+        worker.stop(kill=False)
+
+    def probe(self, yaml_location: Path, plugin_config: dict[str, Any]) -> PluginInfo:
+        """
+        Return the `PluginInfo` of the plugin at ``yaml_location``, created in a worker process.
+
+        ``plugin_config`` is the parsed contents of ``yaml_location``, see
+        `PluginInfo.read_config_file`.
+
+        :raises PluginProbeError:
+            If the worker crashes or does not finish within the timeout.
+
+        :raises SharedLibraryLoadError:
+            If the shared library fails to load, or the plugin files are invalid.
+
+        :raises SharedLibraryNotFoundError:
+            If the shared library does not exist.
+        """
+        worker = self._acquire_worker()
+        try:
+            worker.connection.send((str(yaml_location), plugin_config))
+            if not worker.connection.poll(self.timeout):
+                raise self._probe_error(
+                    yaml_location, plugin_config, f"probing timed out after {self.timeout}s"
+                )
+            reply = worker.connection.recv()
+        except PluginProbeError:
+            worker.stop(kill=True)
+            raise
+        except (EOFError, OSError):
+            worker.stop(kill=True)
+            raise self._probe_error(
+                yaml_location,
+                plugin_config,
+                f"the probing process crashed (exit code {worker.process.exitcode})",
+            ) from None
+        self._release_worker(worker)
+
+        kind, *values = reply
+        if kind == "ok":
+            return PluginInfo._from_resolved_fields(yaml_location, self.hooks_available, values[0])
+        if kind == "load_error":
+            raise SharedLibraryLoadError(Path(values[0]), values[1])
+        if kind == "not_found":
+            raise SharedLibraryNotFoundError(values[0])
+        raise SharedLibraryLoadError(_shared_lib_path(yaml_location, plugin_config), values[0])
+
+    def _probe_error(
+        self, yaml_location: Path, plugin_config: dict[str, Any], reason: str
+    ) -> PluginProbeError:
+        return PluginProbeError(_shared_lib_path(yaml_location, plugin_config), reason)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes, the ones still probing a plugin are stopped as soon as they
+        finish it.
+        """
+        with self._lock:
+            self._closed = True
+            workers = list(self._idle_workers)
+            self._idle_workers.clear()
+        for worker in workers:
+            worker.stop(kill=False)
+
+    def __enter__(self) -> "ProbePool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _shared_lib_path(yaml_location: Path, plugin_config: dict[str, Any]) -> Path:
+    return PluginInfo._shared_lib_path(
+        yaml_location, PluginInfo._shared_lib_name(plugin_config["id"])
+    )
@@ -143,6 +143,34 @@ def compile_build_files(ctx):
             ctx.run(command=call_cmake + "&&" + call_ninja + "&&" + call_install)
 
 
+@invoke.task(
+    help={
+        "sizes": "Comma separated number of plugins of each synthetic plugin root",
+        "repeat": "How many times each scenario runs",
+        "strace": "Also count the syscalls with strace",
+        "compare": "Results JSON file of a previous run to compare with",
+    }
+)
+def benchmark(ctx, sizes="10,100,1000,5000", repeat=3, strace=False, compare=None):
+    """
+    Benchmark the plugin discovery and loading on synthetic plugin roots, see benchmarks/discovery.py
+    """
+    project_dir = Path(__file__).parent
+    command = [
+        sys.executable,
+        str(project_dir / "benchmarks/discovery.py"),
+        "--sizes",
+        *sizes.split(","),
+        "--repeat",
+        str(repeat),
+    ]
+    if strace:
+        command.append("--strace")
+    if compare:
+        command += ["--compare", compare]
+    ctx.run(" ".join(f'"{arg}"' for arg in command))
+
+
 def _package_plugins(ctx):
     """
     This functions can be just called when the generate_project_files and compile tasks have been already invoked
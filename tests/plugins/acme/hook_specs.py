@@ -26,4 +26,5 @@ specs = HookSpecs(
     version="1",
     pyd_name="_simple",
     hooks=[friction_factor, friction_factor_2, env_temperature],
+    batch_hooks=[friction_factor],
 )
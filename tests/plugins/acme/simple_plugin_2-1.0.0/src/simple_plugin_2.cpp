@@ -4,6 +4,12 @@ HOOK_FRICTION_FACTOR(value1, value2) {
     return value1 - value2;
 }
 
+HOOK_FRICTION_FACTOR_BATCH(count, values1, values2, results) {
+    for (size_t i = 0; i < count; ++i) {
+        results[i] = values1[i] - values2[i];
+    }
+}
+
 HOOK_ENV_TEMPERATURE(value1, value2){
     return value1 - value2;
 }
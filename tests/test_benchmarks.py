@@ -0,0 +1,53 @@
+# mypy: allow-untyped-defs
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import hookman
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="benchmarks only run on Linux and macOS")
+def test_discovery_benchmark(tmp_path) -> None:
+    """Smoke test of benchmarks/discovery.py, on a tiny pool of plugins."""
+    if shutil.which(os.environ.get("CXX", "c++")) is None:
+        pytest.skip("C++ compiler not available")
+
+    script = Path(__file__).parents[1] / "benchmarks/discovery.py"
+    output = tmp_path / "results.json"
+    env = {**os.environ, "PYTHONPATH": str(Path(hookman.__file__).parents[1])}
+    subprocess.run(
+        [
+            sys.executable,
+            str(script),
+            "--sizes",
+            "1",
+            "2",
+            "--scenarios",
+            "find_config_files",
+            "probe",
+            "--repeat",
+            "1",
+            "--work-dir",
+            str(tmp_path / "work"),
+            "--output",
+            str(output),
+        ],
+        check=True,
+        capture_output=True,
+        env=env,
+    )
+
+    results = json.loads(output.read_text())["results"]
+    assert [(r["scenario"], r["plugins"]) for r in results] == [
+        ("find_config_files", 1),
+        ("probe", 1),
+        ("find_config_files", 2),
+        ("probe", 2),
+    ]
+    assert all(r["wall_time_min_s"] > 0 for r in results)
+    assert len(list((tmp_path / "work/pool").iterdir())) == 2
@@ -0,0 +1,52 @@
+# mypy: allow-untyped-defs
+import re
+import sys
+
+import pytest
+
+from hookman.elf_symbols import read_exported_symbols
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="ELF shared libraries only")
+
+
+def test_read_exported_symbols(simple_plugin, simple_plugin_2) -> None:
+    symbols = read_exported_symbols(simple_plugin["path"] / "artifacts/libsimple_plugin.so")
+    assert {"get_plugin_id", "acme_version_api", "acme_v1_friction_factor"} <= symbols
+    assert "acme_v1_env_temperature" not in symbols
+    # Undefined symbols (imported from other libraries) are not exported.
+    assert "printf" not in symbols
+
+    symbols = read_exported_symbols(simple_plugin_2["path"] / "artifacts/libsimple_plugin_2.so")
+    assert {"acme_v1_friction_factor", "acme_v1_env_temperature"} <= symbols
+
+
+def test_read_exported_symbols_without_section_headers(simple_plugin, tmp_path) -> None:
+    """
+    Libraries stripped of their section headers (e.g. by ``sstrip``) are read from the dynamic
+    segment instead.
+    """
+    lib = simple_plugin["path"] / "artifacts/libsimple_plugin.so"
+    content = bytearray(lib.read_bytes())
+    assert content[4] == 2, "64-bit ELF file expected"
+    # e_shoff = 0, and e_shnum = e_shstrndx = 0.
+    content[0x28:0x30] = bytes(8)
+    content[0x3C:0x40] = bytes(4)
+    stripped_lib = tmp_path / "libsimple_plugin.so"
+    stripped_lib.write_bytes(content)
+    assert read_exported_symbols(stripped_lib) == read_exported_symbols(lib)
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        (b"", "not an ELF file (empty file)"),
+        (b"not a real shared library", "not an ELF file"),
+        (b"\x7fELF\x03\x01", "unsupported ELF class 3 or data encoding 1"),
+        (b"\x7fELF\x02\x01" + b"\0" * 10, "truncated or corrupted ELF file"),
+    ],
+)
+def test_read_exported_symbols_invalid_file(tmp_path, content, message) -> None:
+    lib = tmp_path / "libinvalid.so"
+    lib.write_bytes(content)
+    with pytest.raises(ValueError, match=re.escape(message)):
+        read_exported_symbols(lib)
@@ -30,6 +30,8 @@ def test_hook_man_generator(datadir, file_regression) -> None:
         basename="HookCallerPython",
         extension=".cpp",
     )
+    # The generated HookCaller uses <shared_mutex>.
+    assert "cxx_std_17" in (datadir / "cpp" / "CMakeLists.txt").read_text()
 
 
 def test_hook_man_generator_no_pyd(datadir, file_regression) -> None:
@@ -3,10 +3,13 @@
 #define _H_HOOKMAN_HOOK_CALLER
 
 #include <functional>
+#include <mutex>
+#include <shared_mutex>
 #include <stdexcept>
 #include <string>
+#include <unordered_map>
+#include <utility>
 #include <vector>
-#include <map>
 
 #ifdef _WIN32
     #include <cstdlib>
@@ -24,46 +27,159 @@ template <typename F_TYPE> std::function<F_TYPE> from_c_pointer(uintptr_t p) {
     return std::function<F_TYPE>(reinterpret_cast<F_TYPE *>(p));
 }
 
+// An implementation of a hook: a plain function pointer for the ones found in the plugin
+// libraries, called without the type erasure of std::function, or a std::function for the
+// ones appended as such.
+template <typename F_TYPE> class HookImpl;
+
+template <typename R, typename... Args> class HookImpl<R(Args...)> {
+public:
+    HookImpl() = default;
+    explicit HookImpl(R (*pointer)(Args...)) : pointer(pointer) {}
+    explicit HookImpl(std::function<R(Args...)> function) : function(std::move(function)) {}
+
+    R operator()(Args... args) const {
+        if (this->pointer != nullptr) {
+            return this->pointer(args...);
+        }
+        return this->function(args...);
+    }
+
+    explicit operator bool() const {
+        return this->pointer != nullptr || static_cast<bool>(this->function);
+    }
+
+    // The function pointer of a native implementation, nullptr otherwise.
+    R (*native() const)(Args...) {
+        return this->pointer;
+    }
+
+private:
+    R (*pointer)(Args...) = nullptr;
+    std::function<R(Args...)> function;
+};
+
 class HookCaller {
 public:
-    std::vector<std::function<int(int, double[2])>> friction_factor_impls() {
+    // The methods changing the implementations (load_impls_from_library(), append_*_impl() and
+    // remove_impls()) hold an exclusive lock of the HookCaller. Hold this shared lock while
+    // reading or calling the implementations (*_impls(), *_impl(), for_each_*_impl(),
+    // call_*_all() and call_*_batch()) if other threads may change them concurrently.
+    std::shared_lock<std::shared_mutex> read_lock() const {
+        return std::shared_lock<std::shared_mutex>(this->mutex);
+    }
+
+    const std::vector<HookImpl<int(int, double[2])>>& friction_factor_impls() const {
         return this->_friction_factor_impls;
     }
-    std::function<int(int, double[2])> friction_factor_impl(const std::string &plugin_id) {
-        return this->_friction_factor_map[plugin_id];
+    template <typename Visitor>
+    void for_each_friction_factor_impl(Visitor&& visitor) const {
+        for (const auto& impl : this->_friction_factor_impls) {
+            visitor(impl);
+        }
+    }
+    const HookImpl<int(int, double[2])>& friction_factor_impl(const std::string &plugin_id) const {
+        static const HookImpl<int(int, double[2])> not_found;
+        auto it = this->_friction_factor_index.find(plugin_id);
+        return it == this->_friction_factor_index.end() ? not_found : this->_friction_factor_impls[it->second];
+    }
+    // Write the result of the i-th implementation to results[i], see friction_factor_impls().size().
+    void call_friction_factor_all(int v1, double v2[2], int* results) const {
+        const auto& impls = this->_friction_factor_impls;
+        for (size_t i = 0; i < impls.size(); ++i) {
+            results[i] = impls[i](v1, v2);
+        }
+    }
+    void call_friction_factor_batch(const std::string &plugin_id, size_t count, int* v1, double (*v2)[2], int* results) const {
+        auto it = this->_friction_factor_index.find(plugin_id);
+        if (it == this->_friction_factor_index.end()) {
+            throw std::out_of_range("No implementation of hook friction_factor for plugin " + plugin_id);
+        }
+        auto batch_impl = this->_friction_factor_batch_impls[it->second];
+        if (batch_impl != nullptr) {
+            batch_impl(count, v1, v2, results);
+            return;
+        }
+        const auto& impl = this->_friction_factor_impls[it->second];
+        for (size_t i = 0; i < count; ++i) {
+            results[i] = impl(v1[i], v2[i]);
+        }
     }
-    std::vector<std::function<int(int, double[2])>> friction_factor_2_impls() {
+    const std::vector<HookImpl<int(int, double[2])>>& friction_factor_2_impls() const {
         return this->_friction_factor_2_impls;
     }
-    std::function<int(int, double[2])> friction_factor_2_impl(const std::string &plugin_id) {
-        return this->_friction_factor_2_map[plugin_id];
+    template <typename Visitor>
+    void for_each_friction_factor_2_impl(Visitor&& visitor) const {
+        for (const auto& impl : this->_friction_factor_2_impls) {
+            visitor(impl);
+        }
+    }
+    const HookImpl<int(int, double[2])>& friction_factor_2_impl(const std::string &plugin_id) const {
+        static const HookImpl<int(int, double[2])> not_found;
+        auto it = this->_friction_factor_2_index.find(plugin_id);
+        return it == this->_friction_factor_2_index.end() ? not_found : this->_friction_factor_2_impls[it->second];
+    }
+    // Write the result of the i-th implementation to results[i], see friction_factor_2_impls().size().
+    void call_friction_factor_2_all(int v1, double v2[2], int* results) const {
+        const auto& impls = this->_friction_factor_2_impls;
+        for (size_t i = 0; i < impls.size(); ++i) {
+            results[i] = impls[i](v1, v2);
+        }
     }
 
     void append_friction_factor_impl(uintptr_t pointer, const std::string &plugin_id) {
-        this->_friction_factor_impls.push_back(from_c_pointer<int(int, double[2])>(pointer));
-        this->_friction_factor_map[plugin_id] = from_c_pointer<int(int, double[2])>((uintptr_t)(pointer));
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        using F_TYPE = int(int, double[2]);
+        this->add_friction_factor_impl(HookImpl<F_TYPE>(reinterpret_cast<F_TYPE *>(pointer)), plugin_id);
     }
 
     void append_friction_factor_impl(std::function<int(int, double[2])> func, const std::string &plugin_id) {
-        this->_friction_factor_impls.push_back(func);
-        this->_friction_factor_map[plugin_id] = func;
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->add_friction_factor_impl(HookImpl<int(int, double[2])>(std::move(func)), plugin_id);
     }
     void append_friction_factor_2_impl(uintptr_t pointer, const std::string &plugin_id) {
-        this->_friction_factor_2_impls.push_back(from_c_pointer<int(int, double[2])>(pointer));
-        this->_friction_factor_2_map[plugin_id] = from_c_pointer<int(int, double[2])>((uintptr_t)(pointer));
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        using F_TYPE = int(int, double[2]);
+        this->add_friction_factor_2_impl(HookImpl<F_TYPE>(reinterpret_cast<F_TYPE *>(pointer)), plugin_id);
     }
 
     void append_friction_factor_2_impl(std::function<int(int, double[2])> func, const std::string &plugin_id) {
-        this->_friction_factor_2_impls.push_back(func);
-        this->_friction_factor_2_map[plugin_id] = func;
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->add_friction_factor_2_impl(HookImpl<int(int, double[2])>(std::move(func)), plugin_id);
+    }
+
+    void remove_impls(const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        for (size_t i = this->_friction_factor_impls.size(); i > 0; --i) {
+            if (this->_friction_factor_plugin_ids[i - 1] == plugin_id) {
+                this->_friction_factor_impls.erase(this->_friction_factor_impls.begin() + (i - 1));
+                this->_friction_factor_plugin_ids.erase(this->_friction_factor_plugin_ids.begin() + (i - 1));
+                this->_friction_factor_batch_impls.erase(this->_friction_factor_batch_impls.begin() + (i - 1));
+            }
+        }
+        this->_friction_factor_index.clear();
+        for (size_t i = 0; i < this->_friction_factor_plugin_ids.size(); ++i) {
+            this->_friction_factor_index[this->_friction_factor_plugin_ids[i]] = i;
+        }
+        for (size_t i = this->_friction_factor_2_impls.size(); i > 0; --i) {
+            if (this->_friction_factor_2_plugin_ids[i - 1] == plugin_id) {
+                this->_friction_factor_2_impls.erase(this->_friction_factor_2_impls.begin() + (i - 1));
+                this->_friction_factor_2_plugin_ids.erase(this->_friction_factor_2_plugin_ids.begin() + (i - 1));
+            }
+        }
+        this->_friction_factor_2_index.clear();
+        for (size_t i = 0; i < this->_friction_factor_2_plugin_ids.size(); ++i) {
+            this->_friction_factor_2_index[this->_friction_factor_2_plugin_ids[i]] = i;
+        }
+        this->close_libraries(plugin_id);
     }
 
 #if defined(_WIN32)
 
 public:
     ~HookCaller() {
-        for (auto handle : this->handles) {
-            FreeLibrary(handle);
+        for (auto& handle : this->handles) {
+            FreeLibrary(handle.second);
         }
     }
     void load_impls_from_library(const std::string& utf8_filename, const std::string& plugin_id) {
@@ -77,16 +193,21 @@ public:
             while (!error_msg.empty() && (error_msg.back() <= ' ')) { error_msg.pop_back(); }
             throw std::runtime_error("Error loading library " + utf8_filename + ": " + error_msg + " (code " + std::to_string(error_code) + ")");
         }
-        this->handles.push_back(handle);
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->handles.emplace_back(plugin_id, handle);
 
         auto p0 = GetProcAddress(handle, "acme_v1_friction_factor");
         if (p0 != nullptr) {
-            this->append_friction_factor_impl((uintptr_t)(p0), plugin_id);
+            this->add_friction_factor_impl(HookImpl<int(int, double[2])>(reinterpret_cast<int (*)(int, double[2])>(p0)), plugin_id);
+            auto batch_impl = GetProcAddress(handle, "acme_v1_friction_factor_batch");
+            if (batch_impl != nullptr) {
+                this->_friction_factor_batch_impls.back() = reinterpret_cast<void (*)(size_t, int*, double (*)[2], int*)>(batch_impl);
+            }
         }
 
         auto p1 = GetProcAddress(handle, "acme_v1_friction_factor_2");
         if (p1 != nullptr) {
-            this->append_friction_factor_2_impl((uintptr_t)(p1), plugin_id);
+            this->add_friction_factor_2_impl(HookImpl<int(int, double[2])>(reinterpret_cast<int (*)(int, double[2])>(p1)), plugin_id);
         }
 
     }
@@ -162,18 +283,41 @@ private:
     }
 
 
+    void close_libraries(const std::string& plugin_id) {
+        for (auto it = this->handles.begin(); it != this->handles.end();) {
+            if (it->first == plugin_id) {
+                FreeLibrary(it->second);
+                it = this->handles.erase(it);
+            } else {
+                ++it;
+            }
+        }
+    }
+
+
 private:
-    std::vector<HMODULE> handles;
+    std::vector<std::pair<std::string, HMODULE>> handles;
 
 #elif defined(__linux__)
 
 private:
-    std::vector<void*> handles;
+    std::vector<std::pair<std::string, void*>> handles;
+
+    void close_libraries(const std::string& plugin_id) {
+        for (auto it = this->handles.begin(); it != this->handles.end();) {
+            if (it->first == plugin_id) {
+                dlclose(it->second);
+                it = this->handles.erase(it);
+            } else {
+                ++it;
+            }
+        }
+    }
 
 public:
     ~HookCaller() {
-        for (auto handle : this->handles) {
-            dlclose(handle);
+        for (auto& handle : this->handles) {
+            dlclose(handle.second);
         }
     }
     void load_impls_from_library(const std::string& utf8_filename, const std::string& plugin_id) {
@@ -181,16 +325,21 @@ public:
         if (handle == nullptr) {
             throw std::runtime_error("Error loading library " + utf8_filename + ": dlopen failed");
         }
-        this->handles.push_back(handle);
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->handles.emplace_back(plugin_id, handle);
 
         auto p0 = dlsym(handle, "acme_v1_friction_factor");
         if (p0 != nullptr) {
-            this->append_friction_factor_impl((uintptr_t)(p0), plugin_id);
+            this->add_friction_factor_impl(HookImpl<int(int, double[2])>(reinterpret_cast<int (*)(int, double[2])>(p0)), plugin_id);
+            auto batch_impl = dlsym(handle, "acme_v1_friction_factor_batch");
+            if (batch_impl != nullptr) {
+                this->_friction_factor_batch_impls.back() = reinterpret_cast<void (*)(size_t, int*, double (*)[2], int*)>(batch_impl);
+            }
         }
 
         auto p1 = dlsym(handle, "acme_v1_friction_factor_2");
         if (p1 != nullptr) {
-            this->append_friction_factor_2_impl((uintptr_t)(p1), plugin_id);
+            this->add_friction_factor_2_impl(HookImpl<int(int, double[2])>(reinterpret_cast<int (*)(int, double[2])>(p1)), plugin_id);
         }
 
     }
@@ -200,10 +349,26 @@ public:
 #endif
 
 private:
-    std::vector<std::function<int(int, double[2])>> _friction_factor_impls;
-    std::map<std::string, std::function<int(int, double[2])>> _friction_factor_map;
-    std::vector<std::function<int(int, double[2])>> _friction_factor_2_impls;
-    std::map<std::string, std::function<int(int, double[2])>> _friction_factor_2_map;
+    void add_friction_factor_impl(HookImpl<int(int, double[2])> impl, const std::string &plugin_id) {
+        this->_friction_factor_index[plugin_id] = this->_friction_factor_impls.size();
+        this->_friction_factor_impls.push_back(std::move(impl));
+        this->_friction_factor_plugin_ids.push_back(plugin_id);
+        this->_friction_factor_batch_impls.push_back(nullptr);
+    }
+    void add_friction_factor_2_impl(HookImpl<int(int, double[2])> impl, const std::string &plugin_id) {
+        this->_friction_factor_2_index[plugin_id] = this->_friction_factor_2_impls.size();
+        this->_friction_factor_2_impls.push_back(std::move(impl));
+        this->_friction_factor_2_plugin_ids.push_back(plugin_id);
+    }
+
+    std::vector<HookImpl<int(int, double[2])>> _friction_factor_impls;
+    std::vector<std::string> _friction_factor_plugin_ids;
+    std::unordered_map<std::string, size_t> _friction_factor_index;
+    std::vector<void (*)(size_t, int*, double (*)[2], int*)> _friction_factor_batch_impls;
+    std::vector<HookImpl<int(int, double[2])>> _friction_factor_2_impls;
+    std::vector<std::string> _friction_factor_2_plugin_ids;
+    std::unordered_map<std::string, size_t> _friction_factor_2_index;
+    mutable std::shared_mutex mutex;
 };
 
 }  // namespace hookman
@@ -3,10 +3,13 @@
 #define _H_HOOKMAN_HOOK_CALLER
 
 #include <functional>
+#include <mutex>
+#include <shared_mutex>
 #include <stdexcept>
 #include <string>
+#include <unordered_map>
+#include <utility>
 #include <vector>
-#include <map>
 
 #ifdef _WIN32
     #include <cstdlib>
@@ -22,16 +25,61 @@ template <typename F_TYPE> std::function<F_TYPE> from_c_pointer(uintptr_t p) {
     return std::function<F_TYPE>(reinterpret_cast<F_TYPE *>(p));
 }
 
+// An implementation of a hook: a plain function pointer for the ones found in the plugin
+// libraries, called without the type erasure of std::function, or a std::function for the
+// ones appended as such.
+template <typename F_TYPE> class HookImpl;
+
+template <typename R, typename... Args> class HookImpl<R(Args...)> {
+public:
+    HookImpl() = default;
+    explicit HookImpl(R (*pointer)(Args...)) : pointer(pointer) {}
+    explicit HookImpl(std::function<R(Args...)> function) : function(std::move(function)) {}
+
+    R operator()(Args... args) const {
+        if (this->pointer != nullptr) {
+            return this->pointer(args...);
+        }
+        return this->function(args...);
+    }
+
+    explicit operator bool() const {
+        return this->pointer != nullptr || static_cast<bool>(this->function);
+    }
+
+    // The function pointer of a native implementation, nullptr otherwise.
+    R (*native() const)(Args...) {
+        return this->pointer;
+    }
+
+private:
+    R (*pointer)(Args...) = nullptr;
+    std::function<R(Args...)> function;
+};
+
 class HookCaller {
 public:
+    // The methods changing the implementations (load_impls_from_library(), append_*_impl() and
+    // remove_impls()) hold an exclusive lock of the HookCaller. Hold this shared lock while
+    // reading or calling the implementations (*_impls(), *_impl(), for_each_*_impl(),
+    // call_*_all() and call_*_batch()) if other threads may change them concurrently.
+    std::shared_lock<std::shared_mutex> read_lock() const {
+        return std::shared_lock<std::shared_mutex>(this->mutex);
+    }
+
 
 
+    void remove_impls(const std::string &plugin_id) {
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->close_libraries(plugin_id);
+    }
+
 #if defined(_WIN32)
 
 public:
     ~HookCaller() {
-        for (auto handle : this->handles) {
-            FreeLibrary(handle);
+        for (auto& handle : this->handles) {
+            FreeLibrary(handle.second);
         }
     }
     void load_impls_from_library(const std::string& utf8_filename, const std::string& plugin_id) {
@@ -45,7 +93,8 @@ public:
             while (!error_msg.empty() && (error_msg.back() <= ' ')) { error_msg.pop_back(); }
             throw std::runtime_error("Error loading library " + utf8_filename + ": " + error_msg + " (code " + std::to_string(error_code) + ")");
         }
-        this->handles.push_back(handle);
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->handles.emplace_back(plugin_id, handle);
 
     }
 
@@ -120,18 +169,41 @@ private:
     }
 
 
+    void close_libraries(const std::string& plugin_id) {
+        for (auto it = this->handles.begin(); it != this->handles.end();) {
+            if (it->first == plugin_id) {
+                FreeLibrary(it->second);
+                it = this->handles.erase(it);
+            } else {
+                ++it;
+            }
+        }
+    }
+
+
 private:
-    std::vector<HMODULE> handles;
+    std::vector<std::pair<std::string, HMODULE>> handles;
 
 #elif defined(__linux__)
 
 private:
-    std::vector<void*> handles;
+    std::vector<std::pair<std::string, void*>> handles;
+
+    void close_libraries(const std::string& plugin_id) {
+        for (auto it = this->handles.begin(); it != this->handles.end();) {
+            if (it->first == plugin_id) {
+                dlclose(it->second);
+                it = this->handles.erase(it);
+            } else {
+                ++it;
+            }
+        }
+    }
 
 public:
     ~HookCaller() {
-        for (auto handle : this->handles) {
-            dlclose(handle);
+        for (auto& handle : this->handles) {
+            dlclose(handle.second);
         }
     }
     void load_impls_from_library(const std::string& utf8_filename, const std::string& plugin_id) {
@@ -139,7 +211,8 @@ public:
         if (handle == nullptr) {
             throw std::runtime_error("Error loading library " + utf8_filename + ": dlopen failed");
         }
-        this->handles.push_back(handle);
+        std::unique_lock<std::shared_mutex> lock(this->mutex);
+        this->handles.emplace_back(plugin_id, handle);
 
     }
 
@@ -148,6 +221,8 @@ public:
 #endif
 
 private:
+
+    mutable std::shared_mutex mutex;
 };
 
 }  // namespace hookman
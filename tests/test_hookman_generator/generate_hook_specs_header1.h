@@ -7,6 +7,8 @@
     #define _HOOKMAN_EXTERN_C
 #endif
 
+#include <stddef.h>
+
 #ifdef WIN32
     #define HOOKMAN_API_EXP _HOOKMAN_EXTERN_C __declspec(dllexport)
     #define HOOKMAN_FUNC_EXP __cdecl
@@ -33,6 +35,12 @@ Docs for Friction Factor
 */
 #define HOOK_FRICTION_FACTOR(v1, v2) HOOKMAN_API_EXP int HOOKMAN_FUNC_EXP acme_v1_friction_factor(int v1, double v2[2])
 
+/*!
+Array form of HOOK_FRICTION_FACTOR: evaluates it `count` times, the i-th time with the i-th
+element of each argument array, writing the i-th result to `results[i]`.
+*/
+#define HOOK_FRICTION_FACTOR_BATCH(count, v1, v2, results) HOOKMAN_API_EXP void HOOKMAN_FUNC_EXP acme_v1_friction_factor_batch(size_t count, int* v1, double (*v2)[2], int* results)
+
 /*!
 Docs for Friction Factor 2
     Input:
@@ -29,4 +29,5 @@ specs = HookSpecs(
     pyd_name="_test_hook_man_generator",
     hooks=[friction_factor, friction_factor_2],
     extra_includes=["custom_include1", "custom_include2"],
+    batch_hooks=[friction_factor],
 )
@@ -5,8 +5,10 @@ import sys
 import pytest
 
 from hookman.exceptions import SharedLibraryLoadError
+from hookman.hookman_utils import SharedLibSession
 from hookman.hookman_utils import change_path_env
 from hookman.hookman_utils import find_config_files
+from hookman.hookman_utils import find_installed_config_files
 from hookman.hookman_utils import load_shared_lib
 
 
@@ -27,6 +29,36 @@ def test_find_config_files(datadir) -> None:
     assert len(config_files) == 0
 
 
+def test_find_installed_config_files(tmp_path) -> None:
+    for name in ("foo-1.0.0", "bar-2.0.0", "bar-1.0.0", ".trash/foo-0.1.0", "nested/baz-1.0.0"):
+        (tmp_path / name / "assets").mkdir(parents=True)
+        (tmp_path / name / "assets/plugin.yaml").touch()
+    # Deeper files are not part of the installation layout.
+    (tmp_path / "foo-1.0.0/artifacts/other").mkdir(parents=True)
+    (tmp_path / "foo-1.0.0/artifacts/other/plugin.yaml").touch()
+    (tmp_path / "empty-1.0.0").mkdir()
+    (tmp_path / "some_file.txt").touch()
+
+    def relative_names(config_files):
+        return [str(f.parents[1].relative_to(tmp_path)) for f in config_files]
+
+    config_files = find_installed_config_files(tmp_path)
+    assert relative_names(config_files) == ["bar-1.0.0", "bar-2.0.0", "foo-1.0.0"]
+    assert config_files[0] == tmp_path / "bar-1.0.0/assets/plugin.yaml"
+
+    config_files = find_installed_config_files(
+        [tmp_path, tmp_path / "nested"], ignored_plugin_ids=["bar"]
+    )
+    assert relative_names(config_files) == ["foo-1.0.0", "nested/baz-1.0.0"]
+
+    config_files = find_installed_config_files(
+        tmp_path, ignored_sub_dir_names=[".trash", "foo-1.0.0"]
+    )
+    assert relative_names(config_files) == ["bar-1.0.0", "bar-2.0.0"]
+
+    assert find_installed_config_files([tmp_path / "non_existing_folder"]) == []
+
+
 @pytest.mark.skipif(
     not sys.platform.startswith("win"), reason="path only needs changing on Windows"
 )
@@ -62,3 +94,31 @@ def test_load_shared_lib_raises_shared_library_load_error_for_corrupt_file(tmp_p
 
     assert exc_info.value.shared_lib_path == corrupt_lib
     assert exc_info.value.reason  # Non-empty OS-dependent error description.
+
+
+def test_load_shared_lib_with_session(simple_plugin, mocker) -> None:
+    lib_name = "simple_plugin.dll" if sys.platform == "win32" else "libsimple_plugin.so"
+    shared_lib_path = str(simple_plugin["path"] / "artifacts" / lib_name)
+    close_shared_lib = mocker.patch("hookman.hookman_utils._close_shared_lib", autospec=True)
+
+    with SharedLibSession() as session:
+        with load_shared_lib(shared_lib_path, session) as plugin_dll:
+            assert plugin_dll.get_plugin_id
+        # The library is kept loaded by the session, and reused.
+        assert close_shared_lib.call_count == 0
+        with load_shared_lib(shared_lib_path, session) as plugin_dll_2:
+            assert plugin_dll_2 is plugin_dll
+    close_shared_lib.assert_called_once_with(plugin_dll)
+
+    with load_shared_lib(shared_lib_path) as plugin_dll_3:
+        assert plugin_dll_3 is not plugin_dll
+    assert close_shared_lib.call_count == 2
+
+    with SharedLibSession(keep_loaded=False) as session:
+        plugin_dll_4 = session.load(shared_lib_path)
+        session.release(shared_lib_path)
+        close_shared_lib.assert_called_with(plugin_dll_4)
+        # Releasing a library not loaded by the session does nothing.
+        session.release(shared_lib_path)
+        assert session.load(shared_lib_path) is not plugin_dll_4
+    assert close_shared_lib.call_count == 4
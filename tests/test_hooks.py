@@ -1,5 +1,7 @@
 # mypy: allow-untyped-defs
 import dataclasses
+import json
+import shutil
 import sys
 from pathlib import Path
 
@@ -9,6 +11,7 @@ from packaging.version import Version
 from hookman.hooks import HookMan
 from hookman.hooks import HookSpecs
 from hookman.hooks import PluginInfo
+from hookman.hooks import PluginLoadReport
 
 
 def _get_plugin_id_set(plugin_info_list):
@@ -74,6 +77,127 @@ def test_get_hook_caller_with_conflict(simple_plugin, simple_plugin_2) -> None:
     assert len(hc.env_temperature_impls()) == 1
 
 
+def test_hook_caller_call_all(simple_plugin, simple_plugin_2) -> None:
+    np = pytest.importorskip("numpy")
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    hook_caller = hm.get_hook_caller()
+
+    results = hook_caller.call_friction_factor_all(5, 2)
+    assert results.tolist() == [impl(5, 2) for impl in hook_caller.friction_factor_impls()]
+    assert sorted(results.tolist()) == [3, 7]
+    assert hook_caller.call_env_temperature_all(5.0, 2.0).tolist() == [3.0]
+    assert hook_caller.call_friction_factor_2_all(5, 2).tolist() == []
+
+    out = np.zeros(2, dtype=np.intc)
+    assert hook_caller.call_friction_factor_all(1, 2, out=out) is out
+    assert sorted(out.tolist()) == [-1, 3]
+
+    for invalid_out in (np.zeros(3, dtype=np.intc), np.zeros(2, dtype=np.float64), [0, 0]):
+        with pytest.raises(ValueError, match="out must be a contiguous 1-dimensional array"):
+            hook_caller.call_friction_factor_all(1, 2, out=invalid_out)
+
+
+def test_hook_caller_call(simple_plugin, simple_plugin_2) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    hook_caller = hm.get_hook_caller()
+    assert hook_caller.call_friction_factor("simple_plugin", 5, 2) == 7
+    assert hook_caller.call_friction_factor("simple_plugin_2", v1=5, v2=2) == 3
+    assert hook_caller.call_env_temperature("simple_plugin_2", 5.0, 2.5) == 2.5
+    with pytest.raises(KeyError, match="No implementation of hook env_temperature"):
+        hook_caller.call_env_temperature("simple_plugin", 5.0, 2.5)
+
+    # The GIL is released while the hooks run, and reacquired to call Python implementations.
+    hook_caller.append_friction_factor_impl(lambda v1, v2: v1 * v2, "python_plugin")
+    plugin_ids = ["simple_plugin", "simple_plugin_2", "python_plugin"] * 100
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(lambda id: hook_caller.call_friction_factor(id, 5, 2), plugin_ids)
+        )
+    assert results == [7, 3, 10] * 100
+
+
+def test_iter_plugins_releases_shared_libs(simple_plugin, simple_plugin_2, mocker) -> None:
+    from hookman import hookman_utils
+
+    close_shared_lib = mocker.spy(hookman_utils, "_close_shared_lib")
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    # The library of each plugin is released as soon as the plugin is probed.
+    for count, plugin in enumerate(hm.iter_plugins(), start=1):
+        assert isinstance(plugin, PluginInfo)
+        assert close_shared_lib.call_count == count
+
+    # The HookCaller reuses the libraries loaded by the discovery, released once it loaded them.
+    open_shared_lib = mocker.spy(hookman_utils, "_open_shared_lib")
+    close_shared_lib.reset_mock()
+    hook_caller = hm.get_hook_caller()
+    assert open_shared_lib.call_count == close_shared_lib.call_count == 2
+    assert hook_caller.call_friction_factor("simple_plugin", 5, 2) == 7
+
+
+def test_hook_caller_call_at(simple_plugin, simple_plugin_2) -> None:
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    hook_caller = hm.get_hook_caller()
+    count = hook_caller.friction_factor_impls_count()
+    assert count == 2
+    results = [hook_caller.call_friction_factor_at(i, 5, 2) for i in range(count)]
+    assert results == [impl(5, 2) for impl in hook_caller.friction_factor_impls()]
+    assert sorted(results) == [3, 7]
+    assert hook_caller.friction_factor_2_impls_count() == 0
+    with pytest.raises(IndexError, match="Index 2 out of range for the 2 implementations"):
+        hook_caller.call_friction_factor_at(2, 5, 2)
+
+
+def test_hook_caller_call_batch(simple_plugin, simple_plugin_2) -> None:
+    np = pytest.importorskip("numpy")
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    hook_caller = hm.get_hook_caller()
+    v1 = np.array([5, 7, 9], dtype=np.intc)
+    v2 = np.array([1, 2, 3], dtype=np.intc)
+
+    # simple_plugin only exports the scalar hook, called for each element by the HookCaller.
+    assert hook_caller.call_friction_factor_batch("simple_plugin", v1, v2).tolist() == [6, 9, 12]
+    # simple_plugin_2 exports the array form of the hook, called once.
+    out = np.zeros(3, dtype=np.intc)
+    assert hook_caller.call_friction_factor_batch("simple_plugin_2", v1, v2, out=out) is out
+    assert out.tolist() == [4, 5, 6]
+    assert hook_caller.call_friction_factor_batch("simple_plugin", [], []).tolist() == []
+
+    with pytest.raises(KeyError, match="No implementation of hook friction_factor"):
+        hook_caller.call_friction_factor_batch("unknown_plugin", v1, v2)
+    with pytest.raises(ValueError, match="argument v2 must have 3 elements"):
+        hook_caller.call_friction_factor_batch("simple_plugin", v1, v2[:2])
+    assert not hasattr(hook_caller, "call_env_temperature_batch")
+
+
+def test_hook_specs_batch_hooks() -> None:
+    def hook(a: "int") -> "int":
+        """
+        Docs
+        """
+        return 0
+
+    def hook_batch(a: "int") -> "int":
+        """
+        Docs
+        """
+        return 0
+
+    specs = HookSpecs(project_name="acme", version="1", hooks=[hook], batch_hooks=[hook])
+    assert specs.batch_hooks == [hook]
+
+    with pytest.raises(ValueError, match="Batch hook 'hook_batch' is not one of the hooks"):
+        HookSpecs(project_name="acme", version="1", hooks=[hook], batch_hooks=[hook_batch])
+    with pytest.raises(ValueError, match="The array form of 'hook' clashes with the hook"):
+        HookSpecs(project_name="acme", version="1", hooks=[hook, hook_batch], batch_hooks=[hook])
+
+
 def test_get_hook_caller(simple_plugin) -> None:
     hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=[simple_plugin["path"]])
     hook_caller = hm.get_hook_caller()
@@ -86,6 +210,22 @@ def test_get_hook_caller(simple_plugin) -> None:
     # Call a hook for a specific plugin implementation
     assert hook_caller.friction_factor_impl("simple_plugin")(1, 2) == 3
 
+    # Unknown plugin ids are not inserted in the HookCaller.
+    assert hook_caller.friction_factor_impl("unknown_plugin") is None
+    assert hook_caller.env_temperature_impl("simple_plugin") is None
+    assert len(hook_caller.friction_factor_impls()) == 1
+
+    # Implementations appended as functions are called along with the native ones.
+    hook_caller.append_friction_factor_impl(lambda v1, v2: v1 * v2, "python_plugin")
+    friction_factors = hook_caller.friction_factor_impls()
+    assert [impl(2, 3) for impl in friction_factors] == [5, 6]
+    assert hook_caller.friction_factor_impl("python_plugin")(2, 4) == 8
+    hook_caller.remove_impls("python_plugin")
+    # The implementations returned are copies, unaffected by changes to the HookCaller.
+    assert len(friction_factors) == 2
+    assert len(hook_caller.friction_factor_impls()) == 1
+    assert hook_caller.friction_factor_impl("simple_plugin")(2, 3) == 5
+
 
 def test_get_hook_caller_passing_ignored_plugins(datadir, simple_plugin, simple_plugin_2) -> None:
     plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
@@ -340,3 +480,717 @@ def test_remove_plugin(datadir, simple_plugin, simple_plugin_2) -> None:
 
     hm.remove_plugin("simple_plugin")
     assert _get_plugin_id_set(hm.get_plugins_available()) == set()
+
+
+def test_get_plugins_available_with_discovery_cache(simple_plugin, simple_plugin_2, mocker) -> None:
+    plugin_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugin_dirs, discovery_cache=True)
+    plugins = hm.get_plugins_available()
+    assert (simple_plugin["path"] / ".hookman_cache.json").is_file()
+
+    # Unchanged plugins are served from the cache: no YAML parsing, no shared library loading.
+    load_yaml = mocker.spy(PluginInfo, "_load_yaml_file")
+    load_shared_lib = mocker.patch("hookman.plugin_config.load_shared_lib")
+    cached_plugins = hm.get_plugins_available()
+    assert [(p.id, p.version, p.hooks_implemented) for p in cached_plugins] == [
+        (p.id, p.version, p.hooks_implemented) for p in plugins
+    ]
+    assert load_yaml.call_count == 0
+    assert load_shared_lib.call_count == 0
+    # The lazy fields are still read from the plugin files when accessed.
+    assert cached_plugins == plugins
+
+    # Changing one of the plugin files invalidates its entry.
+    mocker.stopall()
+    readme = simple_plugin["path"] / "assets/README.md"
+    readme.write_text("New description")
+    plugins = hm.get_plugins_available()
+    assert {p.id: p.description for p in plugins}["simple_plugin"] == "New description"
+
+    # Without the cache enabled, the cache file is ignored.
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugin_dirs)
+    load_yaml = mocker.spy(PluginInfo, "_load_yaml_file")
+    assert hm.get_plugins_available() == plugins
+    assert load_yaml.call_count > 0
+
+
+@pytest.mark.parametrize("deep_discovery", [True, False])
+def test_discovery_cache_with_ignored_plugins(
+    datadir, simple_plugin, simple_plugin_2, deep_discovery
+) -> None:
+    plugins_root = datadir / "plugins"
+    cache_file = plugins_root / ".hookman_cache.json"
+    hm = HookMan(
+        specs=simple_plugin["specs"],
+        plugin_dirs=[plugins_root],
+        discovery_cache=True,
+        deep_discovery=deep_discovery,
+    )
+    assert [p.id for p in hm.get_plugins_available()] == ["simple_plugin", "simple_plugin_2"]
+    cache_content = cache_file.read_bytes()
+    cache_mtime = cache_file.stat().st_mtime_ns
+
+    # The entries of ignored plugins are kept, so the cache file is not rewritten.
+    for _ in range(2):
+        plugins = hm.get_plugins_available(ignored_plugins=["simple_plugin"])
+        assert [p.id for p in plugins] == ["simple_plugin_2"]
+        assert cache_file.read_bytes() == cache_content
+        assert cache_file.stat().st_mtime_ns == cache_mtime
+
+    # The entries of removed plugins are dropped.
+    hm._move_to_trash(plugins_root, "simple_plugin-1.0.0")
+    assert [p.id for p in hm.get_plugins_available()] == ["simple_plugin_2"]
+    assert "simple_plugin-1.0.0" not in cache_file.read_text()
+
+
+def test_get_plugins_available_without_deep_discovery(
+    datadir, simple_plugin, simple_plugin_2
+) -> None:
+    # A plugin.yaml outside of the installation layout is only found by the deep discovery.
+    (datadir / "plugins/simple_plugin-1.0.0/artifacts/nested").mkdir()
+    (datadir / "plugins/simple_plugin-1.0.0/artifacts/nested/plugin.yaml").write_text("invalid")
+
+    hm = HookMan(
+        specs=simple_plugin["specs"], plugin_dirs=[datadir / "plugins"], deep_discovery=False
+    )
+    assert [p.id for p in hm.get_plugins_available()] == ["simple_plugin", "simple_plugin_2"]
+    assert [p.id for p in hm.get_plugins_available(ignored_plugins=["simple_plugin"])] == [
+        "simple_plugin_2"
+    ]
+
+    hm._move_to_trash(datadir / "plugins", "simple_plugin-1.0.0")
+    assert [p.id for p in hm.get_plugins_available()] == ["simple_plugin_2"]
+
+
+def test_get_plugins_available_and_failures_with_max_workers(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs
+) -> None:
+    plugins_root = tmp_path / "plugins"
+    plugins_root.mkdir()
+    _make_broken_plugin_dir(plugins_root)
+    _make_missing_dll_plugin_dir(plugins_root)
+
+    plugin_dirs = [simple_plugin["path"], plugins_root, simple_plugin_2["path"]]
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=plugin_dirs)
+    expected_plugins, expected_failures = hm.get_plugins_available_and_failures()
+    assert [p.id for p in expected_plugins] == ["simple_plugin", "simple_plugin_2"]
+    assert len(expected_failures) == 2
+
+    plugins, failures = hm.get_plugins_available_and_failures(max_workers=4)
+    assert plugins == expected_plugins
+    assert failures == expected_failures
+
+    hook_caller = hm.get_hook_caller(ignored_plugins=["simple_plugin"], max_workers=4)
+    assert len(hook_caller.friction_factor_impls()) == 1
+    assert len(hook_caller.env_temperature_impls()) == 1
+
+    with pytest.raises(ValueError, match="max_workers must be at least 1, got 0"):
+        hm.get_plugins_available(max_workers=0)
+
+
+def test_get_hook_caller_loads_each_library_once(simple_plugin, simple_plugin_2, mocker) -> None:
+    import ctypes
+
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+
+    hook_caller = hm.get_hook_caller()
+    assert len(hook_caller.friction_factor_impls()) == 2
+    assert sorted(Path(call.args[0]).name for call in load_library.call_args_list) == [
+        Path(p.shared_lib_path).name for p in hm.get_plugins_available()
+    ]
+
+
+def test_get_hook_caller_cached_and_refreshed(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs, mocker
+) -> None:
+    import ctypes
+
+    root = tmp_path / "plugins"
+    root.mkdir()
+    shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+
+    hook_caller = hm.get_hook_caller()
+    assert hm.get_hook_caller() is hook_caller
+    assert hm.get_hook_caller(["a", "b"]) is hm.get_hook_caller(["b", "a"])
+    assert hm.get_hook_caller(["simple_plugin"]) is not hook_caller
+    assert len(hook_caller.friction_factor_impls()) == 1
+
+    # Only the new plugin is loaded on refresh.
+    shutil.copytree(simple_plugin_2["path"], root / "simple_plugin_2-1.0.0")
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+    hm.refresh()
+    assert [Path(call.args[0]).name for call in load_library.call_args_list] == [
+        "libsimple_plugin_2.so" if sys.platform != "win32" else "simple_plugin_2.dll"
+    ]
+    assert len(hook_caller.friction_factor_impls()) == 2
+    assert len(hook_caller.env_temperature_impls()) == 1
+    assert len(hm.get_hook_caller(["simple_plugin"]).friction_factor_impls()) == 1
+
+    # Nothing is loaded when no plugin changed.
+    load_library.reset_mock()
+    hm.refresh()
+    assert load_library.call_count == 0
+
+    # Removed plugins are dropped.
+    shutil.rmtree(root / "simple_plugin_2-1.0.0")
+    hm.refresh()
+    assert len(hook_caller.friction_factor_impls()) == 1
+    assert len(hook_caller.env_temperature_impls()) == 0
+    assert hook_caller.friction_factor_impl("simple_plugin")(1, 2) == 3
+    assert hook_caller.friction_factor_impl("simple_plugin_2") is None
+    assert len(hm.get_hook_caller(["simple_plugin"]).friction_factor_impls()) == 0
+
+
+def test_get_hook_caller_after_install_and_remove(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs
+) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+    hm.install_plugin(plugin_file_path=simple_plugin["zip"], dest_path=root)
+    hook_caller = hm.get_hook_caller()
+    assert len(hook_caller.friction_factor_impls()) == 1
+
+    # The cached HookCaller is not returned anymore once plugins are installed or removed.
+    hm.install_plugin(plugin_file_path=simple_plugin_2["zip"], dest_path=root)
+    load_reports: list[PluginLoadReport] = []
+    installed_hook_caller = hm.get_hook_caller(load_reports=load_reports)
+    assert installed_hook_caller is not hook_caller
+    assert len(installed_hook_caller.friction_factor_impls()) == 2
+    assert sorted(report.plugin_id for report in load_reports) == [
+        "simple_plugin",
+        "simple_plugin_2",
+    ]
+    assert len(hook_caller.friction_factor_impls()) == 1
+
+    hm.remove_plugin("simple_plugin_2")
+    removed_hook_caller = hm.get_hook_caller()
+    assert removed_hook_caller is not installed_hook_caller
+    assert removed_hook_caller.friction_factor_impl("simple_plugin_2") is None
+    assert len(removed_hook_caller.friction_factor_impls()) == 1
+
+
+def test_refresh_with_failed_plugin(tmp_path, simple_plugin, acme_hook_specs, mocker) -> None:
+    import ctypes
+
+    root = tmp_path / "plugins"
+    root.mkdir()
+    shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+    broken_plugin_dir = _make_broken_plugin_dir(root)
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+    hook_caller = hm.get_hook_caller()
+    assert len(hook_caller.friction_factor_impls()) == 1
+
+    # The failed plugin is not probed again while its files are unchanged.
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+    hm.refresh()
+    assert load_library.call_count == 0
+
+    # It is probed again once its library changes, or after it was removed and added back.
+    broken_lib = next((broken_plugin_dir / "artifacts").iterdir())
+    broken_lib.write_text("still not a shared library")
+    hm.refresh()
+    assert load_library.call_count == 1
+    shutil.move(broken_plugin_dir, tmp_path / "broken_plugin")
+    hm.refresh()
+    shutil.move(tmp_path / "broken_plugin", broken_plugin_dir)
+    hm.refresh()
+    assert load_library.call_count == 2
+
+    # Once fixed, it is loaded.
+    shutil.rmtree(broken_plugin_dir)
+    shutil.copytree(simple_plugin["path"], broken_plugin_dir)
+    hm.refresh()
+    assert load_library.call_count == 3
+    assert len(hook_caller.friction_factor_impls()) == 2
+
+
+def test_hook_caller_called_while_refreshed(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs
+) -> None:
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    pytest.importorskip("numpy")
+    root = tmp_path / "plugins"
+    root.mkdir()
+    shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+    hook_caller = hm.get_hook_caller()
+    stop = threading.Event()
+
+    def call_hooks() -> set[tuple[int, ...]]:
+        all_results = set()
+        while not stop.is_set():
+            assert hook_caller.call_friction_factor("simple_plugin", 5, 2) == 7
+            all_results.add(tuple(sorted(hook_caller.call_friction_factor_all(5, 2).tolist())))
+            assert len(hook_caller.friction_factor_impls()) in (1, 2)
+        return all_results
+
+    # The plugins are loaded and released while other threads call the hooks.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(call_hooks) for _ in range(4)]
+        try:
+            for _ in range(10):
+                shutil.copytree(simple_plugin_2["path"], root / "simple_plugin_2-1.0.0")
+                hm.refresh()
+                shutil.rmtree(root / "simple_plugin_2-1.0.0")
+                hm.refresh()
+        finally:
+            stop.set()
+        all_results = set().union(*(future.result() for future in futures))
+    assert all_results <= {(7,), (3, 7)}
+    assert hook_caller.call_friction_factor_all(5, 2).tolist() == [7]
+
+
+def test_load_reports(tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+    _make_missing_dll_plugin_dir(root)
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root], discovery_cache=True)
+
+    load_reports: list[PluginLoadReport] = []
+    plugins, [failure] = hm.get_plugins_available_and_failures(load_reports=load_reports)
+    [plugin] = plugins
+    failure_report, plugin_report = load_reports
+    assert failure.load_report is failure_report
+    assert failure_report.plugin_id == "missing_dll_plugin"
+    assert failure_report.shared_lib_size is None
+    assert failure_report.dlopen_seconds == ()
+
+    assert plugin_report.plugin_id == "simple_plugin"
+    assert plugin_report.shared_lib_size == plugin.shared_lib_path.stat().st_size
+    assert not plugin_report.from_cache
+    assert plugin_report.parse_seconds > 0
+    assert len(plugin_report.dlopen_seconds) == 1
+    assert plugin_report.load_impls_seconds == 0
+    assert plugin_report.total_seconds > plugin_report.dlopen_seconds[0]
+
+    # Plugins served by the discovery cache are not loaded.
+    load_reports.clear()
+    hm.get_plugins_available_and_failures(load_reports=load_reports)
+    assert load_reports[1] == PluginLoadReport(
+        plugin.yaml_location, "simple_plugin", plugin_report.shared_lib_size, from_cache=True
+    )
+
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+    load_reports.clear()
+    hm.get_hook_caller(load_reports=load_reports)
+    assert [r.plugin_id for r in load_reports] == ["missing_dll_plugin", "simple_plugin"]
+    assert load_reports[0].load_impls_seconds == 0
+    assert load_reports[1].load_impls_seconds > 0
+
+    # The cached HookCaller is returned without loading any plugin.
+    load_reports.clear()
+    hm.get_hook_caller(load_reports=load_reports)
+    assert load_reports == []
+
+
+@pytest.mark.parametrize(
+    "plugin_resolution, expected_versions",
+    [
+        ("all", ["1.0.0", "2.0.0", "3.0.0"]),
+        ("newest", ["3.0.0"]),
+        ("first", ["2.0.0"]),
+    ],
+)
+def test_plugin_resolution(
+    tmp_path,
+    simple_plugin,
+    simple_plugin_2,
+    acme_hook_specs,
+    mocker,
+    plugin_resolution,
+    expected_versions,
+) -> None:
+    import ctypes
+
+    def copy_plugin(root: Path, version: str) -> None:
+        plugin_dir = root / f"simple_plugin-{version}"
+        shutil.copytree(simple_plugin["path"], plugin_dir)
+        yaml_location = plugin_dir / "assets/plugin.yaml"
+        yaml_location.write_text(
+            yaml_location.read_text().replace("version: '1.0.0'", f"version: '{version}'")
+        )
+
+    first_root = tmp_path / "first"
+    second_root = tmp_path / "second"
+    copy_plugin(first_root, "1.0.0")
+    copy_plugin(first_root, "2.0.0")
+    copy_plugin(second_root, "3.0.0")
+    hm = HookMan(
+        specs=acme_hook_specs,
+        plugin_dirs=[first_root, second_root, simple_plugin_2["path"]],
+        plugin_resolution=plugin_resolution,
+    )
+
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+    plugins = hm.get_plugins_available()
+    assert sorted(str(p.version) for p in plugins if p.id == "simple_plugin") == expected_versions
+    assert [p.id for p in plugins if p.id != "simple_plugin"] == ["simple_plugin_2"]
+    # The superseded versions are never loaded.
+    assert load_library.call_count == len(plugins)
+
+    hook_caller = hm.get_hook_caller()
+    assert len(hook_caller.friction_factor_impls()) == len(plugins)
+    assert hm.get_plugins_available(ignored_plugins=["simple_plugin"]) == plugins[-1:]
+
+    # A newer version installed later supersedes the loaded one on refresh.
+    copy_plugin(first_root, "4.0.0")
+    hm.refresh()
+    assert len(hook_caller.friction_factor_impls()) == len(plugins) + (plugin_resolution == "all")
+    assert [str(p.version) for p in hm.get_plugins_available() if p.id == "simple_plugin"][-1] == (
+        "4.0.0" if plugin_resolution != "all" else "3.0.0"
+    )
+
+
+def test_remove_plugin_with_plugin_resolution(tmp_path, simple_plugin, acme_hook_specs) -> None:
+    root = tmp_path / "plugins"
+    for version in ("1.0.0", "2.0.0", "3.0.0"):
+        plugin_dir = root / f"simple_plugin-{version}"
+        shutil.copytree(simple_plugin["path"], plugin_dir)
+        yaml_location = plugin_dir / "assets/plugin.yaml"
+        yaml_location.write_text(
+            yaml_location.read_text().replace("version: '1.0.0'", f"version: '{version}'")
+        )
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root], plugin_resolution="newest")
+
+    # Versions superseded by the resolution can still be removed.
+    hm.remove_plugin("simple_plugin", Version("1.0.0"))
+    assert _get_names_inside_folder(root) == {
+        "simple_plugin-2.0.0",
+        "simple_plugin-3.0.0",
+        ".trash",
+    }
+
+    # All the versions are removed when no version is given.
+    hm.remove_plugin("simple_plugin")
+    assert _get_names_inside_folder(root) == {".trash"}
+    assert hm.get_plugins_available() == []
+
+
+def test_plugin_resolution_invalid(acme_hook_specs) -> None:
+    with pytest.raises(ValueError, match="plugin_resolution must be 'all', 'newest' or 'first'"):
+        HookMan(specs=acme_hook_specs, plugin_dirs=[], plugin_resolution="last")  # type:ignore[arg-type]
+
+
+def test_get_plugins_available_with_failure_cache(
+    tmp_path, simple_plugin, acme_hook_specs, mocker
+) -> None:
+    import ctypes
+
+    plugins_root = tmp_path / "plugins"
+    plugins_root.mkdir()
+    broken_plugin_dir = _make_broken_plugin_dir(plugins_root)
+    hm = HookMan(
+        specs=acme_hook_specs, plugin_dirs=[simple_plugin["path"], plugins_root], failure_cache=True
+    )
+    plugins, [failure] = hm.get_plugins_available_and_failures()
+    cache = json.loads((plugins_root / ".hookman_cache.json").read_text())
+    assert cache["plugins"] == {}
+    assert list(cache["failures"]) == [str(failure.yaml_location)]
+
+    # The known failure is reported without loading the library again.
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+    assert hm.get_plugins_available_and_failures() == (plugins, [failure])
+    assert [Path(call.args[0]).parent.parent.name for call in load_library.call_args_list] == [
+        simple_plugin["path"].name
+    ]
+
+    # It is probed again after its library changes, or after clearing the failures.
+    broken_lib = next((broken_plugin_dir / "artifacts").iterdir())
+    for retry in (
+        lambda: broken_lib.write_text("still not a shared library"),
+        hm.clear_failure_cache,
+    ):
+        retry()
+        load_library.reset_mock()
+        assert hm.get_plugins_available_and_failures() == (plugins, [failure])
+        assert load_library.call_count == 2
+        load_library.reset_mock()
+        hm.get_plugins_available_and_failures()
+        assert load_library.call_count == 1
+
+    # Failures are not cached by default.
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[simple_plugin["path"], plugins_root])
+    load_library.reset_mock()
+    hm.get_plugins_available_and_failures()
+    assert load_library.call_count == 2
+
+
+def test_get_plugin_registry(tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs) -> None:
+    root = tmp_path / "plugins"
+    for version in ("1.0.0", "2.0.0"):
+        plugin_dir = root / f"simple_plugin-{version}"
+        shutil.copytree(simple_plugin["path"], plugin_dir)
+        yaml_location = plugin_dir / "assets/plugin.yaml"
+        yaml_location.write_text(yaml_location.read_text().replace("'1.0.0'", f"'{version}'"))
+    shutil.copytree(simple_plugin_2["path"], root / "simple_plugin_2-1.0.0")
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+
+    registry = hm.get_plugin_registry()
+    assert list(registry) == hm.get_plugins_available()
+    assert len(registry) == 3
+    assert sorted(registry.ids) == ["simple_plugin", "simple_plugin_2"]
+    assert sorted(str(p.version) for p in registry.get_by_id("simple_plugin")) == ["1.0.0", "2.0.0"]
+    assert registry.get_by_id("unknown") == ()
+    plugin = registry.get("simple_plugin", "2.0.0")
+    assert plugin is not None
+    assert plugin.version == Version("2.0.0")
+    assert registry.get("simple_plugin", Version("3.0.0")) is None
+
+    [simple_plugin_2_info] = registry.get_by_id("simple_plugin_2")
+    assert registry.implementing("env_temperature") == (simple_plugin_2_info,)
+    assert len(registry.implementing("friction_factor")) == 3
+    assert registry.implementing("unknown") == ()
+    assert registry.implementing_all(["friction_factor", "env_temperature"]) == (
+        simple_plugin_2_info,
+    )
+    assert registry.implementing_all(["friction_factor", "unknown"]) == ()
+    friction_factor_bit = registry.hook_bit("friction_factor")
+    assert all(mask & friction_factor_bit for mask in registry.masks)
+
+    # Removes all the versions of the plugin, not the plugins whose id starts with the same name.
+    hm.remove_plugin("simple_plugin")
+    assert [p.id for p in hm.get_plugins_available()] == ["simple_plugin_2"]
+
+
+def test_plugin_info_lazy_fields(simple_plugin, mocker) -> None:
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=[simple_plugin["path"]])
+    read_text = mocker.spy(Path, "read_text")
+    [plugin] = hm.get_plugins_available()
+    # The plugin.yaml is parsed once, the README.md is not read.
+    assert [call.args[0].name for call in read_text.call_args_list] == ["plugin.yaml"]
+
+    readme = simple_plugin["path"] / "assets/README.md"
+    assert plugin.description == readme.read_text()
+    assert plugin.requirements == {}
+    assert plugin.extras == {}
+    # The loaded values are kept, even if the files change.
+    readme.write_text("New description")
+    assert plugin.description != "New description"
+
+    plugin.release_lazy_fields()
+    assert plugin.description == "New description"
+
+    with pytest.raises(AttributeError, match="'PluginInfo' object has no attribute 'foo'"):
+        _ = plugin.foo  # type:ignore[attr-defined]
+
+    # The requirements and extras are kept from the discovery, the description is read again.
+    plugin.release_lazy_fields()
+    plugin.yaml_location.unlink()
+    readme.unlink()
+    assert plugin.requirements == {}
+    assert plugin.extras == {}
+    assert plugin.description == "Could not find a description"
+
+    # Lazy fields are not available anymore once the plugin files can not be read.
+    plugin.release_lazy_fields()
+    readme.write_bytes(b"\xff invalid UTF-8")
+    with pytest.raises(AttributeError, match="Could not read the description of the plugin at"):
+        _ = plugin.description
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="ELF shared libraries only")
+def test_get_plugins_available_with_static_inspection(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs, mocker
+) -> None:
+    plugins_root = tmp_path / "plugins"
+    plugins_root.mkdir()
+    _make_broken_plugin_dir(plugins_root)
+    _make_missing_dll_plugin_dir(plugins_root)
+    plugin_dirs = [simple_plugin["path"], simple_plugin_2["path"], plugins_root]
+
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=plugin_dirs)
+    expected_plugins, expected_failures = hm.get_plugins_available_and_failures()
+
+    import ctypes
+
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=plugin_dirs, static_inspection=True)
+    plugins, failures = hm.get_plugins_available_and_failures()
+    assert load_library.call_count == 0
+    assert plugins == expected_plugins
+    assert [p.hooks_implemented for p in plugins] == [
+        ["friction_factor"],
+        ["friction_factor", "env_temperature"],
+    ]
+    assert [f.plugin_id for f in failures] == [f.plugin_id for f in expected_failures]
+    assert {f.reason.split(": ")[-1] for f in failures if f.plugin_id == "broken_plugin"} == {
+        "not an ELF file"
+    }
+
+
+def test_plugin_info_compact_representation(simple_plugin, simple_plugin_2) -> None:
+    import pickle
+
+    plugins_dirs = [simple_plugin["path"], simple_plugin_2["path"]]
+    hm = HookMan(specs=simple_plugin["specs"], plugin_dirs=plugins_dirs)
+    plugin, plugin_2 = hm.get_plugins_available()
+    assert not hasattr(plugin, "__dict__")
+
+    from hookman.plugin_config import HooksImplemented
+
+    hooks_implemented = plugin_2.hooks_implemented
+    assert isinstance(hooks_implemented, HooksImplemented)
+    assert isinstance(plugin.hooks_implemented, HooksImplemented)
+    assert hooks_implemented == ["friction_factor", "env_temperature"]
+    assert ["friction_factor", "env_temperature"] == hooks_implemented
+    assert hooks_implemented != ["friction_factor"]
+    assert list(hooks_implemented) == ["friction_factor", "env_temperature"]
+    assert len(hooks_implemented) == 2
+    assert hooks_implemented[-1] == "env_temperature"
+    assert "env_temperature" in hooks_implemented
+    assert "env_temperature" not in plugin.hooks_implemented
+    assert "unknown" not in hooks_implemented
+    assert repr(plugin.hooks_implemented) == "['friction_factor']"
+
+    assert hooks_implemented + ["other"] == ["friction_factor", "env_temperature", "other"]
+    assert ["other"] + plugin.hooks_implemented == ["other", "friction_factor"]
+    assert json.dumps(list(hooks_implemented)) == '["friction_factor", "env_temperature"]'
+
+    # The bits of the mask follow the names of all the hooks available.
+    assert plugin.hooks_implemented.hook_names == hooks_implemented.hook_names
+    assert [
+        name
+        for i, name in enumerate(hooks_implemented.hook_names)
+        if hooks_implemented.mask >> i & 1
+    ] == ["friction_factor", "env_temperature"]
+
+    copied_plugin = pickle.loads(pickle.dumps(plugin_2))
+    assert copied_plugin == plugin_2
+    assert copied_plugin.hooks_implemented == hooks_implemented
+    assert copied_plugin.hooks_implemented.mask == hooks_implemented.mask
+
+    # The names of the hooks shared between instances are bounded, the others work the same.
+    many = [HooksImplemented(["hook", f"hook_{i}"], [f"hook_{i}"]) for i in range(100)]
+    assert many[-1] == ["hook_99"]
+    assert len(HooksImplemented._shared_hook_names) <= HooksImplemented._MAX_SHARED_HOOK_NAMES
+
+    from hookman.hooks import PluginLoadFailure
+
+    failure = PluginLoadFailure(plugin.yaml_location, "simple_plugin", "reason")
+    assert not hasattr(failure, "__dict__")
+    assert dataclasses.replace(failure, reason="other").reason == "other"
+
+
+def test_watch_plugins(tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root], discovery_cache=True)
+    assert [p.id for p in hm.get_plugins_available()] == ["simple_plugin"]
+
+    with hm.watch_plugins() as watcher:
+        token = watcher.token
+        shutil.copytree(simple_plugin_2["path"], root / "simple_plugin_2-1.0.0")
+        _make_missing_dll_plugin_dir(root)
+        changes = watcher.changes_since(token)
+        assert len(changes.added) == 2
+        assert not changes.removed and not changes.changed
+
+        plugins, failures = hm.probe_plugins(changes.added)
+        assert [p.id for p in plugins] == ["simple_plugin_2"]
+        assert len(failures) == 1
+
+        # Probing only some plugins keeps the cache entries of the other ones.
+        cache = json.loads((root / ".hookman_cache.json").read_text())
+        assert len(cache["plugins"]) == 2
+
+
+def test_get_plugins_available_with_plugin_index(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs, mocker
+) -> None:
+    from hookman.plugin_index import PluginIndex
+
+    root = tmp_path / "plugins"
+    root.mkdir()
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root], plugin_index=True)
+    hm.install_plugin(plugin_file_path=simple_plugin["zip"], dest_path=root)
+    hm.install_plugin(plugin_file_path=simple_plugin_2["zip"], dest_path=root)
+
+    index = PluginIndex.load(root)
+    assert index is not None and index.is_fresh()
+    assert [(p.dir_name, p.id, p.version) for p in index.plugins()] == [
+        ("simple_plugin-1.0.0", "simple_plugin", "1.0.0"),
+        ("simple_plugin_2-1.0.0", "simple_plugin_2", "1.0.0"),
+    ]
+
+    # A fresh index is used instead of scanning the root and parsing the plugin.yaml files.
+    read_config_spy = mocker.spy(PluginInfo, "read_config_file")
+    expected_plugins = HookMan(specs=acme_hook_specs, plugin_dirs=[root]).get_plugins_available()
+    read_config_spy.reset_mock()
+    plugins = hm.get_plugins_available()
+    assert read_config_spy.call_count == 0
+    assert plugins == expected_plugins
+
+    read_config_spy.reset_mock()
+
+    # A plugin copied by hand makes the index stale, so the root is scanned again.
+    _make_missing_dll_plugin_dir(root)
+    plugins, failures = hm.get_plugins_available_and_failures()
+    assert [p.id for p in plugins] == ["simple_plugin", "simple_plugin_2"]
+    assert [f.plugin_id for f in failures] == ["missing_dll_plugin"]
+    assert read_config_spy.call_count == 3
+
+    # Removing a plugin rebuilds the stale index.
+    hm.remove_plugin("simple_plugin_2", Version("1.0.0"))
+    read_config_spy.reset_mock()
+    plugins, failures = hm.get_plugins_available_and_failures()
+    assert [p.id for p in plugins] == ["simple_plugin"]
+    assert [f.plugin_id for f in failures] == ["missing_dll_plugin"]
+    assert read_config_spy.call_count == 0
+
+
+def test_import_hooks_module() -> None:
+    """
+    Importing hookman.hooks (for instance to create the HookSpecs of a project) must not import the
+    dependencies only needed to discover and load plugins.
+    """
+    import subprocess
+
+    output = subprocess.run(
+        [sys.executable, "-c", "import sys, hookman.hooks; print(*sorted(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    imported_modules = set(output.split())
+    assert "hookman.hooks" in imported_modules
+    heavy_modules = {"strictyaml", "pluggy", "packaging.version", "ctypes", "zipfile"}
+    assert heavy_modules.isdisjoint(imported_modules)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_iter_plugins(
+    tmp_path, simple_plugin, simple_plugin_2, acme_hook_specs, mocker, max_workers
+):
+    import ctypes
+
+    plugins_root = tmp_path / "plugins"
+    plugins_root.mkdir()
+    _make_missing_dll_plugin_dir(plugins_root)
+    plugin_dirs = [simple_plugin_2["path"], plugins_root, simple_plugin["path"]]
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=plugin_dirs)
+
+    results = list(hm.iter_plugins(max_workers=max_workers))
+    plugins, failures = hm.get_plugins_available_and_failures()
+    assert results == [plugins[0], failures[0], plugins[1]]
+    assert list(hm.iter_plugins(ignored_plugins=["simple_plugin_2"])) == failures + plugins[1:]
+
+    # Stop on the first plugin implementing env_temperature: the other plugins are not loaded.
+    load_library = mocker.spy(ctypes.cdll, "LoadLibrary")
+    plugins_iterator = hm.iter_plugins(max_workers=max_workers)
+    found = next(
+        p
+        for p in plugins_iterator
+        if isinstance(p, PluginInfo) and "env_temperature" in p.hooks_implemented
+    )
+    plugins_iterator.close()
+    assert found.id == "simple_plugin_2"
+    if max_workers == 1:
+        assert load_library.call_count == 1
@@ -97,3 +97,67 @@ def testPluginInfoInvalidSchema(tmp_path: Path, mocker: MockerFixture) -> None:
     expected_message = f"The plugin.yaml does not follow the PLUGIN_CONFIG_SCHEMA: {current_schema}"
     with pytest.raises(ValueError, match=re.escape(expected_message)):
         _ = PluginInfo(invalid_yaml_file)
+
+
+@pytest.mark.parametrize(
+    "yaml_content, uses_fast_path",
+    [
+        ("caption: 'A'\nversion: '1.0.0'\nauthor: 'B'\nemail: 'b@b'\nid: 'a'\n", True),
+        ("id: a\n\ncaption: It''s 'A'\nversion: 1.0.0\nauthor: \"B\"\nemail: b@b.com\n", True),
+        (
+            (
+                "# Comment\ncaption: 'It''s'\nversion: '1.0'\nauthor: B\nemail: b\nid: a\n"
+                "extras:\n  key: value\n  other key: 'x: y'\nrequirements:\n  a: '>=1.0'\n"
+            ),
+            True,
+        ),
+        (
+            (
+                "caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a\n"
+                "extras:\n  key: value\nrequirements:\n    a: '>=1.0'\n"
+            ),
+            False,
+        ),
+        ("caption: A\nversion: 1.0\nauthor: B # comment\nemail: b\nid: a\n", False),
+        ('caption: "A\\tB"\nversion: 1.0\nauthor: B\nemail: b\nid: a\n', False),
+        ("caption: |\n  A\nversion: 1.0\nauthor: B\nemail: b\nid: a\n", False),
+        ("caption: A\n  B\nversion: 1.0\nauthor: B\nemail: b\nid: a\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a\nextras:\n  a: b\n   c: d\n", False),
+        ("caption: foo:\nversion: 1.0\nauthor: B\nemail: b\nid: a\n", False),
+        ("caption: A\nversion: 1.0.0:\nauthor: B\nemail: b\nid: a\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: foo::\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a\nextras:\n  a: b:\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a::b\n", True),
+        # Invalid according to the schema.
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a\nother: c\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a\nextras: c\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid:\n  a: b\n", False),
+        ("caption: A\nversion: 1.0\nauthor: B\nemail: b\nid: a\nextras:\n", False),
+    ],
+)
+def test_load_yaml_file_fast_path(yaml_content: str, uses_fast_path: bool) -> None:
+    import strictyaml
+    from strictyaml.ruamel.error import MarkedYAMLError
+
+    from hookman.plugin_config import PLUGIN_CONFIG_SCHEMA
+    from hookman.plugin_config import _fast_load_plugin_config
+
+    fast_content = _fast_load_plugin_config(yaml_content)
+    assert (fast_content is not None) == uses_fast_path
+
+    try:
+        expected = strictyaml.load(yaml_content, PLUGIN_CONFIG_SCHEMA).data
+    except strictyaml.YAMLValidationError:
+        with pytest.raises(ValueError, match="The plugin.yaml does not follow the PLUGIN_CONFIG"):
+            PluginInfo._load_yaml_file(yaml_content)
+    except MarkedYAMLError as error:
+        # Syntax errors, raised by the strictyaml parser.
+        with pytest.raises(type(error)):
+            PluginInfo._load_yaml_file(yaml_content)
+    else:
+        if fast_content is not None:
+            assert fast_content == expected
+            assert list(fast_content) == list(expected)
+        content = PluginInfo._load_yaml_file(yaml_content)
+        assert {k: v for k, v in content.items() if k != "shared_lib_name"} == expected
@@ -0,0 +1,113 @@
+# mypy: allow-untyped-defs
+import shutil
+import sys
+
+import pytest
+
+from hookman.plugin_watcher import PluginChanges
+from hookman.plugin_watcher import PluginWatcher
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+@pytest.mark.parametrize("deep_discovery", [True, False])
+def test_plugin_watcher(
+    tmp_path, simple_plugin, simple_plugin_2, use_inotify, deep_discovery
+) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+    plugin_yaml = root / "simple_plugin-1.0.0/assets/plugin.yaml"
+    plugin_2_yaml = root / "simple_plugin_2-1.0.0/assets/plugin.yaml"
+
+    with PluginWatcher(
+        [root, tmp_path / "missing"],
+        ignored_sub_dir_names=[".trash"],
+        deep_discovery=deep_discovery,
+        use_inotify=use_inotify,
+    ) as watcher:
+        assert watcher.uses_inotify == (use_inotify and sys.platform.startswith("linux"))
+        assert watcher.plugins() == [plugin_yaml]
+        assert watcher.changes_since(0) == PluginChanges(watcher.token, added=[plugin_yaml])
+
+        token = watcher.token
+        assert watcher.poll() == token
+        assert not watcher.changes_since(token)
+
+        shutil.copytree(simple_plugin_2["path"], root / "simple_plugin_2-1.0.0")
+        changes = watcher.changes_since(token)
+        assert changes == PluginChanges(changes.token, added=[plugin_2_yaml])
+        assert changes.token > token
+
+        with plugin_yaml.open("a") as file:
+            file.write("\n")
+        assert watcher.changes_since(changes.token) == PluginChanges(
+            watcher.token, changed=[plugin_yaml]
+        )
+        assert watcher.changes_since(token) == PluginChanges(
+            watcher.token, added=[plugin_2_yaml], changed=[plugin_yaml]
+        )
+
+        token = watcher.token
+        (root / "simple_plugin_2-1.0.0/artifacts/libsimple_plugin_2.so").unlink()
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, changed=[plugin_2_yaml])
+
+        token = watcher.token
+        (root / ".trash").mkdir()
+        (root / "simple_plugin-1.0.0").rename(root / ".trash/simple_plugin-1.0.0")
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, removed=[plugin_yaml])
+        assert watcher.plugins() == [plugin_2_yaml]
+
+        # Installing a plugin again reports it as changed to tokens from before its removal, and
+        # as added to the tokens from while it was removed.
+        removed_token = watcher.token
+        shutil.copytree(simple_plugin["path"], root / "simple_plugin-1.0.0")
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, changed=[plugin_yaml])
+        assert watcher.changes_since(removed_token) == PluginChanges(
+            watcher.token, added=[plugin_yaml]
+        )
+
+        # Removing it again only reports it as removed to the tokens from while it was installed.
+        reinstalled_token = watcher.token
+        shutil.rmtree(root / "simple_plugin-1.0.0")
+        assert watcher.changes_since(reinstalled_token) == PluginChanges(
+            watcher.token, removed=[plugin_yaml]
+        )
+        assert not watcher.changes_since(removed_token)
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, removed=[plugin_yaml])
+
+        # Plugin directories that did not exist are picked up once created.
+        token = watcher.token
+        shutil.copytree(simple_plugin["path"], tmp_path / "missing/simple_plugin-1.0.0")
+        assert watcher.changes_since(token) == PluginChanges(
+            watcher.token, added=[tmp_path / "missing/simple_plugin-1.0.0/assets/plugin.yaml"]
+        )
+
+        with pytest.raises(ValueError, match="Invalid token 1000, the current token is"):
+            watcher.changes_since(1000)
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+@pytest.mark.parametrize("deep_discovery", [True, False])
+def test_plugin_watcher_late_plugin_yaml(
+    tmp_path, simple_plugin, use_inotify, deep_discovery
+) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    plugin_dir = root / "simple_plugin-1.0.0"
+    with PluginWatcher(root, deep_discovery=deep_discovery, use_inotify=use_inotify) as watcher:
+        # As done by `HookMan.install_plugin`, the directory is created before its files.
+        (plugin_dir / "assets").mkdir(parents=True)
+        token = watcher.poll()
+        assert watcher.plugins() == []
+
+        shutil.copytree(simple_plugin["path"], plugin_dir, dirs_exist_ok=True)
+        plugin_yaml = plugin_dir / "assets/plugin.yaml"
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, added=[plugin_yaml])
+
+        # Same when only the plugin.yaml is removed and created again.
+        token = watcher.token
+        plugin_yaml.rename(tmp_path / "plugin.yaml")
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, removed=[plugin_yaml])
+        token = watcher.token
+        (tmp_path / "plugin.yaml").rename(plugin_yaml)
+        assert watcher.changes_since(token) == PluginChanges(watcher.token, added=[plugin_yaml])
@@ -0,0 +1,140 @@
+# mypy: allow-untyped-defs
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from hookman.exceptions import PluginProbeError
+from hookman.exceptions import SharedLibraryNotFoundError
+from hookman.hooks import HookMan
+from hookman.hooks import PluginLoadReport
+from hookman.plugin_config import PluginInfo
+from hookman.probe_pool import ProbePool
+
+
+def _make_plugin_with_initializer(
+    root: Path, plugin_id: str, initializer_body: str, exported_id: str | None = None
+) -> Path:
+    """
+    Create a plugin whose shared library runs ``initializer_body`` (C code) when loaded, and
+    returns ``exported_id`` (by default ``plugin_id``) from ``get_plugin_id``.
+    """
+    compiler = shutil.which("cc") or shutil.which("gcc")
+    if compiler is None:
+        pytest.skip("C compiler not available")
+
+    plugin_dir = root / f"{plugin_id}-1.0.0"
+    (plugin_dir / "assets").mkdir(parents=True)
+    (plugin_dir / "artifacts").mkdir()
+    yaml_location = plugin_dir / "assets/plugin.yaml"
+    yaml_location.write_text(
+        f"caption: 'Plugin'\nversion: '1.0.0'\nauthor: 'a'\nemail: 'a@a.com'\nid: '{plugin_id}'\n"
+    )
+    source = plugin_dir / "plugin.c"
+    source.write_text(
+        "#include <signal.h>\n"
+        "#include <unistd.h>\n"
+        f'const char* get_plugin_id(void) {{ return "{exported_id or plugin_id}"; }}\n'
+        f"__attribute__((constructor)) static void initialize(void) {{ {initializer_body} }}\n"
+    )
+    subprocess.run(
+        [
+            compiler,
+            "-shared",
+            "-fPIC",
+            str(source),
+            "-o",
+            str(plugin_dir / f"artifacts/lib{plugin_id}.so"),
+        ],
+        check=True,
+    )
+    return yaml_location
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="compiles a Linux shared library")
+def test_probe_pool_hang_and_crash(tmp_path, simple_plugin, acme_hook_specs) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    hang_yaml = _make_plugin_with_initializer(root, "hang_plugin", "for (;;) { sleep(1); }")
+    crash_yaml = _make_plugin_with_initializer(root, "crash_plugin", "raise(SIGSEGV);")
+    simple_yaml = simple_plugin["path"] / "assets/plugin.yaml"
+    hm = HookMan(specs=acme_hook_specs, plugin_dirs=[root])
+
+    with ProbePool(hm.hooks_available, timeout=2) as pool:
+        with pytest.raises(PluginProbeError, match="probing timed out after 2s"):
+            pool.probe(hang_yaml, PluginInfo.read_config_file(hang_yaml))
+        with pytest.raises(PluginProbeError, match="the probing process crashed"):
+            pool.probe(crash_yaml, PluginInfo.read_config_file(crash_yaml))
+
+        # The pool keeps working after its workers are killed.
+        plugin_info = pool.probe(simple_yaml, PluginInfo.read_config_file(simple_yaml))
+        assert plugin_info == PluginInfo(simple_yaml, hm.hooks_available)
+
+        missing_yaml = root / "missing_plugin-1.0.0/assets/plugin.yaml"
+        with pytest.raises(SharedLibraryNotFoundError):
+            pool.probe(missing_yaml, {**PluginInfo.read_config_file(simple_yaml), "id": "missing"})
+
+    hm = HookMan(
+        specs=acme_hook_specs,
+        plugin_dirs=[root, simple_plugin["path"]],
+        isolated_probing=True,
+        probe_timeout=2,
+    )
+    plugins, failures = hm.get_plugins_available_and_failures(max_workers=2)
+    assert [p.id for p in plugins] == ["simple_plugin"]
+    assert sorted(f.plugin_id for f in failures) == ["crash_plugin", "hang_plugin"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="compiles a Linux shared library")
+def test_probe_errors_not_cached(tmp_path, acme_hook_specs) -> None:
+    import json
+
+    root = tmp_path / "plugins"
+    root.mkdir()
+    _make_plugin_with_initializer(root, "crash_plugin", "raise(SIGSEGV);")
+    missing_yaml = _make_plugin_with_initializer(root, "missing_plugin", "")
+    (missing_yaml.parents[1] / "artifacts/libmissing_plugin.so").unlink()
+    hm = HookMan(
+        specs=acme_hook_specs,
+        plugin_dirs=[root],
+        isolated_probing=True,
+        probe_timeout=2,
+        failure_cache=True,
+    )
+    _plugins, failures = hm.get_plugins_available_and_failures()
+    assert sorted(f.plugin_id for f in failures) == ["crash_plugin", "missing_plugin"]
+
+    # Only the failure to find the library is cached, the crash is probed again next time.
+    cache = json.loads((root / ".hookman_cache.json").read_text())
+    assert list(cache["failures"]) == [str(missing_yaml)]
+    load_reports: list[PluginLoadReport] = []
+    hm.get_plugins_available_and_failures(load_reports=load_reports)
+    assert {report.plugin_id: report.from_cache for report in load_reports} == {
+        "crash_plugin": False,
+        "missing_plugin": True,
+    }
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="compiles a Linux shared library")
+def test_isolated_probing_with_invalid_plugins(tmp_path, simple_plugin, acme_hook_specs) -> None:
+    root = tmp_path / "plugins"
+    root.mkdir()
+    _make_plugin_with_initializer(root, "mismatch_plugin", "", exported_id="other_plugin")
+    broken_yaml = _make_plugin_with_initializer(root, "broken_plugin", "")
+    (broken_yaml.parents[1] / "artifacts/libbroken_plugin.so").write_text("not a library")
+    hm = HookMan(
+        specs=acme_hook_specs,
+        plugin_dirs=[root, simple_plugin["path"]],
+        isolated_probing=True,
+        probe_timeout=10,
+    )
+
+    # The invalid plugins are reported as failures, without stopping the discovery.
+    plugins, failures = hm.get_plugins_available_and_failures()
+    assert [p.id for p in plugins] == ["simple_plugin"]
+    reasons = {f.plugin_id: f.reason for f in failures}
+    assert sorted(reasons) == ["broken_plugin", "mismatch_plugin"]
+    assert "RuntimeError: Error, the plugin_id inside plugin.yaml" in reasons["mismatch_plugin"]
+    assert "probing process crashed" not in reasons["broken_plugin"]